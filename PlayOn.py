@@ -5,28 +5,32 @@
 from functools import partial
 import threading
 import selectors
+import asyncio
 import argparse
 import os
 import msvcrt
 import subprocess
 import time
+import tempfile
+import mmap
 from http import server, client, HTTPStatus
 import socket
 import socketserver
 import ssl
 import urllib.request, urllib.parse, urllib.error
-from io import BytesIO
+from io import BytesIO, StringIO
 from xml.dom import minidom
+from xml.etree import ElementTree
 import json
 import html
 import struct
-import array
 import hashlib
 import base64
 import re
 import webbrowser
 import mimetypes
 import random
+import bisect
 import locale
 import ctypes, ctypes.wintypes
 
@@ -52,7 +56,14 @@ FR_STRINGS = {
     'indexation': 'Indexation du tampon sur la connexion %d',
     'deindexation': 'Désindexation du tampon',
     'translation': 'Translation du tampon vers la position %d',
-    'present': 'Segment %d -> déjà présent dans la zone %d du tampon'
+    'present': 'Segment %d -> déjà présent dans la zone %d du tampon',
+    'prefetch': 'Chargement par anticipation avec %d requêtes partielles simultanées sur %d connexions',
+    'spill': 'Cache sur disque des segments sortis du tampon de %d segments',
+    'unspill': 'Segment %d -> rechargement de la réserve ou du cache sur disque dans la zone %d du tampon',
+    'pin': 'Réservation des segments 1 à %d et à partir de %d dans le tampon',
+    'pinning': 'Segment %d -> placement dans la réserve du tampon',
+    'ffmpegprobe': 'Variante de remuxage "%s" retenue pour "%s"',
+    'ffmpegprepared': 'Reprise du processus FFmpeg préparé pour "%s" avec la variante de remuxage "%s"'
   },
   'mediaserver': {
     'connection': 'Connexion au serveur de diffusion de %s:%s',
@@ -60,6 +71,7 @@ FR_STRINGS = {
     'delivery1': 'Connexion %d -> segment %d -> distribution à partir de la zone %d du tampon',
     'delivery2': 'Connexion %d -> segment %d -> distribution',
     'delivery3': 'Connexion %d -> segment %d -> distribution à partir du tampon',
+    'delivery4': 'Connexion %d -> segment %d -> distribution à partir de la réserve ou du cache sur disque',
     'exceeded': 'Connexion %d -> segment %d -> la zone %d a été dépassée par la queue du tampon',
     'expulsion': 'Connexion %d -> segment %d -> expulsion du tampon',
     'failure': 'Connexion %d -> segment %d -> échec de distribution du contenu',
@@ -84,6 +96,7 @@ FR_STRINGS = {
   'dlnaadvertisement': {
     'receipt': 'Réception, sur l\'interface %s, d\'une publicité du périphérique %s (%s:%s): %s',
     'ignored': 'Publicité du périphérique %s (%s:%s) ignorée en raison de la discordance d\'adresse de l\'URL de description',
+    'saturated': 'Publicité du périphérique %s (%s:%s) ignorée en raison de la saturation de la file de traitement',
     'set': 'Mise en place de l\'écoute des publicités de périphérique DLNA sur l\'interface %s',
     'fail': 'Échec de la mise en place de l\'écoute des publicités de périphérique DLNA sur l\'interface %s',
     'alreadyactivated': 'Écoute des publicités de périphérique DLNA déjà activée',
@@ -96,6 +109,7 @@ FR_STRINGS = {
     'msearch1': 'Envoi d\'un message de recherche de uuid:%s',
     'msearch2': 'Envoi d\'un message de recherche de périphérique DLNA',
     'msearch3': 'Envoi d\'un message de recherche de %s DLNA',
+    'cacheprobe': 'Interrogation de %s %s DLNA mémorisé(s) dans le cache',
     'sent': 'Envoi du message de recherche sur l\'interface %s',
     'fail': 'Échec de l\'envoi du message de recherche sur l\'interface %s',
     'receipt': 'Réception, sur l\'interface %s, d\'une réponse au message de recherche de %s:%s',
@@ -162,6 +176,7 @@ FR_STRINGS = {
     'controlstart': 'Démarrage du gestionnaire de contrôleur de lecture pour serveur d\'interface Web',
     'controlinterrupt': 'Interruption du gestionnaire de contrôleur de lecture pour serveur d\'interface Web',
     'controlrenderer': 'Sélection du renderer %s sur l\'interface %s',
+    'controlparty': 'Ajout du renderer %s à la diffusion groupée',
     'playlist': 'Liste de lecture générée depuis l\'adresse %s: %s contenus média',
     'nocontent': 'Absence de contenu média sous l\'adresse %s',
     'nonegapless': 'Absence de support de la lecture sans blanc par le renderer %s',
@@ -221,6 +236,11 @@ FR_STRINGS = {
     'bufferquick': 'taille de bloc de tampon réduite pour un démarrage plus rapide [désactivé par défaut]',
     'buffersize': 'taille du tampon en blocs de 1 Mo [75 par défaut]',
     'bufferahead': 'taille du sous-tampon de chargement par anticipation en blocs de 1 Mo [25 par défaut]',
+    'bufferrequests': 'nombre de requêtes partielles simultanées de chargement par anticipation en mode aléatoire [1 par défaut]',
+    'bufferconnections': 'nombre de connexions de chargement par anticipation en mode aléatoire [égal au nombre de requêtes par défaut]',
+    'bufferspill': 'taille du cache sur disque des blocs sortis du tampon en mode aléatoire en Mo [0, soit désactivé, par défaut]',
+    'bufferpin': 'taille des réserves de début et de fin de contenu conservées dans le tampon en mode aléatoire en blocs de 1 Mo [0, soit désactivé, par défaut]',
+    'asyncio': 'distribution du contenu par une boucle d\'événements asyncio plutôt que par un thread par connexion [désactivé par défaut]',
     'muxcontainer': 'type de conteneur de remuxage précédé de ! pour qu\'il soit systématique [MP4 par défaut]',
     'onreadyplay': 'lecture directe dès que le contenu média et le renderer sont prêts [désactivé par défaut]',
     'displayrenderers': 'Affiche les renderers présents sur le réseau',
@@ -271,7 +291,14 @@ EN_STRINGS = {
     'indexation': 'Indexation of the buffer on the connection %d',
     'deindexation': 'Deindexation of the buffer',
     'translation': 'Translation of the buffer to the position %d',
-    'present': 'Segment %d -> already present in the zone %d of the buffer'
+    'present': 'Segment %d -> already present in the zone %d of the buffer',
+    'prefetch': 'Loading in advance with %d simultaneous partial requests over %d connections',
+    'spill': 'Disk cache of the segments evicted from the buffer of %d segments',
+    'unspill': 'Segment %d -> reloading from the reserve or the disk cache in the zone %d of the buffer',
+    'pin': 'Reservation of the segments 1 to %d and from %d in the buffer',
+    'pinning': 'Segment %d -> placement in the reserve of the buffer',
+    'ffmpegprobe': 'Remux variant "%s" retained for "%s"',
+    'ffmpegprepared': 'Takeover of the FFmpeg process prepared for "%s" with the remux variant "%s"'
   },
   'mediaserver': {
     'connection': 'Connection to the delivery server of %s:%s',
@@ -279,6 +306,7 @@ EN_STRINGS = {
     'delivery1': 'Connection %d -> segment %d -> delivery from the zone %d of the buffer',
     'delivery2': 'Connection %d -> segment %d -> delivery',
     'delivery3': 'Connection %d -> segment %d -> delivery from the buffer',
+    'delivery4': 'Connection %d -> segment %d -> delivery from the reserve or the disk cache',
     'exceeded': 'Connection %d -> segment %d -> the zone %d has been exceeded by the tail of the buffer',
     'expulsion': 'Connection %d -> segment %d -> expulsion of the buffer',
     'failure': 'Connection %d -> segment %d -> failure of the delivery of the content',
@@ -303,6 +331,7 @@ EN_STRINGS = {
   'dlnaadvertisement': {
     'receipt': 'Receipt, on the interface %s, of an advertisement from the device %s (%s:%s): %s',
     'ignored': 'Advertisement of the device %s (%s:%s) ignored due to the mismatch of the address of the description URL',
+    'saturated': 'Advertisement of the device %s (%s:%s) ignored due to the saturation of the processing queue',
     'set': 'Installation of the listening of advertisements of DLNA devices on the interface %s',
     'fail': 'Failure of the installation of the listening of advertisements of DLNA devices on the interface %s',
     'alreadyactivated': 'Listening of advertisements of DLNA devices already activated',
@@ -315,6 +344,7 @@ EN_STRINGS = {
     'msearch1': 'Sending of a search message of uuid:%s',
     'msearch2': 'Sending of a search message of DLNA device',
     'msearch3': 'Sending of a search message of DNLA %s',
+    'cacheprobe': 'Querying of %s DLNA %s(s) stored in the cache',
     'sent': 'Sending of the search message on the interface %s',
     'fail': 'Failure of the sending of the search message on the interface %s',
     'receipt': 'Receipt, on the interface %s, of a response to the search message from %s:%s',
@@ -381,6 +411,7 @@ EN_STRINGS = {
     'controlstart': 'Start of the playback controller manager for Web interface server',
     'controlinterrupt': 'Interruption of the playback controller manager for Web interface server',
     'controlrenderer': 'Selection of the renderer %s on the interface %s',
+    'controlparty': 'Addition of the renderer %s to the party playback',
     'playlist': 'Playlist generated from the address %s: %s media contents',
     'nocontent': 'Absence of media content under the address %s',
     'nonegapless': 'Absence of support of gapless playback by the renderer %s',
@@ -440,6 +471,11 @@ EN_STRINGS = {
     'bufferquick': 'reduced size of buffer block for faster startup [disabled by default]',
     'buffersize': 'size of the buffer in blocks of 1 MB [75 by default]',
     'bufferahead': 'size of the sub-buffer of loading in advance in blocks of 1 MB [25 by default]',
+    'bufferrequests': 'number of simultaneous partial requests of loading in advance in random mode [1 by default]',
+    'bufferconnections': 'number of connections of loading in advance in random mode [equal to the number of requests by default]',
+    'bufferspill': 'size of the disk cache of the blocks evicted from the buffer in random mode in MB [0, meaning disabled, by default]',
+    'bufferpin': 'size of the reserves of start and end of content kept in the buffer in random mode in blocks of 1 MB [0, meaning disabled, by default]',
+    'asyncio': 'delivery of the content through an asyncio event loop rather than through a thread per connection [disabled by default]',
     'muxcontainer': 'type of remuxing container preceded by ! so that it is systematic [MP4 by default]',
     'onreadyplay': 'direct playback as soon as the media content and the renderer are ready [disabled by default]',
     'displayrenderers': 'Displays the renderers present on the network',
@@ -539,18 +575,322 @@ class ThreadedDualStackServer(socketserver.ThreadingMixIn, server.HTTPServer):
     pass
 
 
+class AsyncDualStackServer:
+
+  def __init__(self, server_address, RequestHandlerClass, *, kmod, verbosity, auth_ip=None):
+    self.logger = log_event(kmod, verbosity)
+    if auth_ip:
+      if isinstance(auth_ip, tuple):
+        self.auth_ip = (*auth_ip, '127.0.0.1')
+      else:
+        self.auth_ip = (auth_ip, '127.0.0.1')
+    else:
+      self.auth_ip = None
+    self.RequestHandlerClass = RequestHandlerClass
+    self.socket = socket.create_server(server_address)
+    self.server_address = self.socket.getsockname()[:2]
+    self.server_name = '%s:%s' % self.server_address
+    self.server_port = self.server_address[1]
+    self.conn_writers = set()
+    self.conn_tasks = set()
+    self.loop = None
+    self.stopped = None
+    self.shutdown_request = False
+    self.is_shut_down = threading.Event()
+    self.is_shut_down.set()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.server_close()
+
+  async def handle(self, reader, writer):
+    self.conn_writers.add(writer)
+    self.conn_tasks.add(asyncio.current_task())
+    client_address = writer.get_extra_info('peername')[:2]
+    self.logger.log(2, 'connection', *client_address)
+    try:
+      while not self.shutdown_request:
+        try:
+          request = await reader.readuntil(b'\r\n\r\n')
+        except:
+          break
+        if not await self.RequestHandlerClass(request, client_address, self).handle_async(writer):
+          break
+    except:
+      pass
+    self.conn_writers.discard(writer)
+    self.conn_tasks.discard(asyncio.current_task())
+    try:
+      writer.close()
+    except:
+      pass
+
+  async def _serve(self):
+    self.loop = asyncio.get_running_loop()
+    self.stopped = self.loop.create_future()
+    if self.shutdown_request:
+      self.stopped.set_result(None)
+    async with await asyncio.start_server(self.handle, sock=self.socket):
+      await self.stopped
+      for writer in list(self.conn_writers):
+        try:
+          writer.transport.abort()
+        except:
+          pass
+      for task in list(self.conn_tasks):
+        task.cancel()
+      if self.conn_tasks:
+        await asyncio.wait(list(self.conn_tasks), timeout=5)
+
+  def serve_forever(self):
+    self.is_shut_down.clear()
+    try:
+      if not self.shutdown_request:
+        asyncio.run(self._serve())
+    finally:
+      self.is_shut_down.set()
+
+  def _stop(self):
+    if not self.stopped.done():
+      self.stopped.set_result(None)
+
+  def shutdown(self):
+    self.shutdown_request = True
+    try:
+      self.loop.call_soon_threadsafe(self._stop)
+    except:
+      pass
+    self.is_shut_down.wait()
+
+  def server_close(self):
+    try:
+      self.socket.close()
+    except:
+      pass
+
+
 class MediaBuffer:
 
   def __init__(self, BufferSize, BufferBlocSize):
     self.content = [None] * BufferSize
+    self.indexes = [0] * BufferSize
     self.bloc_size = BufferBlocSize
     self.w_index = 0
     self.r_indexes = []
+    self.r_clients = {}
     self.create_lock = threading.Lock()
     self.r_event = threading.Event()
-    self.w_condition = threading.Condition()
+    self.w_lock = threading.RLock()
+    self.w_condition = threading.Condition(self.w_lock)
     self.len = 0
     self.t_index = None
+    self.t_clients = {}
+    self.spill = None
+    self.pinned = {}
+    self.pin_head = 0
+    self.pin_tail = 0
+    self.waiters = {}
+
+  def __getitem__(self, index):
+    slot = (index - 1) % len(self.content)
+    return self.content[slot] if self.indexes[slot] == index else None
+
+  def __setitem__(self, index, bloc):
+    slot = (index - 1) % len(self.content)
+    spill = self.spill
+    if spill and self.indexes[slot] and self.indexes[slot] != index and self.content[slot] and not self.indexes[slot] in self.pinned:
+      spill.put(self.indexes[slot], self.content[slot])
+    self.content[slot] = bloc
+    self.indexes[slot] = index
+    if index <= self.pin_head or (self.pin_tail and index >= self.pin_tail):
+      self.pinned[index] = bloc
+
+  def lookup(self, index):
+    bloc = self.pinned.get(index)
+    spill = self.spill
+    if not bloc and spill:
+      bloc = spill.get(index)
+    return bloc
+
+  @staticmethod
+  def _wake(future):
+    if not future.done():
+      future.set_result(None)
+
+  def wait(self, index):
+    condition = threading.Condition(self.w_lock)
+    self.waiters.setdefault(index, []).append((None, condition))
+    condition.wait()
+
+  def wait_async(self, loop, index):
+    future = loop.create_future()
+    self.waiters.setdefault(index, []).append((loop, future))
+    return future
+
+  def notify(self, index=None):
+    if index == None:
+      self.w_condition.notify_all()
+      waiters = [waiter for waiters in self.waiters.values() for waiter in waiters]
+      self.waiters = {}
+    else:
+      waiters = self.waiters.pop(index, ())
+    for loop, waiter in waiters:
+      if loop == None:
+        waiter.notify()
+      else:
+        try:
+          loop.call_soon_threadsafe(MediaBuffer._wake, waiter)
+        except:
+          pass
+
+
+class MediaBufferSpill:
+
+  def __init__(self, SpillSize, BufferBlocSize):
+    self.bloc_size = BufferBlocSize
+    self.size = SpillSize
+    self.file = tempfile.TemporaryFile()
+    self.file.truncate(self.size * self.bloc_size)
+    self.map = mmap.mmap(self.file.fileno(), self.size * self.bloc_size)
+    self.slots = {}
+    self.free = list(range(self.size - 1, -1, -1))
+    self.lock = threading.Lock()
+
+  def put(self, index, bloc):
+    with self.lock:
+      if index in self.slots:
+        self.slots[index] = self.slots.pop(index)
+        return
+      if self.free:
+        slot = self.free.pop()
+      else:
+        slot = self.slots.pop(next(iter(self.slots)))[0]
+      try:
+        self.map[slot * self.bloc_size:slot * self.bloc_size + len(bloc)] = bloc
+        self.slots[index] = (slot, len(bloc))
+      except:
+        self.free.append(slot)
+
+  def get(self, index):
+    with self.lock:
+      if not index in self.slots:
+        return None
+      slot, length = self.slots[index] = self.slots.pop(index)
+      try:
+        return self.map[slot * self.bloc_size:slot * self.bloc_size + length]
+      except:
+        return None
+
+  def close(self):
+    with self.lock:
+      self.slots = {}
+      self.free = []
+      try:
+        self.map.close()
+      except:
+        pass
+      try:
+        self.file.close()
+      except:
+        pass
+
+
+class FFmpegPreparation(threading.Thread):
+
+  def __init__(self, ffmpeg_env, vid):
+    threading.Thread.__init__(self, daemon=True)
+    self.Key = tuple(sorted(ffmpeg_env.items()))
+    self.Vid = vid
+    self.ffmpeg_env = ffmpeg_env
+    self.Expiry = (time.monotonic() + MediaProvider.FFMPEG_PREPARED_TTL) if '://' in vid else None
+    self.FFmpeg_process = None
+    self.MediaFeed = None
+    self.shutdown_requested = False
+
+  def run(self):
+    self.ffmpeg_env['mediabuilder_mux'] = MediaProvider.probe_FFmpeg_mux(self.Vid, self.ffmpeg_env['mediabuilder_mux'])
+    self.MediaFeed = MediaProvider._start_FFmpeg(self, self.ffmpeg_env)
+
+  def shutdown(self):
+    self.shutdown_requested = True
+    if self.FFmpeg_process:
+      if self.FFmpeg_process.poll() == None:
+        try:
+          os.system('taskkill /t /f /pid %s >nul 2>&1' % (self.FFmpeg_process.pid))
+        except:
+          pass
+    if self.MediaFeed:
+      try:
+        self.MediaFeed.close()
+      except:
+        pass
+
+
+class MediaResolver:
+
+  AHEAD = 3
+  WORKERS = 2
+
+  def __init__(self, MediaServerMode, MediaMuxContainer, MediaSubLang, MediaProcessProfile):
+    self.MediaServerMode = MediaServerMode
+    self.MediaMuxContainer = MediaMuxContainer
+    self.MediaSubLang = MediaSubLang
+    self.MediaProcessProfile = MediaProcessProfile
+    self.Pending = []
+    self.Running = set()
+    self.Targets = set()
+    self.Heads = {}
+    self.Workers = []
+    self.Condition = threading.Condition()
+    self.shutdown_requested = False
+
+  def update(self, entries):
+    with self.Condition:
+      if self.shutdown_requested:
+        return
+      self.Pending = list(e for e in entries if not e in self.Running)
+      self.Targets = set(entries)
+      for entry in list(self.Heads):
+        if not entry in self.Targets:
+          MediaProvider.unpin_head(self.Heads.pop(entry))
+      while len(self.Workers) < min(MediaResolver.WORKERS, len(self.Pending)):
+        worker = threading.Thread(target=self._resolve, daemon=True)
+        self.Workers.append(worker)
+        worker.start()
+      self.Condition.notify_all()
+
+  def _resolve(self):
+    while True:
+      with self.Condition:
+        while not self.Pending and not self.shutdown_requested:
+          self.Condition.wait()
+        if self.shutdown_requested:
+          return
+        entry = self.Pending.pop(0)
+        self.Running.add(entry)
+      head = None
+      try:
+        head = MediaProvider.resolve(*entry, self.MediaServerMode, self.MediaMuxContainer, self.MediaSubLang, self.MediaProcessProfile)
+      except:
+        pass
+      with self.Condition:
+        self.Running.discard(entry)
+        if head:
+          if entry in self.Targets and not self.shutdown_requested:
+            self.Heads[entry] = head
+          else:
+            MediaProvider.unpin_head(head)
+
+  def shutdown(self):
+    with self.Condition:
+      self.shutdown_requested = True
+      self.Pending = []
+      for head in self.Heads.values():
+        MediaProvider.unpin_head(head)
+      self.Heads = {}
+      self.Condition.notify_all()
 
 
 class MediaProvider(threading.Thread):
@@ -566,6 +906,35 @@ class MediaProvider(threading.Thread):
   SERVER_MODE_RANDOM = 2
 
   TITLE_MAX_LENGTH = 200
+  FFMPEG_PIPE = True
+  FFMPEG_PREPARED_TTL = 120
+  ffmpeg_prepared = None
+  ffmpeg_prepared_lock = threading.Lock()
+  FFPROBE_CACHE_SIZE = 16
+  ffprobe_cache = {}
+  media_extensions = {}
+  SMI_CACHE_SIZE = 8
+  smi_cache = {}
+
+  FOLDERS_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DLNAPlayOn.index')
+  FOLDERS_INDEX_EXPIRY = 2592000
+  folders_index = None
+  folders_index_changed = False
+  folders_index_lock = threading.Lock()
+
+  YOUTUBE_DL_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DLNAPlayOn.resolved')
+  YOUTUBE_DL_CACHE_TTL = 1800
+  YOUTUBE_DL_CACHE_MARGIN = 300
+  YOUTUBE_DL_CACHE_SIZE = 256
+  youtube_dl_cache = None
+  youtube_dl_cache_changed = False
+  youtube_dl_cache_lock = threading.Lock()
+  HEAD_CACHE_TTL = 120
+  HEAD_CACHE_SIZE = 64
+  head_cache = {}
+  head_cache_lock = threading.Lock()
+  flights = {}
+  flights_lock = threading.Lock()
 
   @classmethod
   def open_url(cls, url, method=None):
@@ -608,7 +977,7 @@ class MediaProvider(threading.Thread):
 
   urlopento = urllib.request.build_opener(HTTPHandlerTO).open
 
-  def __init__(self, ServerMode, MediaSrc, MediaSrcType=None, MediaStartFrom=None, MediaBuffer=None, MediaBufferAhead=None, MediaMuxContainer=None, MediaSubSrc=None, MediaSubSrcType=None, MediaSubLang=None, MediaSubBuffer=None, MediaProcessProfile=None, FFmpegPort=None, BuildFinishedEvent=None, verbosity=0):
+  def __init__(self, ServerMode, MediaSrc, MediaSrcType=None, MediaStartFrom=None, MediaBuffer=None, MediaBufferAhead=None, MediaBufferRequests=None, MediaBufferConnections=None, MediaBufferSpill=None, MediaBufferPin=None, MediaMuxContainer=None, MediaSubSrc=None, MediaSubSrcType=None, MediaSubLang=None, MediaSubBuffer=None, MediaProcessProfile=None, FFmpegPort=None, BuildFinishedEvent=None, verbosity=0):
     threading.Thread.__init__(self, daemon=True)
     self.logger = log_event('mediaprovider', verbosity)
     self.ServerMode = ServerMode if ServerMode in (MediaProvider.SERVER_MODE_SEQUENTIAL, MediaProvider.SERVER_MODE_RANDOM) else MediaProvider.SERVER_MODE_AUTO
@@ -619,9 +988,17 @@ class MediaProvider(threading.Thread):
     if MediaBuffer:
       self.MediaBufferSize = len(MediaBuffer.content)
       self.MediaBufferAhead = MediaBufferAhead
+      self.MediaBufferRequests = max(MediaBufferRequests or 1, 1)
+      self.MediaBufferConnections = max(MediaBufferConnections or self.MediaBufferRequests, 1)
+      self.MediaBufferSpill = max(MediaBufferSpill or 0, 0)
+      self.MediaBufferPin = max(MediaBufferPin or 0, 0)
     else:
       self.MediaBufferSize = 0
       self.MediaBufferAhead = 0
+      self.MediaBufferRequests = 1
+      self.MediaBufferConnections = 1
+      self.MediaBufferSpill = 0
+      self.MediaBufferPin = 0
     if FFmpegPort:
       if MediaMuxContainer:
         self.MediaMuxAlways = MediaMuxContainer[0:1] == '!'
@@ -676,6 +1053,10 @@ class MediaProvider(threading.Thread):
     self.Connection = None
     self.Persistent = None
     self.AcceptRanges = None
+    self.MediaPrefetchQueue = None
+    self.MediaPrefetchPending = set()
+    self.MediaPrefetchCondition = threading.Condition()
+    self.MediaPrefetchConnections = []
     self.MediaFeed = None
     self.MediaFeedExt = None
     self.MediaSize = None
@@ -690,11 +1071,29 @@ class MediaProvider(threading.Thread):
   def _open_FFmpeg(self, vid=None, aud=None, sub=None, in_sub_buffer=None, out_sub_buffer=None):
     if not vid and not (sub and out_sub_buffer):
       return None
-    ffmpeg_env = {'mediabuilder_address': '-' if sub else self.ffmpeg_server_url, 'mediabuilder_start': self.MediaStartFrom, 'mediabuilder_mux': self.MediaMuxContainer if vid else 'SRT', 'mediabuilder_profile': self.MediaProcessProfile}
+    if sub and in_sub_buffer:
+      cues = MediaProvider.parse_subtitle(in_sub_buffer)
+      if cues:
+        srt_sub_buffer = MediaProvider.build_srt(cues, (_position_to_seconds(self.MediaStartFrom or '0:00:00') or 0) * 1000 if self.ServerMode != MediaProvider.SERVER_MODE_RANDOM else 0)
+        if srt_sub_buffer:
+          out_sub_buffer[0] = srt_sub_buffer.encode('utf-8')
+          out_sub_buffer[1] = '.srt'
+          return None
+    ffmpeg_env = {'mediabuilder_address': '-' if sub or MediaProvider.FFMPEG_PIPE else self.ffmpeg_server_url, 'mediabuilder_start': self.MediaStartFrom, 'mediabuilder_mux': self.MediaMuxContainer if vid else 'SRT', 'mediabuilder_profile': self.MediaProcessProfile}
     ffmpeg_env['mediabuilder_vid'] = '"%s"' % (vid) if vid else ''
     ffmpeg_env['mediabuilder_aud'] = '"%s"' % (aud) if aud else ''
     ffmpeg_env['mediabuilder_sub'] = '-' if in_sub_buffer else ('"%s"' % (sub) if sub else '')
     ffmpeg_env['mediabuilder_lang'] = '%s' % (self.MediaSubLang) if sub and self.MediaSubLang else ''
+    if not sub and MediaProvider.FFMPEG_PIPE:
+      ffmpeg_prepared = MediaProvider.claim_FFmpeg(ffmpeg_env, lambda : self.shutdown_requested)
+      if ffmpeg_prepared:
+        self.FFmpeg_process = ffmpeg_prepared.FFmpeg_process
+        self.logger.log(1, 'ffmpegprepared', vid, ffmpeg_prepared.ffmpeg_env['mediabuilder_mux'])
+        return ffmpeg_prepared.MediaFeed
+      if not aud:
+        ffmpeg_env['mediabuilder_mux'] = MediaProvider.probe_FFmpeg_mux(vid, ffmpeg_env['mediabuilder_mux'])
+        self.logger.log(2, 'ffmpegprobe', ffmpeg_env['mediabuilder_mux'], vid)
+      return MediaProvider._start_FFmpeg(self, ffmpeg_env)
     media_feed = None
     while True:
       if not sub:
@@ -738,6 +1137,442 @@ class MediaProvider(threading.Thread):
         break
     return media_feed
 
+  @staticmethod
+  def _start_FFmpeg(owner, ffmpeg_env):
+    media_feed = None
+    while not owner.shutdown_requested:
+      owner.FFmpeg_process = subprocess.Popen(r'"%s\%s"' % (MediaProvider.SCRIPT_PATH, 'ffmpeg.bat'), env={**os.environ,**ffmpeg_env}, stdout=subprocess.PIPE, creationflags=subprocess.CREATE_NEW_CONSOLE, startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW, wShowWindow=6))
+      media_feed = owner.FFmpeg_process.stdout
+      try:
+        if not media_feed.peek(1):
+          raise
+      except:
+        try:
+          media_feed.close()
+        except:
+          pass
+        media_feed = None
+      if media_feed and not owner.shutdown_requested:
+        time.sleep(0.5)
+        if owner.FFmpeg_process.poll() in (None, 0):
+          break
+      if media_feed:
+        try:
+          media_feed.close()
+        except:
+          pass
+      media_feed = None
+      if ffmpeg_env['mediabuilder_mux'][-2] != '-' :
+        ffmpeg_env['mediabuilder_mux'] = ffmpeg_env['mediabuilder_mux'] + '-'
+      else:
+        break
+    return media_feed
+
+  @staticmethod
+  def probe_FFmpeg_mux(vid, mux):
+    if not vid or mux not in ('MP4', 'MPEGTS'):
+      return mux
+    probe = MediaProvider.ffprobe_cache.pop(vid, None)
+    if probe is None:
+      probe = {}
+      try:
+        process_result = subprocess.run(r'"%s\%s" %s' % (MediaProvider.SCRIPT_PATH, 'ffmpeg.bat', 'probe'), env={**os.environ, 'mediabuilder_vid': '"%s"' % (vid)}, capture_output=True, timeout=30, creationflags=subprocess.CREATE_NEW_CONSOLE, startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW, wShowWindow=6))
+        if process_result.returncode == 0:
+          for line in process_result.stdout.decode('utf-8', 'ignore').splitlines():
+            if '=' in line:
+              k, v = line.strip().split('=', 1)
+              probe.setdefault(k, set()).update(v.split(','))
+      except:
+        pass
+    MediaProvider.ffprobe_cache[vid] = probe
+    while len(MediaProvider.ffprobe_cache) > MediaProvider.FFPROBE_CACHE_SIZE:
+      MediaProvider.ffprobe_cache.pop(next(iter(MediaProvider.ffprobe_cache)), None)
+    formats = probe.get('format_name', set())
+    if mux == 'MP4':
+      if 'aac' in probe.get('codec_name', ()) and formats & {'mpegts', 'hls', 'applehttp', 'aac'}:
+        return 'MP4-'
+    elif formats & {'aac', 'mp3', 'ac3', 'eac3', 'h264', 'hevc'}:
+      return 'MPEGTS-'
+    return mux
+
+  @staticmethod
+  def prepare_FFmpeg(vid, mux, profile):
+    ffmpeg_preparation = FFmpegPreparation({'mediabuilder_address': '-', 'mediabuilder_start': '', 'mediabuilder_mux': mux, 'mediabuilder_profile': profile or '', 'mediabuilder_vid': '"%s"' % (vid), 'mediabuilder_aud': '', 'mediabuilder_sub': '', 'mediabuilder_lang': ''}, vid)
+    with MediaProvider.ffmpeg_prepared_lock:
+      ffmpeg_prepared = MediaProvider.ffmpeg_prepared
+      MediaProvider.ffmpeg_prepared = ffmpeg_preparation
+    if ffmpeg_prepared:
+      ffmpeg_prepared.shutdown()
+    ffmpeg_preparation.start()
+
+  @staticmethod
+  def claim_FFmpeg(ffmpeg_env=None, is_stop=None):
+    with MediaProvider.ffmpeg_prepared_lock:
+      ffmpeg_prepared = MediaProvider.ffmpeg_prepared
+      MediaProvider.ffmpeg_prepared = None
+    if not ffmpeg_prepared:
+      return None
+    if ffmpeg_env is not None and ffmpeg_prepared.Key == tuple(sorted(ffmpeg_env.items())) and (ffmpeg_prepared.Expiry is None or time.monotonic() < ffmpeg_prepared.Expiry):
+      while ffmpeg_prepared.is_alive() and not is_stop():
+        ffmpeg_prepared.join(0.5)
+      if not is_stop() and ffmpeg_prepared.MediaFeed and ffmpeg_prepared.FFmpeg_process.poll() in (None, 0):
+        return ffmpeg_prepared
+    ffmpeg_prepared.shutdown()
+    return None
+
+  @staticmethod
+  def _youtube_dl_cache():
+    if MediaProvider.youtube_dl_cache is None:
+      MediaProvider.youtube_dl_cache = {}
+      if MediaProvider.YOUTUBE_DL_CACHE_PATH:
+        try:
+          with open(MediaProvider.YOUTUBE_DL_CACHE_PATH, 'rt', encoding='utf-8') as f:
+            cache = json.load(f)
+          MediaProvider.youtube_dl_cache = {k: v for k, v in cache.items() if v[0] > time.time()}
+        except:
+          pass
+    return MediaProvider.youtube_dl_cache
+
+  @staticmethod
+  def save_youtube_dl_cache():
+    with MediaProvider.youtube_dl_cache_lock:
+      if not MediaProvider.youtube_dl_cache_changed or not MediaProvider.YOUTUBE_DL_CACHE_PATH:
+        return
+      MediaProvider.youtube_dl_cache_changed = False
+      try:
+        with open(MediaProvider.YOUTUBE_DL_CACHE_PATH + '.tmp', 'wt', encoding='utf-8') as f:
+          json.dump({k: v for k, v in MediaProvider.youtube_dl_cache.items() if v[0] > time.time()}, f)
+        os.replace(MediaProvider.YOUTUBE_DL_CACHE_PATH + '.tmp', MediaProvider.YOUTUBE_DL_CACHE_PATH)
+      except:
+        pass
+
+  @staticmethod
+  def _reduce_youtube_dl(mode, output):
+    try:
+      if mode == 'sub':
+        subtitles = json.loads(output)['requested_subtitles'] or {}
+        return json.dumps({'requested_subtitles': {l: {'url': s['url']} for l, s in subtitles.items()}}).encode('utf-8')
+      elif mode == 'playlist':
+        entries = (json.loads(e) for e in output.splitlines())
+        return b'\n'.join(json.dumps({k: e[k] for k in ('url', 'title') if k in e}).encode('utf-8') for e in entries)
+      else:
+        return output
+    except:
+      return None
+
+  @staticmethod
+  def _single_flight(key, function, *args):
+    with MediaProvider.flights_lock:
+      flight = MediaProvider.flights.get(key)
+      lead = flight is None
+      if lead:
+        flight = MediaProvider.flights[key] = [threading.Event(), None, None]
+    if lead:
+      try:
+        flight[1] = function(*args)
+      except Exception as error:
+        flight[2] = error
+      with MediaProvider.flights_lock:
+        del MediaProvider.flights[key]
+      flight[0].set()
+    else:
+      flight[0].wait()
+    if flight[2] is not None:
+      raise flight[2]
+    return flight[1]
+
+  @staticmethod
+  def run_youtube_dl(mode, url, profile='', lang=None):
+    return MediaProvider._single_flight(('youtube-dl', mode, profile or '', lang or '', url), MediaProvider._run_youtube_dl, mode, url, profile, lang)
+
+  @staticmethod
+  def _run_youtube_dl(mode, url, profile, lang):
+    key = '\n'.join((mode, profile or '', lang or '', url))
+    with MediaProvider.youtube_dl_cache_lock:
+      cache = MediaProvider._youtube_dl_cache()
+      entry = cache.pop(key, None)
+      if entry:
+        if entry[0] > time.time():
+          cache[key] = entry
+          return entry[1].encode('utf-8', 'surrogateescape')
+        MediaProvider.youtube_dl_cache_changed = True
+    env = {**os.environ, 'mediabuilder_url': '"%s"' % (url), 'mediabuilder_profile': profile or ''}
+    if lang is not None:
+      env['mediabuilder_lang'] = lang
+    process_result = subprocess.run(r'"%s\%s" %s' % (MediaProvider.SCRIPT_PATH, 'youtube-dl.bat', mode), env=env, capture_output=True)
+    if process_result.returncode != 0:
+      return None
+    expiry = time.time() + MediaProvider.YOUTUBE_DL_CACHE_TTL
+    expires = re.findall(rb'[?&/]expires?[=/](\d{9,11})', process_result.stdout, re.IGNORECASE)
+    if expires:
+      expiry = min(int(e) for e in expires) - MediaProvider.YOUTUBE_DL_CACHE_MARGIN
+    output = MediaProvider._reduce_youtube_dl(mode, process_result.stdout)
+    if output is not None and expiry > time.time():
+      with MediaProvider.youtube_dl_cache_lock:
+        cache = MediaProvider._youtube_dl_cache()
+        cache[key] = [expiry, output.decode('utf-8', 'surrogateescape')]
+        while len(cache) > MediaProvider.YOUTUBE_DL_CACHE_SIZE:
+          cache.pop(next(iter(cache)), None)
+        MediaProvider.youtube_dl_cache_changed = True
+    return process_result.stdout
+
+  @staticmethod
+  def cached_youtube_dl(mode, url, profile='', lang=None):
+    with MediaProvider.youtube_dl_cache_lock:
+      entry = MediaProvider._youtube_dl_cache().get('\n'.join((mode, profile or '', lang or '', url)))
+      return entry is not None and entry[0] > time.time()
+
+  @staticmethod
+  def forget_youtube_dl(mode, url, profile='', lang=None):
+    with MediaProvider.youtube_dl_cache_lock:
+      if MediaProvider._youtube_dl_cache().pop('\n'.join((mode, profile or '', lang or '', url)), None):
+        MediaProvider.youtube_dl_cache_changed = True
+
+  @staticmethod
+  def head_url(url, pin=False):
+    result = MediaProvider._single_flight(('head', url), MediaProvider._head_url, url, pin)
+    if not pin:
+      MediaProvider.unpin_head(url)
+    return result
+
+  @staticmethod
+  def unpin_head(url):
+    with MediaProvider.head_cache_lock:
+      entry = MediaProvider.head_cache.get(url)
+      if entry and entry[0] is None:
+        entry[0] = time.time() + MediaProvider.HEAD_CACHE_TTL
+
+  @staticmethod
+  def _head_url(url, pin):
+    with MediaProvider.head_cache_lock:
+      entry = MediaProvider.head_cache.pop(url, None)
+      if entry and (entry[0] is None or entry[0] > time.time()):
+        if pin:
+          entry[0] = None
+        MediaProvider.head_cache[url] = entry
+        return tuple(entry[1:])
+    rep = MediaProvider.open_url(url, 'HEAD')
+    size = int(rep.getheader('Content-Length', 0))
+    if not size:
+      try:
+        size = int(rep.getheader('Content-Range', '').rpartition('/')[2])
+      except:
+        pass
+    if rep.getheader('Accept-Ranges'):
+      accept_ranges = rep.getheader('Accept-Ranges').lower() != 'none'
+    else:
+      accept_ranges = rep.status == HTTPStatus.PARTIAL_CONTENT
+    rep.close()
+    with MediaProvider.head_cache_lock:
+      MediaProvider.head_cache[url] = [None if pin else time.time() + MediaProvider.HEAD_CACHE_TTL, rep.url, size, accept_ranges]
+      while len(MediaProvider.head_cache) > MediaProvider.HEAD_CACHE_SIZE:
+        MediaProvider.head_cache.pop(next(iter(MediaProvider.head_cache)), None)
+    return rep.url, size, accept_ranges
+
+  @staticmethod
+  def resolve(src, src_type, sub_src, sub_src_type, server_mode, mux_container, sub_lang, profile):
+    mux_always = (mux_container or '')[0:1] == '!'
+    mux_container = (mux_container or '').lstrip('!')
+    if server_mode == MediaProvider.SERVER_MODE_RANDOM or not mux_container:
+      mux_always = False
+      mux_container = ''
+    if server_mode not in (MediaProvider.SERVER_MODE_SEQUENTIAL, MediaProvider.SERVER_MODE_RANDOM):
+      server_mode = MediaProvider.SERVER_MODE_SEQUENTIAL if mux_always else (MediaProvider.SERVER_MODE_AUTO if mux_container else MediaProvider.SERVER_MODE_RANDOM)
+    src_type = src_type or MediaProvider.guess_src_type(src)
+    head = None
+    if src_type == 'WebPageURL':
+      process_output = MediaProvider.run_youtube_dl('mux' if mux_always or server_mode == MediaProvider.SERVER_MODE_AUTO else 'nomux', src, profile)
+      if process_output is not None:
+        process_output = process_output.splitlines()
+        process_output.reverse()
+        del process_output[0]
+        if b'###PlayOn_Separator###' in process_output:
+          del process_output[process_output.index(b'###PlayOn_Separator###'):]
+        process_output.pop(-1)
+        if len(process_output) == 1 and server_mode != MediaProvider.SERVER_MODE_SEQUENTIAL and not (server_mode == MediaProvider.SERVER_MODE_AUTO and (b'.m3u8' in process_output[0] or b'.mpd' in process_output[0])):
+          head = process_output[0].decode('utf-8')
+    elif src_type == 'ContentURL' and server_mode != MediaProvider.SERVER_MODE_SEQUENTIAL:
+      head = src
+    if sub_src and r'://' in sub_src:
+      if not sub_src_type:
+        sub_ext = (''.join(sub_src.rstrip().rpartition('.')[-2:])).lower() if '.' in sub_src else ''
+        if '?' in sub_ext:
+          sub_ext = sub_ext.rpartition('?')[0]
+        sub_src_type = 'ContentURL' if sub_ext in ('.ttxt', '.txt', '.smi', '.srt', '.sub', '.ssa', '.ass', '.vtt', '.m3u8') else 'WebPageURL'
+      if sub_src_type == 'WebPageURL':
+        MediaProvider.run_youtube_dl('sub', sub_src, profile, '%s' % (sub_lang))
+    if head:
+      try:
+        MediaProvider.head_url(head, True)
+      except:
+        head = None
+    return head
+
+  @staticmethod
+  def guess_src_type(src):
+    if r'://' in src:
+      if '.' in src[-5:]:
+        if not mimetypes.inited:
+          mimetypes.init()
+        media_mime = mimetypes.guess_type(src)[0]
+        if media_mime:
+          if media_mime[0:5] in ('video', 'audio', 'image'):
+            return 'ContentURL'
+      return 'WebPageURL'
+    else:
+      return 'ContentPath'
+
+  @staticmethod
+  def is_local_playlist(src):
+    return not r'://' in src and (os.path.isdir(src) or ('.' in src[-5:] and src.rsplit('.', 1)[-1].lower() in ('wpl', 'm3u8', 'm3u')))
+
+  @staticmethod
+  def _media_kind(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.m3u', '.m3u8', '.wpl'):
+      return ''
+    if ext in mimetypes.suffix_map or ext in mimetypes.encodings_map:
+      kind = (mimetypes.guess_type(path)[0] or '')[0:5]
+      return kind if kind in ('video', 'audio', 'image') else ''
+    kind = MediaProvider.media_extensions.get(ext)
+    if kind is None:
+      kind = (mimetypes.guess_type(path)[0] or '')[0:5]
+      kind = MediaProvider.media_extensions[ext] = kind if kind in ('video', 'audio', 'image') else ''
+    return kind
+
+  @staticmethod
+  def folder_listing(src):
+    try:
+      mtime = os.stat(src).st_mtime_ns
+    except:
+      return None
+    key = os.path.normcase(os.path.abspath(src))
+    with MediaProvider.folders_index_lock:
+      if MediaProvider.folders_index is None:
+        MediaProvider.folders_index = {}
+        if MediaProvider.FOLDERS_INDEX_PATH:
+          try:
+            with open(MediaProvider.FOLDERS_INDEX_PATH, 'rt', encoding='utf-8') as f:
+              index = json.load(f)
+            MediaProvider.folders_index = {k: v for k, v in index.items() if time.time() - v[1] <= MediaProvider.FOLDERS_INDEX_EXPIRY}
+          except:
+            pass
+      entry = MediaProvider.folders_index.get(key)
+      if entry and entry[0] == mtime:
+        if time.time() - entry[1] > 86400:
+          entry[1] = time.time()
+          MediaProvider.folders_index_changed = True
+        return entry[2], entry[3]
+    if not mimetypes.inited:
+      mimetypes.init()
+    dirs = []
+    files = []
+    try:
+      with os.scandir(src) as entries:
+        for f in entries:
+          if f.is_dir():
+            dirs.append(f.name)
+          elif f.is_file():
+            files.append([f.name, f.stat().st_size, MediaProvider._media_kind(f.name)])
+    except:
+      return None
+    if time.time() - mtime / 1000000000 > 2:
+      with MediaProvider.folders_index_lock:
+        MediaProvider.folders_index[key] = [mtime, time.time(), dirs, files]
+        MediaProvider.folders_index_changed = True
+    return dirs, files
+
+  @staticmethod
+  def folder_contains(path):
+    listing = MediaProvider.folder_listing(os.path.dirname(path) or '.')
+    if listing is None:
+      return os.path.exists(path)
+    name = os.path.normcase(os.path.basename(path))
+    return any(os.path.normcase(n) == name for n in listing[0]) or any(os.path.normcase(f[0]) == name for f in listing[1])
+
+  @staticmethod
+  def save_folders_index():
+    with MediaProvider.folders_index_lock:
+      if not MediaProvider.folders_index_changed or not MediaProvider.FOLDERS_INDEX_PATH:
+        return
+      MediaProvider.folders_index_changed = False
+      try:
+        with open(MediaProvider.FOLDERS_INDEX_PATH + '.tmp', 'wt', encoding='utf-8') as f:
+          json.dump(MediaProvider.folders_index, f)
+        os.replace(MediaProvider.FOLDERS_INDEX_PATH + '.tmp', MediaProvider.FOLDERS_INDEX_PATH)
+      except:
+        pass
+
+  @staticmethod
+  def _natural_key(path):
+    t = path.lower()
+    n = t.rsplit('.', 1)
+    return ('.'.join([(n[0].rstrip('0123456789') + n[0][len(n[0].rstrip('0123456789')):].rjust(5,'0')) if ('0' <= n[0][-1:] and n[0][-1:] <= '9') else n[0]] + n[1:2]), t)
+
+  @classmethod
+  def _iter_folder(cls, src, is_stop, sh_str):
+    listing = cls.folder_listing(src)
+    if listing is None or is_stop():
+      return
+    files = list(os.path.join(src, f[0]) for f in listing[1] if f[2])
+    files.sort(key=cls._natural_key)
+    for f in files:
+      if is_stop():
+        return
+      yield f, sh_str(f)
+    dirs = list(os.path.join(src, d) for d in listing[0])
+    dirs.sort(key=cls._natural_key)
+    for d in dirs:
+      if is_stop():
+        return
+      yield from cls._iter_folder(d, is_stop, sh_str)
+
+  @classmethod
+  def iter_playlist(cls, src, stop=None, m3u_title=None):
+    if not mimetypes.inited:
+      mimetypes.init()
+    is_stop = lambda : False if stop is None else stop.is_set()
+    sh_str = lambda s: s if len(s) <= cls.TITLE_MAX_LENGTH else s[:cls.TITLE_MAX_LENGTH] + '…'
+    if r'://' in src:
+      yield from zip(*cls.parse_playlist(src, False, stop, m3u_title))
+    elif os.path.isdir(src):
+      try:
+        yield from cls._iter_folder(src, is_stop, sh_str)
+      finally:
+        cls.save_folders_index()
+    elif '.' in src[-4:] and src.rsplit('.', 1)[-1].lower() == 'wpl':
+      try:
+        wpl = minidom.parse(src)
+        playlist = list((os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(src)), e.getAttribute('src'))) if not '://' in e.getAttribute('src') else e.getAttribute('src')) for e in wpl.getElementsByTagName('media'))
+      except:
+        return
+      for e in playlist:
+        if is_stop():
+          return
+        yield e, sh_str(e)
+    elif '.' in src[-5:] and src.rsplit('.', 1)[-1].lower() in ('m3u8', 'm3u'):
+      try:
+        f = open(src, 'rt', encoding='utf-8' if src.rsplit('.', 1)[-1].lower() == 'm3u8' else None)
+      except:
+        return
+      with f:
+        tit = None
+        try:
+          for e in f:
+            if is_stop():
+              return
+            e = e.lstrip().rstrip('\r\n')
+            if e[:8].upper() == "#EXTINF:":
+              if ',' in e:
+                tit = e.rsplit(',', 1)[1].strip()
+            elif e and e[:1] != '#':
+              yield from cls.iter_playlist(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(src)), e)) if not '://' in e else e, stop, tit)
+              tit = None
+        except:
+          return
+    else:
+      yield src, sh_str(src if m3u_title is None else m3u_title)
+
   @classmethod
   def parse_playlist(cls, src, check=True, stop=None, m3u_title=None):
     if not mimetypes.inited:
@@ -759,11 +1594,11 @@ class MediaProvider(threading.Thread):
         playlist = '/playlist' in src.lower() or '/channels' in src.lower()
       if playlist:
         try:
-          process_result = subprocess.run(r'"%s\%s" %s' % (cls.SCRIPT_PATH, 'youtube-dl.bat', 'playlist'), env={**os.environ, 'mediabuilder_url': '"%s"' % src, 'mediabuilder_profile': ''}, capture_output=True)
-          if process_result.returncode == 0:
+          process_output = cls.run_youtube_dl('playlist', src)
+          if process_output is not None:
             get_p_t = lambda j: (j['url'], j.get('title', j['url']))
             try:
-              p_t = list(get_p_t(json.loads(e)) for e in process_result.stdout.splitlines() if not is_stop())
+              p_t = list(get_p_t(json.loads(e)) for e in process_output.splitlines() if not is_stop())
             except:
               return (False, []) if check else ([src], [sh_str(src if m3u_title is None else m3u_title)])
             if not is_stop():
@@ -788,96 +1623,82 @@ class MediaProvider(threading.Thread):
         return playlist, titles
       else:
         return (False, []) if check else ([src], [sh_str(src if m3u_title is None else m3u_title)])
-    elif os.path.isdir(src):
-      numb_exp = lambda t: '.'.join([(t[0].rstrip('0123456789') + t[0][len(t[0].rstrip('0123456789')):].rjust(5,'0')) if ('0' <= t[0][-1:] and t[0][-1:] <= '9') else t[0]] + t[1:2])
-      try:
-        dirs = list(f.path for f in os.scandir(src) if not is_stop() and f.is_dir())
-        dirs.sort(key=str.lower)
-        dirs.sort(key=lambda f: numb_exp(f.lower().rsplit('.', 1)))
-        if not is_stop():
-          playlist = list(f.path for f in os.scandir(src) if not is_stop() and f.is_file() and not ''.join(f.path.rpartition('.')[1:3]).lower() in ('.m3u', '.m3u8', '.wpl'))
-          playlist = list(e for e in playlist if not is_stop() and (mimetypes.guess_type(e)[0] or '')[0:5] in ('video', 'audio', 'image'))
-          if playlist and not is_stop():
-            playlist.sort(key=str.lower)
-            playlist.sort(key=lambda f: numb_exp(f.lower().rsplit('.', 1)))
-          if not is_stop():
-            playlist = playlist + list(e for p in (MediaProvider.parse_playlist(d, False, stop)[0] for d in dirs) if not is_stop() for e in p)
-        if is_stop():
-          playlist = []
-      except:
-        playlist = []
-      return playlist, list(map(sh_str, playlist))
-    elif '.' in src[-4:] and src.rsplit('.', 1)[-1].lower() == 'wpl':
-      try:
-        wpl = minidom.parse(src)
-        playlist = list((os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(src)), e.getAttribute('src'))) if not '://' in e.getAttribute('src') else e.getAttribute('src')) for e in wpl.getElementsByTagName('media') if not is_stop())
-      except:
-        playlist = []
-      if is_stop():
-        playlist = []
-      return playlist, list(map(sh_str, playlist))
-    elif '.' in src[-5:] and src.rsplit('.', 1)[-1].lower() in ('m3u8', 'm3u'):
+    elif cls.is_local_playlist(src):
       playlist = []
-      try:
-        f = open(src, 'rt', encoding='utf-8' if src.rsplit('.', 1)[-1].lower() == 'm3u8' else None)
-        tit = None
-        for e in f.readlines():
-          if is_stop():
-            break
-          e = e.lstrip().rstrip('\r\n')
-          p_t = []
-          if e[:8].upper() == "#EXTINF:":
-            if ',' in e:
-              tit = e.rsplit(',', 1)[1].strip()
-          elif e and e[:1] != '#':
-            p_t_ = MediaProvider.parse_playlist(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(src)), e)) if not '://' in e else e, False, stop, tit)
-            tit = None
-            playlist.extend(p_t_[0])
-            titles.extend(p_t_[1])
-        f.close()
-      except:
-        playlist = []
+      titles = []
+      for p_t in cls.iter_playlist(src, stop, m3u_title):
+        playlist.append(p_t[0])
+        titles.append(p_t[1])
       if is_stop():
         playlist = []
+        titles = []
       return playlist, titles
     else:
       return (False, False) if check else ([src], [sh_str(src if m3u_title is None else m3u_title)])
 
-  @classmethod
-  def convert_to_smi(cls, MediaSubBuffer):
-    if not MediaSubBuffer:
-      return None
-    if not MediaSubBuffer[0]:
+  @staticmethod
+  def _parse_cue_timing(line):
+    if not '-->' in line:
       return None
-    if len(MediaSubBuffer) >= 4:
-      if MediaSubBuffer[3] == '.smi':
-        if MediaSubBuffer[2]:
-          return True
-        else:
-          return None
-      else:
-        MediaSubBuffer[2] = None
-        MediaSubBuffer[3] = '.smi'
-    else:
-      MediaSubBuffer.extend([None] * (4 - len(MediaSubBuffer)))
-      MediaSubBuffer[3] = '.smi'
-    ffmpeg_env = {'mediabuilder_address': '-', 'mediabuilder_start': '', 'mediabuilder_mux': 'SRT', 'mediabuilder_profile': ''}
-    ffmpeg_env['mediabuilder_sub'] = '-'
-    ffmpeg_env['mediabuilder_lang'] = ''
-    sub_charenc = False
     try:
-      MediaSubBuffer[0].decode('utf-8')
+      timing = []
+      for t in line.split('-->', 1):
+        t = t.strip().split(None, 1)[0].replace(',', '.')
+        t, ms = t.split('.', 1) if '.' in t else (t, '0')
+        if len(t.split(':')) > 3:
+          return None
+        timing.append(sum(int(p[0])*p[1] for p in zip(reversed(t.split(':')), [1,60,3600])) * 1000 + int(ms.ljust(3, '0')[:3]))
     except:
-      sub_charenc = True
+      return None
+    return timing
+
+  @staticmethod
+  def parse_subtitle(sub_buffer):
     try:
-      ffmpeg_env['mediabuilder_subcharenc'] = 'sub_charenc' if sub_charenc else ''
-      FFmpeg_sub_process = subprocess.Popen(r'"%s\%s"' % (MediaProvider.SCRIPT_PATH, 'ffmpeg.bat'), env={**os.environ,**ffmpeg_env}, stdin=subprocess.PIPE, stdout=subprocess.PIPE, creationflags=subprocess.CREATE_NEW_CONSOLE, startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW, wShowWindow=6))
-      srt_sub_buffer = FFmpeg_sub_process.communicate(input=MediaSubBuffer[0], timeout=30)[0].decode('utf-8')
-      if not srt_sub_buffer:
-        return None
+      text = sub_buffer.decode('utf-8')
     except:
-      return None
-    smi_sub_buffer = \
+      text = sub_buffer.decode('cp1252', errors='replace')
+    text = text.lstrip('\ufeff')
+    vtt = text[:6] == 'WEBVTT'
+    cues = []
+    block = []
+    blanks = 0
+    for l in text.splitlines() + ['']:
+      if l.strip():
+        block.append(l)
+        continue
+      if block:
+        timing = None
+        for n in range(min(2, len(block))):
+          timing = MediaProvider._parse_cue_timing(block[n])
+          if timing:
+            break
+        if timing:
+          lines = block[n + 1:]
+          if vtt:
+            lines = list(html.unescape(re.sub(r'<(?!/?[ibu]>)[^>]*>', '', l)) for l in lines)
+          cues.append((*timing, lines))
+        elif cues and not vtt:
+          cues[-1][2].extend([''] * blanks + block)
+        elif not vtt:
+          return None
+        block = []
+        blanks = 0
+      blanks += 1
+    return cues or None
+
+  @staticmethod
+  def build_srt(cues, shift=0):
+    srt_sub_buffer = []
+    for (d_ms, f_ms, lines) in cues:
+      if f_ms <= shift:
+        continue
+      srt_sub_buffer.append('%d\r\n%s --> %s\r\n%s\r\n\r\n' % (len(srt_sub_buffer) + 1, *('%02d:%02d:%02d,%03d' % (ms // 3600000, (ms // 60000) % 60, (ms // 1000) % 60, ms % 1000) for ms in (max(0, d_ms - shift), f_ms - shift)), '\r\n'.join(lines)))
+    return ''.join(srt_sub_buffer)
+
+  @staticmethod
+  def build_smi(cues):
+    smi_sub_buffer = [
     '<SAMI>\r\n' \
     '<HEAD>\r\n' \
     '  <STYLE TYPE="text/css">\r\n' \
@@ -898,65 +1719,67 @@ class MediaProvider(threading.Thread):
     '    -->\r\n' \
     '  </STYLE>\r\n' \
     '</HEAD>\r\n' \
-    '<BODY>\r\n'
-    bloc_ln = 0
-    was_bl = True
-    d_ms = 0
-    f_ms = 0
-    try:
-      for ln in srt_sub_buffer.splitlines():
-        l = ln.rstrip('\r\n')
-        if l == '':
-          was_bl = True
-          if bloc_ln >= 2:
-            smi_sub_buffer = smi_sub_buffer + '<br>'
-          continue
-        if bloc_ln == 0:
-          if not l.strip().isdecimal():
-            return None
-          bloc_ln += 1
-          was_bl = False
-        elif was_bl and l.strip().isdecimal() and bloc_ln >= 2:
-          bloc_ln = 1
-          was_bl = False
-          while smi_sub_buffer[-4:] == '<br>':
-            smi_sub_buffer = smi_sub_buffer[:-4]
-          smi_sub_buffer = smi_sub_buffer + '</SYNC>\r\n'
-          smi_sub_buffer = smi_sub_buffer + '<SYNC start="%d"><P Class="CC"> </SYNC>\r\n' % f_ms
-        elif bloc_ln == 1:
-          d, f = l.split('-->')
-          d = d.strip()
-          f = f.strip()
-          if ',' in d:
-            d, d_ms = d.rsplit(',')
-            d_ms = int(d_ms)
-          else:
-            d_ms = 0
-          if ',' in f:
-            f, f_ms = f.rsplit(',')
-            f_ms = int(f_ms)
-          else:
-            f_ms = 0
-          d_ms += sum(int(t[0])*t[1] for t in zip(reversed(d.split(':')), [1,60,3600])) * 1000
-          f_ms += sum(int(t[0])*t[1] for t in zip(reversed(f.split(':')), [1,60,3600])) * 1000
-          if d_ms > 0 and smi_sub_buffer[-8:-2] == '<BODY>':
-            smi_sub_buffer = smi_sub_buffer + '<SYNC start="0"><P Class="CC"> </SYNC>\r\n'
-          smi_sub_buffer = smi_sub_buffer + '<SYNC start="%d"><P Class="CC">' % d_ms
-          bloc_ln += 1
-          was_bl = False
-        elif bloc_ln >= 2:
-          smi_sub_buffer = smi_sub_buffer + l + '<br>'
-          bloc_ln += 1
-          was_bl = False
-      while smi_sub_buffer[-4:] == '<br>':
-        smi_sub_buffer = smi_sub_buffer[:-4]
-      if '<SYNC' in smi_sub_buffer:
-        smi_sub_buffer = smi_sub_buffer + '</SYNC>\r\n'
-        smi_sub_buffer = smi_sub_buffer + '<SYNC start="%d"><P Class="CC"> </SYNC>\r\n' % f_ms
-      smi_sub_buffer = smi_sub_buffer + '</BODY>\r\n</SAMI>'
-    except:
+    '<BODY>\r\n']
+    f_ms = None
+    for (d_ms, e_ms, lines) in cues:
+      if f_ms is not None:
+        smi_sub_buffer.append('<SYNC start="%d"><P Class="CC"> </SYNC>\r\n' % f_ms)
+      elif d_ms > 0:
+        smi_sub_buffer.append('<SYNC start="0"><P Class="CC"> </SYNC>\r\n')
+      smi_sub_buffer.append('<SYNC start="%d"><P Class="CC">%s</SYNC>\r\n' % (d_ms, '<br>'.join(re.sub(r'&lt;(/?(?:[ibu]|font)(?:\s[^<>]*?)?)&gt;', r'<\1>', html.escape(l, False), flags=re.IGNORECASE) for l in lines)))
+      f_ms = e_ms
+    if f_ms is not None:
+      smi_sub_buffer.append('<SYNC start="%d"><P Class="CC"> </SYNC>\r\n' % f_ms)
+    smi_sub_buffer.append('</BODY>\r\n</SAMI>')
+    return ''.join(smi_sub_buffer)
+
+  @classmethod
+  def convert_to_smi(cls, MediaSubBuffer):
+    if not MediaSubBuffer:
+      return None
+    if not MediaSubBuffer[0]:
       return None
-    MediaSubBuffer[2] = smi_sub_buffer.encode('ansi')
+    if len(MediaSubBuffer) >= 4:
+      if MediaSubBuffer[3] == '.smi':
+        if MediaSubBuffer[2]:
+          return True
+        else:
+          return None
+      else:
+        MediaSubBuffer[2] = None
+        MediaSubBuffer[3] = '.smi'
+    else:
+      MediaSubBuffer.extend([None] * (4 - len(MediaSubBuffer)))
+      MediaSubBuffer[3] = '.smi'
+    sub_hash = hashlib.sha1(MediaSubBuffer[0]).digest()
+    smi_sub_buffer = MediaProvider.smi_cache.pop(sub_hash, None)
+    if smi_sub_buffer is None:
+      cues = MediaProvider.parse_subtitle(MediaSubBuffer[0])
+      if not cues:
+        ffmpeg_env = {'mediabuilder_address': '-', 'mediabuilder_start': '', 'mediabuilder_mux': 'SRT', 'mediabuilder_profile': ''}
+        ffmpeg_env['mediabuilder_sub'] = '-'
+        ffmpeg_env['mediabuilder_lang'] = ''
+        sub_charenc = False
+        try:
+          MediaSubBuffer[0].decode('utf-8')
+        except:
+          sub_charenc = True
+        try:
+          ffmpeg_env['mediabuilder_subcharenc'] = 'sub_charenc' if sub_charenc else ''
+          FFmpeg_sub_process = subprocess.Popen(r'"%s\%s"' % (MediaProvider.SCRIPT_PATH, 'ffmpeg.bat'), env={**os.environ,**ffmpeg_env}, stdin=subprocess.PIPE, stdout=subprocess.PIPE, creationflags=subprocess.CREATE_NEW_CONSOLE, startupinfo=subprocess.STARTUPINFO(dwFlags=subprocess.STARTF_USESHOWWINDOW, wShowWindow=6))
+          cues = MediaProvider.parse_subtitle(FFmpeg_sub_process.communicate(input=MediaSubBuffer[0], timeout=30)[0])
+        except:
+          return None
+      if not cues:
+        return None
+      try:
+        smi_sub_buffer = MediaProvider.build_smi(cues).encode('ansi')
+      except:
+        return None
+    MediaProvider.smi_cache[sub_hash] = smi_sub_buffer
+    while len(MediaProvider.smi_cache) > MediaProvider.SMI_CACHE_SIZE:
+      MediaProvider.smi_cache.pop(next(iter(MediaProvider.smi_cache)), None)
+    MediaSubBuffer[2] = smi_sub_buffer
     return True
 
   def MediaBuilder(self):
@@ -965,15 +1788,7 @@ class MediaProvider(threading.Thread):
     if not mimetypes.inited:
       mimetypes.init()
     if not self.MediaSrcType:
-      if r'://' in self.MediaSrc:
-        self.MediaSrcType = 'WebPageURL'
-        if '.' in self.MediaSrc[-5:]:
-          media_mime = mimetypes.guess_type(self.MediaSrc)[0]
-          if media_mime:
-            if media_mime[0:5] in ('video', 'audio', 'image'):
-              self.MediaSrcType = 'ContentURL'
-      else:
-        self.MediaSrcType = 'ContentPath'
+      self.MediaSrcType = MediaProvider.guess_src_type(self.MediaSrc)
     if self.MediaSubSrc and not self.MediaSubSrcType:
       sub_ext = (''.join(self.MediaSubSrc.rstrip().rpartition('.')[-2:])).lower() if '.' in self.MediaSubSrc else ''
       if r'://' in self.MediaSubSrc:
@@ -986,18 +1801,20 @@ class MediaProvider(threading.Thread):
       else:
         if os.path.isdir(self.MediaSubSrc):
           for sub_ext in ('.ttxt', '.txt', '.smi', '.srt', '.sub', '.ssa', '.ass', '.vtt'):
-            if os.path.exists(os.path.join(self.MediaSubSrc, os.path.splitext(os.path.basename(self.MediaSrc))[0]) + sub_ext):
+            if MediaProvider.folder_contains(os.path.join(self.MediaSubSrc, os.path.splitext(os.path.basename(self.MediaSrc))[0]) + sub_ext):
               self.MediaSubSrc = os.path.join(self.MediaSubSrc, os.path.splitext(os.path.basename(self.MediaSrc))[0]) + sub_ext
               break
-          if os.path.isdir(self.MediaSubSrc) and os.path.exists(os.path.join(self.MediaSubSrc, os.path.basename(self.MediaSrc))):
+          if os.path.isdir(self.MediaSubSrc) and MediaProvider.folder_contains(os.path.join(self.MediaSubSrc, os.path.basename(self.MediaSrc))):
             self.MediaSubSrc = os.path.join(self.MediaSubSrc, os.path.basename(self.MediaSrc))    
+          MediaProvider.save_folders_index()
         self.MediaSubSrcType = 'ContentPath'
     if self.MediaSrcType.lower() == 'ContentPath'.lower() and not self.MediaMuxAlways and self.ServerMode != MediaProvider.SERVER_MODE_SEQUENTIAL and self.MediaSubSrc == None and self.MediaSubBuffer:
       for sub_ext in ('.ttxt', '.txt', '.smi', '.srt', '.sub', '.ssa', '.ass', '.vtt'):
-        if os.path.exists(os.path.splitext(self.MediaSrc)[0] + sub_ext):
+        if MediaProvider.folder_contains(os.path.splitext(self.MediaSrc)[0] + sub_ext):
           self.MediaSubSrc = os.path.splitext(self.MediaSrc)[0] + sub_ext
           self.MediaSubSrcType = 'ContentPath'
           break
+      MediaProvider.save_folders_index()
     if self.MediaSubSrc:
       MediaSubFeed = None
       sub_ext = None
@@ -1018,9 +1835,9 @@ class MediaProvider(threading.Thread):
       elif self.MediaSubSrcType.lower() == 'WebPageURL'.lower():
         sub_url = None
         try:
-          process_result = subprocess.run(r'"%s\%s" %s' % (MediaProvider.SCRIPT_PATH, 'youtube-dl.bat', 'sub'), env={**os.environ, 'mediabuilder_url': '"%s"' % (self.MediaSubSrc), 'mediabuilder_lang': '%s' % (self.MediaSubLang), 'mediabuilder_profile': self.MediaProcessProfile}, capture_output=True)
-          if process_result.returncode == 0 and not self.shutdown_requested:
-            process_output = json.loads(process_result.stdout)
+          process_output = MediaProvider.run_youtube_dl('sub', self.MediaSubSrc, self.MediaProcessProfile, '%s' % (self.MediaSubLang))
+          if process_output is not None and not self.shutdown_requested:
+            process_output = json.loads(process_output)
             sub_url = list(process_output['requested_subtitles'].values())[0]['url']
         except:
           pass
@@ -1129,35 +1946,19 @@ class MediaProvider(threading.Thread):
     elif self.MediaSrcType.lower() == 'ContentURL'.lower():
       try:
         if self.ServerMode != MediaProvider.SERVER_MODE_SEQUENTIAL:
-          rep = MediaProvider.open_url(self.MediaSrc, 'HEAD')
-          self.MediaSize = int(rep.getheader('Content-Length', 0))
-          if not self.MediaSize:
-            try:
-              self.MediaSize = int(rep.getheader('Content-Range', '').rpartition('/')[2])
-            except:
-              pass
-          if rep.getheader('Accept-Ranges'):
-            if rep.getheader('Accept-Ranges').lower() != 'none':
-              self.AcceptRanges = True
-            else:
-              self.AcceptRanges = False
-          elif rep.status == HTTPStatus.PARTIAL_CONTENT:
-            self.AcceptRanges = True
-          else:
-            self.AcceptRanges = False
+          rep_url, self.MediaSize, self.AcceptRanges = MediaProvider.head_url(self.MediaSrc)
           if self.ServerMode == MediaProvider.SERVER_MODE_RANDOM:
             if self.MediaSize:
-              self.MediaFeed = rep.url
-              self.MediaFeedExt = (''.join(rep.url.rstrip().rpartition('.')[-2:])).lower() if '.' in rep.url else ''
+              self.MediaFeed = rep_url
+              self.MediaFeedExt = (''.join(rep_url.rstrip().rpartition('.')[-2:])).lower() if '.' in rep_url else ''
             if not self.AcceptRanges:
               self.MediaStartFrom = ''
           elif self.MediaSize and self.AcceptRanges:
             self.ServerMode = MediaProvider.SERVER_MODE_RANDOM
-            self.MediaFeed = rep.url
-            self.MediaFeedExt = (''.join(rep.url.rstrip().rpartition('.')[-2:])).lower() if '.' in rep.url else ''
+            self.MediaFeed = rep_url
+            self.MediaFeedExt = (''.join(rep_url.rstrip().rpartition('.')[-2:])).lower() if '.' in rep_url else ''
           else:
             self.ServerMode = MediaProvider.SERVER_MODE_SEQUENTIAL
-          rep.close()
         if self.ServerMode == MediaProvider.SERVER_MODE_SEQUENTIAL:
           if self.MediaMuxContainer and (self.MediaMuxAlways or self.MediaStartFrom):
             self.MediaFeed = self._open_FFmpeg(vid=self.MediaSrc)
@@ -1173,67 +1974,63 @@ class MediaProvider(threading.Thread):
       except:
         pass
     elif self.MediaSrcType.lower() == 'WebPageURL'.lower():
-      try:
-        process_result = subprocess.run(r'"%s\%s" %s' % (MediaProvider.SCRIPT_PATH, 'youtube-dl.bat', 'mux' if self.MediaMuxAlways or self.ServerMode == MediaProvider.SERVER_MODE_AUTO else 'nomux'), env={**os.environ, 'mediabuilder_url': '"%s"' % (self.MediaSrc), 'mediabuilder_profile': self.MediaProcessProfile}, capture_output=True)
-        if process_result.returncode == 0 and not self.shutdown_requested:
-          process_output = process_result.stdout.splitlines()
-          process_output.reverse()
-          del process_output[0]
-          if b'###PlayOn_Separator###' in process_output:
-            del process_output[process_output.index(b'###PlayOn_Separator###'):]
-          self.MediaTitle = process_output.pop(-1).decode('utf-8')[:501].replace('\r\n', ' ').replace('\r', ' ').replace('\n', ' ')
-          if (self.MediaMuxAlways or self.ServerMode == MediaProvider.SERVER_MODE_AUTO) and len(process_output) == 2:
-            self.MediaFeed = self._open_FFmpeg(vid=process_output[1].decode('utf-8'), aud=process_output[0].decode('utf-8'))
-            self.MediaFeedExt = {'MP4':'.mp4','MPEGTS':'.ts'}.get(self.MediaMuxContainer,'')
-            self.ServerMode = MediaProvider.SERVER_MODE_SEQUENTIAL
-          elif len(process_output) == 1:
-            if self.ServerMode == MediaProvider.SERVER_MODE_AUTO and self.MediaMuxContainer and (b'.m3u8' in process_output[0] or b'.mpd' in process_output[0]):
+      youtube_dl_mode = 'mux' if self.MediaMuxAlways or self.ServerMode == MediaProvider.SERVER_MODE_AUTO else 'nomux'
+      server_mode = self.ServerMode
+      media_start_from = self.MediaStartFrom
+      for attempt in range(2):
+        self.ServerMode = server_mode
+        self.MediaStartFrom = media_start_from
+        cached = MediaProvider.cached_youtube_dl(youtube_dl_mode, self.MediaSrc, self.MediaProcessProfile)
+        try:
+          process_output = MediaProvider.run_youtube_dl(youtube_dl_mode, self.MediaSrc, self.MediaProcessProfile)
+          if process_output is not None and not self.shutdown_requested:
+            process_output = process_output.splitlines()
+            process_output.reverse()
+            del process_output[0]
+            if b'###PlayOn_Separator###' in process_output:
+              del process_output[process_output.index(b'###PlayOn_Separator###'):]
+            self.MediaTitle = process_output.pop(-1).decode('utf-8')[:501].replace('\r\n', ' ').replace('\r', ' ').replace('\n', ' ')
+            if (self.MediaMuxAlways or self.ServerMode == MediaProvider.SERVER_MODE_AUTO) and len(process_output) == 2:
+              self.MediaFeed = self._open_FFmpeg(vid=process_output[1].decode('utf-8'), aud=process_output[0].decode('utf-8'))
+              self.MediaFeedExt = {'MP4':'.mp4','MPEGTS':'.ts'}.get(self.MediaMuxContainer,'')
               self.ServerMode = MediaProvider.SERVER_MODE_SEQUENTIAL
-            if self.ServerMode != MediaProvider.SERVER_MODE_SEQUENTIAL:
-              rep = MediaProvider.open_url(process_output[0].decode('utf-8'), 'HEAD')
-              self.MediaSize = int(rep.getheader('Content-Length', 0))
-              if not self.MediaSize:
-                try:
-                  self.MediaSize = int(rep.getheader('Content-Range', '').rpartition('/')[2])
-                except:
-                  pass
-              if rep.getheader('Accept-Ranges'):
-                if rep.getheader('Accept-Ranges').lower() != 'none':
-                  self.AcceptRanges = True
-                else:
-                  self.AcceptRanges = False
-              elif rep.status == HTTPStatus.PARTIAL_CONTENT:
-                self.AcceptRanges = True
-              else:
-                self.AcceptRanges = False
-              if self.ServerMode == MediaProvider.SERVER_MODE_RANDOM:
-                if self.MediaSize:
-                  self.MediaFeed = rep.url
-                  self.MediaFeedExt = (''.join(rep.url.rstrip().rpartition('.')[-2:])).lower() if '.' in rep.url else ''
-                  if not self.AcceptRanges:
-                    self.MediaStartFrom = ''
-              elif self.MediaSize and self.AcceptRanges:
-                self.ServerMode = MediaProvider.SERVER_MODE_RANDOM
-                self.MediaFeed = rep.url
-                self.MediaFeedExt = (''.join(rep.url.rstrip().rpartition('.')[-2:])).lower() if '.' in rep.url else ''
-              else:
+            elif len(process_output) == 1:
+              if self.ServerMode == MediaProvider.SERVER_MODE_AUTO and self.MediaMuxContainer and (b'.m3u8' in process_output[0] or b'.mpd' in process_output[0]):
                 self.ServerMode = MediaProvider.SERVER_MODE_SEQUENTIAL
-              if not self.AcceptRanges:
-                self.MediaStartFrom = ''
-              rep.close()
-            if self.ServerMode == MediaProvider.SERVER_MODE_SEQUENTIAL:
-              if self.MediaMuxContainer and (self.MediaMuxAlways or self.MediaStartFrom or b'.m3u8' in process_output[0] or b'.mpd' in process_output[0]):
-                self.MediaFeed = self._open_FFmpeg(vid=process_output[0].decode('utf-8'))
-                self.MediaFeedExt = {'MP4':'.mp4','MPEGTS':'.ts'}.get(self.MediaMuxContainer,'')
-              else:
-                self.MediaFeed = MediaProvider.open_url(process_output[0].decode('utf-8'))
-                self.MediaFeedExt = (''.join(self.MediaFeed.url.rstrip().rpartition('.')[-2:])).lower() if '.' in self.MediaSubFeed.url else ''
-                self.MediaStartFrom = ''
-          if self.MediaFeedExt:
-            if '?' in self.MediaFeedExt:
-              self.MediaFeedExt = self.MediaFeedExt.rpartition('?')[0]
-      except:
-        pass
+              if self.ServerMode != MediaProvider.SERVER_MODE_SEQUENTIAL:
+                rep_url, self.MediaSize, self.AcceptRanges = MediaProvider.head_url(process_output[0].decode('utf-8'))
+                if self.ServerMode == MediaProvider.SERVER_MODE_RANDOM:
+                  if self.MediaSize:
+                    self.MediaFeed = rep_url
+                    self.MediaFeedExt = (''.join(rep_url.rstrip().rpartition('.')[-2:])).lower() if '.' in rep_url else ''
+                    if not self.AcceptRanges:
+                      self.MediaStartFrom = ''
+                elif self.MediaSize and self.AcceptRanges:
+                  self.ServerMode = MediaProvider.SERVER_MODE_RANDOM
+                  self.MediaFeed = rep_url
+                  self.MediaFeedExt = (''.join(rep_url.rstrip().rpartition('.')[-2:])).lower() if '.' in rep_url else ''
+                else:
+                  self.ServerMode = MediaProvider.SERVER_MODE_SEQUENTIAL
+                if not self.AcceptRanges:
+                  self.MediaStartFrom = ''
+              if self.ServerMode == MediaProvider.SERVER_MODE_SEQUENTIAL:
+                if self.MediaMuxContainer and (self.MediaMuxAlways or self.MediaStartFrom or b'.m3u8' in process_output[0] or b'.mpd' in process_output[0]):
+                  self.MediaFeed = self._open_FFmpeg(vid=process_output[0].decode('utf-8'))
+                  self.MediaFeedExt = {'MP4':'.mp4','MPEGTS':'.ts'}.get(self.MediaMuxContainer,'')
+                else:
+                  self.MediaFeed = MediaProvider.open_url(process_output[0].decode('utf-8'))
+                  self.MediaFeedExt = (''.join(self.MediaFeed.url.rstrip().rpartition('.')[-2:])).lower() if '.' in self.MediaSubFeed.url else ''
+                  self.MediaStartFrom = ''
+            if self.MediaFeedExt:
+              if '?' in self.MediaFeedExt:
+                self.MediaFeedExt = self.MediaFeedExt.rpartition('?')[0]
+        except:
+          pass
+        if self.MediaFeed or self.shutdown_requested:
+          break
+        MediaProvider.forget_youtube_dl(youtube_dl_mode, self.MediaSrc, self.MediaProcessProfile)
+        if not cached:
+          break
     if not self.shutdown_requested:
       if self.MediaFeed:
         self.logger.log(1, 'opening', self.MediaSrc, LSTRINGS['mediaprovider'].get(self.MediaSrcType.lower(), self.MediaSrcType), LSTRINGS['mediaserver'].get({MediaProvider.SERVER_MODE_SEQUENTIAL: 'sequential', MediaProvider.SERVER_MODE_RANDOM: 'random'}.get(self.ServerMode, ''), ''), self.MediaTitle)
@@ -1319,36 +2116,149 @@ class MediaProvider(threading.Thread):
       while self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested and self.MediaBuffer.w_index <= max(max(self.MediaBuffer.r_indexes, default=0), 1) + self.MediaBufferAhead:
         bloc = None
         try:
-          bloc = self.MediaFeed.read(self.MediaBuffer.bloc_size)
+          bloc = bytearray(self.MediaBuffer.bloc_size)
+          with memoryview(bloc) as bloc_view:
+            size = 0
+            while size < self.MediaBuffer.bloc_size:
+              r_size = self.MediaFeed.readinto(bloc_view[size:])
+              if not r_size:
+                break
+              size += r_size
+          del bloc[size:]
+        except:
+          bloc = None
+          self.Status = MediaProvider.STATUS_ABORTED
+          self.logger.log(1, 'segmentfailure', self.MediaBuffer.w_index)
+        if not bloc:
+          self.MediaBuffer.w_index = - abs(self.MediaBuffer.w_index)
+          break
+        else:
+          self.MediaBuffer.content[(self.MediaBuffer.w_index - 1) % self.MediaBufferSize] = bloc
+          self.logger.log(2, 'segmentbuffering', self.MediaBuffer.w_index, (self.MediaBuffer.w_index - 1) % self.MediaBufferSize)
+          self.MediaBuffer.w_index += 1
+          self.MediaBuffer.w_condition.acquire()
+          self.MediaBuffer.notify(self.MediaBuffer.w_index - 1)
+          self.MediaBuffer.w_condition.release()
+      if self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested and self.MediaBuffer.w_index > 0:
+        self.MediaBuffer.r_event.wait()
+        self.MediaBuffer.r_event.clear()
+    if self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested:
+      self.Status = MediaProvider.STATUS_COMPLETED
+      self.logger.log(1, 'loadstop')
+    else:
+      self.logger.log(1, 'loadinterrupt')
+    self.MediaBuffer.w_condition.acquire()
+    self.MediaBuffer.notify()
+    self.MediaBuffer.w_condition.release()
+    try:
+      self.MediaFeed.close()
+    except:
+      pass
+
+  def _MediaFeederRFetch(self, connection, index):
+    header = {'User-Agent': 'Lavf'}
+    header['Range'] = 'bytes=%d-%d' % ((index - 1) * self.MediaBuffer.bloc_size, min(self.MediaSize, index * self.MediaBuffer.bloc_size) - 1)
+    header['Connection'] = 'keep-alive'
+    connection.request('GET', self.MediaSrcURL, headers=header)
+    rep = connection.getresponse()
+    bloc = rep.read(self.MediaBuffer.bloc_size)
+    rep.close()
+    if bloc:
+      if len(bloc) != min(self.MediaSize, index * self.MediaBuffer.bloc_size) - (index - 1) * self.MediaBuffer.bloc_size:
+        bloc = None
+    return bloc
+
+  def _MediaFeederRPrefetch(self):
+    while True:
+      with self.MediaPrefetchCondition:
+        while not self.MediaPrefetchQueue and self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested:
+          self.MediaPrefetchCondition.wait()
+        if self.Status == MediaProvider.STATUS_ABORTED or self.shutdown_requested:
+          break
+        index = self.MediaPrefetchQueue.pop(0)
+      self.MediaPrefetchSemaphore.acquire()
+      try:
+        connection = self.MediaPrefetchConnections.pop()
+      except:
+        connection = self.Connection.__class__(self.Connection.host, self.Connection.port)
+      bloc = None
+      try:
+        bloc = self._MediaFeederRFetch(connection, index)
+      except:
+        try:
+          connection.close()
+          bloc = self._MediaFeederRFetch(connection, index)
+        except:
+          pass
+      self.MediaPrefetchConnections.append(connection)
+      self.MediaPrefetchSemaphore.release()
+      self.MediaBuffer.w_condition.acquire()
+      if bloc and index >= self.MediaBuffer.w_index and index < self.MediaBuffer.w_index + self.MediaBufferSize:
+        if not self.MediaBuffer[index]:
+          self.MediaBuffer[index] = bloc
+          self.logger.log(2, 'segmentbuffering', index, index - self.MediaBuffer.w_index + 1)
+      self.MediaBuffer.w_condition.release()
+      with self.MediaPrefetchCondition:
+        self.MediaPrefetchPending.discard(index)
+      if not bloc and self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested:
+        self.Status = MediaProvider.STATUS_ABORTED
+        self.logger.log(1, 'segmentfailure', index)
+      self.MediaBuffer.r_event.set()
+
+  def _MediaFeederRPin(self):
+    connection = self.Connection.__class__(self.Connection.host, self.Connection.port)
+    for index in (*range(self.MediaBuffer.pin_tail, (self.MediaSize - 1) // self.MediaBuffer.bloc_size + 2), *range(1, self.MediaBuffer.pin_head + 1)):
+      if self.Status == MediaProvider.STATUS_ABORTED or self.shutdown_requested:
+        break
+      if index in self.MediaBuffer.pinned:
+        continue
+      bloc = None
+      try:
+        bloc = self._MediaFeederRFetch(connection, index)
+      except:
+        try:
+          connection.close()
+          bloc = self._MediaFeederRFetch(connection, index)
         except:
-          self.Status = MediaProvider.STATUS_ABORTED
-          self.logger.log(1, 'segmentfailure', self.MediaBuffer.w_index)
-        if not bloc:
-          self.MediaBuffer.w_index = - abs(self.MediaBuffer.w_index)
-          break
-        else:
-          self.MediaBuffer.content[(self.MediaBuffer.w_index - 1) % self.MediaBufferSize] = bloc
-          self.logger.log(2, 'segmentbuffering', self.MediaBuffer.w_index, (self.MediaBuffer.w_index - 1) % self.MediaBufferSize)
-          self.MediaBuffer.w_index += 1
-          self.MediaBuffer.w_condition.acquire()
-          self.MediaBuffer.w_condition.notify_all()
-          self.MediaBuffer.w_condition.release()
-      if self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested and self.MediaBuffer.w_index > 0:
-        self.MediaBuffer.r_event.wait()
-        self.MediaBuffer.r_event.clear()
-    if self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested:
-      self.Status = MediaProvider.STATUS_COMPLETED
-      self.logger.log(1, 'loadstop')
-    else:
-      self.logger.log(1, 'loadinterrupt')
-    self.MediaBuffer.w_condition.acquire()
-    self.MediaBuffer.w_condition.notify_all()
-    self.MediaBuffer.w_condition.release()
+          pass
+      if not bloc:
+        break
+      self.MediaBuffer.pinned[index] = bloc
+      self.logger.log(2, 'pinning', index)
     try:
-      self.MediaFeed.close()
+      connection.close()
     except:
       pass
 
+  def _MediaFeederRSchedule(self, r_index):
+    last = min(r_index + self.MediaBufferAhead, (self.MediaSize - 1) // self.MediaBuffer.bloc_size + 1)
+    self.MediaBuffer.w_condition.acquire()
+    shift = min(last - self.MediaBuffer.w_index - self.MediaBufferSize + 1, self.MediaBuffer.len)
+    if shift > 0:
+      self.MediaBuffer.w_index += shift
+      self.MediaBuffer.len -= shift
+      self.logger.log(2, 'translation', self.MediaBuffer.w_index)
+    with self.MediaPrefetchCondition:
+      queue = []
+      for index in self.MediaPrefetchQueue:
+        if index >= self.MediaBuffer.w_index + self.MediaBuffer.len and index <= last:
+          queue.append(index)
+        else:
+          self.MediaPrefetchPending.discard(index)
+      self.MediaPrefetchQueue = queue
+      for index in range(self.MediaBuffer.w_index + self.MediaBuffer.len, min(last, self.MediaBuffer.w_index + self.MediaBufferSize - 1) + 1):
+        if not self.MediaBuffer[index] and not index in self.MediaPrefetchPending:
+          bloc = self.MediaBuffer.lookup(index)
+          if bloc:
+            self.MediaBuffer[index] = bloc
+          else:
+            self.MediaPrefetchQueue.append(index)
+            self.MediaPrefetchPending.add(index)
+      self.MediaPrefetchCondition.notify_all()
+    present = self.MediaBuffer.len < self.MediaBufferSize and self.MediaBuffer[self.MediaBuffer.w_index + self.MediaBuffer.len] != None
+    self.MediaBuffer.w_condition.release()
+    return present
+
   def MediaFeederR(self):
     if not self.MediaSize:
       self.BuildFinishedEvent.set()
@@ -1379,21 +2289,48 @@ class MediaProvider(threading.Thread):
       except:
         pass
     rep = None
+    if self.Status != MediaProvider.STATUS_ABORTED and self.Persistent and self.AcceptRanges and self.MediaBufferRequests > 1:
+      self.MediaPrefetchQueue = []
+      self.MediaPrefetchSemaphore = threading.Semaphore(self.MediaBufferConnections)
+      for i in range(self.MediaBufferRequests):
+        threading.Thread(target=self._MediaFeederRPrefetch, daemon=True).start()
+      self.logger.log(2, 'prefetch', self.MediaBufferRequests, self.MediaBufferConnections)
+    if self.Status != MediaProvider.STATUS_ABORTED and self.AcceptRanges and self.MediaBufferSpill:
+      try:
+        self.MediaBuffer.spill = MediaBufferSpill(self.MediaBufferSpill, self.MediaBuffer.bloc_size)
+        self.logger.log(2, 'spill', self.MediaBufferSpill)
+      except:
+        self.MediaBuffer.spill = None
+    if self.Status != MediaProvider.STATUS_ABORTED and self.AcceptRanges and self.MediaBufferPin:
+      self.MediaBuffer.pin_head = min(self.MediaBufferPin, (self.MediaSize - 1) // self.MediaBuffer.bloc_size + 1)
+      self.MediaBuffer.pin_tail = max((self.MediaSize - 1) // self.MediaBuffer.bloc_size + 2 - self.MediaBufferPin, 1)
+      self.logger.log(2, 'pin', self.MediaBuffer.pin_head, self.MediaBuffer.pin_tail)
+      threading.Thread(target=self._MediaFeederRPin, daemon=True).start()
     while self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested:
       self.MediaBuffer.create_lock.acquire()
       t_index = None
       r_index = None
+      t_clients = {}
       for ind in range(len(self.MediaBuffer.r_indexes) - 1, -1, -1):
         if self.MediaBuffer.r_indexes[ind] != 0:
-          t_index = ind
-          break
+          r_client = self.MediaBuffer.r_clients.get(ind)
+          if r_client in t_clients or (r_client == None and t_clients):
+            continue
+          t_clients[r_client] = ind
+          if t_index == None or self.MediaBuffer.r_indexes[ind] < self.MediaBuffer.r_indexes[t_index]:
+            t_index = ind
+      if t_clients:
+        n_index = max(t_clients.values())
+        if self.MediaBuffer.r_indexes[n_index] >= self.MediaBuffer.r_indexes[t_index] + self.MediaBufferSize:
+          t_index = n_index
+      self.MediaBuffer.t_clients = t_clients
       self.MediaBuffer.create_lock.release()
       if t_index != None:
         if self.MediaBuffer.t_index != t_index:
           self.MediaBuffer.t_index = t_index
           self.logger.log(2, 'indexation', self.MediaBuffer.t_index + 1)
           self.MediaBuffer.w_condition.acquire()
-          self.MediaBuffer.w_condition.notify_all()
+          self.MediaBuffer.notify()
           self.MediaBuffer.w_condition.release()
         r_index = self.MediaBuffer.r_indexes[t_index]
       elif self.MediaBuffer.t_index != None:
@@ -1402,12 +2339,9 @@ class MediaProvider(threading.Thread):
       if r_index and (r_index -1) * self.MediaBuffer.bloc_size < self.MediaSize:
         if r_index < self.MediaBuffer.w_index or ((r_index if self.AcceptRanges else 1) > self.MediaBuffer.w_index + self.MediaBuffer.len):
           self.MediaBuffer.w_condition.acquire()
-          if r_index < self.MediaBuffer.w_index:
-            self.MediaBuffer.content = [None] * min(self.MediaBuffer.w_index - (r_index if self.AcceptRanges else 1), self.MediaBufferSize) + self.MediaBuffer.content[:(r_index if self.AcceptRanges else 1) - self.MediaBuffer.w_index]
-          else:
-            self.MediaBuffer.content = self.MediaBuffer.content[r_index - self.MediaBuffer.w_index:] + [None] * min(r_index - self.MediaBuffer.w_index, self.MediaBufferSize)
           self.MediaBuffer.w_index = r_index if self.AcceptRanges else 1
           self.MediaBuffer.len = 0
+          self.MediaBuffer.notify()
           self.MediaBuffer.w_condition.release()
           self.logger.log(2, 'translation', self.MediaBuffer.w_index)
           if rep:
@@ -1418,13 +2352,31 @@ class MediaProvider(threading.Thread):
           rep = None
         if self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested and self.MediaBuffer.w_index + self.MediaBuffer.len <= self.MediaBuffer.r_indexes[t_index] + self.MediaBufferAhead and (self.MediaBuffer.w_index + self.MediaBuffer.len - 1) * self.MediaBuffer.bloc_size < self.MediaSize:
           if self.MediaBuffer.len < self.MediaBufferSize:
-            if self.MediaBuffer.content[self.MediaBuffer.len] and self.AcceptRanges and not rep:
+            if self.MediaBuffer[self.MediaBuffer.w_index + self.MediaBuffer.len] and self.AcceptRanges and not rep:
               self.MediaBuffer.len += 1
               self.logger.log(2, 'present', self.MediaBuffer.w_index + self.MediaBuffer.len - 1, self.MediaBuffer.len)
               self.MediaBuffer.w_condition.acquire()
-              self.MediaBuffer.w_condition.notify_all()
+              self.MediaBuffer.notify(self.MediaBuffer.w_index + self.MediaBuffer.len - 1)
               self.MediaBuffer.w_condition.release()
               continue
+          bloc = self.MediaBuffer.lookup(self.MediaBuffer.w_index + self.MediaBuffer.len) if self.AcceptRanges and not rep else None
+          if bloc:
+            self.MediaBuffer.w_condition.acquire()
+            self.MediaBuffer[self.MediaBuffer.w_index + self.MediaBuffer.len] = bloc
+            if self.MediaBuffer.len < self.MediaBufferSize:
+              self.MediaBuffer.len +=1
+            else:
+              self.MediaBuffer.w_index += 1
+              self.logger.log(2, 'translation', self.MediaBuffer.w_index)
+            self.logger.log(2, 'unspill', self.MediaBuffer.w_index + self.MediaBuffer.len - 1, self.MediaBuffer.len)
+            self.MediaBuffer.notify(self.MediaBuffer.w_index + self.MediaBuffer.len - 1)
+            self.MediaBuffer.w_condition.release()
+            continue
+          if self.MediaPrefetchQueue != None:
+            self.MediaBuffer.r_event.clear()
+            if not self._MediaFeederRSchedule(self.MediaBuffer.r_indexes[t_index]):
+              self.MediaBuffer.r_event.wait()
+            continue
           bloc = None
           try:
             header = {'User-Agent': 'Lavf'}
@@ -1489,16 +2441,14 @@ class MediaProvider(threading.Thread):
             break
           else:
             self.MediaBuffer.w_condition.acquire()
+            self.MediaBuffer[self.MediaBuffer.w_index + self.MediaBuffer.len] = bloc
             if self.MediaBuffer.len < self.MediaBufferSize:
-              self.MediaBuffer.content[self.MediaBuffer.len] = bloc
               self.MediaBuffer.len +=1
             else:
               self.MediaBuffer.w_index += 1
-              del self.MediaBuffer.content[0]
               self.logger.log(2, 'translation', self.MediaBuffer.w_index)
-              self.MediaBuffer.content += [bloc]
             self.logger.log(2, 'segmentbuffering', self.MediaBuffer.w_index + self.MediaBuffer.len - 1, self.MediaBuffer.len)
-            self.MediaBuffer.w_condition.notify_all()
+            self.MediaBuffer.notify(self.MediaBuffer.w_index + self.MediaBuffer.len - 1)
             self.MediaBuffer.w_condition.release()
         elif self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested:
           self.MediaBuffer.r_event.wait()
@@ -1510,6 +2460,19 @@ class MediaProvider(threading.Thread):
       self.Connection.close()
     except:
       pass
+    if self.MediaPrefetchQueue != None:
+      with self.MediaPrefetchCondition:
+        self.MediaPrefetchQueue.clear()
+        self.MediaPrefetchCondition.notify_all()
+      for connection in self.MediaPrefetchConnections:
+        try:
+          connection.close()
+        except:
+          pass
+    if self.MediaBuffer.spill:
+      spill = self.MediaBuffer.spill
+      self.MediaBuffer.spill = None
+      spill.close()
     if self.Status != MediaProvider.STATUS_ABORTED and not self.shutdown_requested:
       self.Status = MediaProvider.STATUS_COMPLETED
       self.logger.log(1, 'loadstop')
@@ -1517,7 +2480,7 @@ class MediaProvider(threading.Thread):
       self.logger.log(1, 'loadinterrupt')
     self.MediaBuffer.t_index = -1
     self.MediaBuffer.w_condition.acquire()
-    self.MediaBuffer.w_condition.notify_all()
+    self.MediaBuffer.notify()
     self.MediaBuffer.w_condition.release()
 
   def run(self):
@@ -1710,7 +2673,7 @@ class MediaRequestHandlerS(server.SimpleHTTPRequestHandler):
         while self.MediaBuffer.r_indexes[self.MediaBufferId] == self.MediaBuffer.w_index:
           if self.server.__dict__['_BaseServer__is_shut_down'].is_set():
             break
-          self.MediaBuffer.w_condition.wait()
+          self.MediaBuffer.wait(self.MediaBuffer.r_indexes[self.MediaBufferId])
         self.MediaBuffer.w_condition.release()
         if self.server.__dict__['_BaseServer__is_shut_down'].is_set():
           break
@@ -1758,7 +2721,24 @@ class MediaRequestHandlerS(server.SimpleHTTPRequestHandler):
 class MediaRequestHandlerR(server.SimpleHTTPRequestHandler):
 
   protocol_version = "HTTP/1.1"
-  
+
+  try:
+    TransmitFile = ctypes.WinDLL('mswsock', use_last_error=True).TransmitFile
+    TransmitFile.argtypes = (ctypes.c_size_t, ctypes.wintypes.HANDLE, ctypes.wintypes.DWORD, ctypes.wintypes.DWORD, ctypes.c_void_p, ctypes.c_void_p, ctypes.wintypes.DWORD)
+    TransmitFile.restype = ctypes.wintypes.BOOL
+  except:
+    TransmitFile = None
+  SENDFILE = hasattr(os, 'sendfile') or TransmitFile is not None
+
+  @classmethod
+  def sendfile(cls, sock, f, offset, count):
+    if hasattr(os, 'sendfile'):
+      return sock.sendfile(f, offset, count) == count
+    os.lseek(f.fileno(), offset, os.SEEK_SET)
+    if not cls.TransmitFile(sock.fileno(), msvcrt.get_osfhandle(f.fileno()), count, 0, None, None, 0):
+      raise ctypes.WinError(ctypes.get_last_error())
+    return True
+
   def __init__(self, *args, MediaBuffer, MediaSubBuffer, MediaSrc, MediaSrcType, MediaExt, MediaSize, AcceptRanges, **kwargs):
     self.MediaBuffer = MediaBuffer
     if MediaSubBuffer:
@@ -1932,9 +2912,13 @@ class MediaRequestHandlerR(server.SimpleHTTPRequestHandler):
           index = req_start
           while not self.server.__dict__['_BaseServer__is_shut_down'].is_set():
             if index < req_end:
-              bloc = None
-              bloc = f.read(min(self.MediaBuffer.bloc_size, req_end - index))
-              outputfile.write(bloc)
+              if MediaRequestHandlerR.SENDFILE:
+                if not self.sendfile(self.request, f, index, min(self.MediaBuffer.bloc_size, req_end - index)):
+                  raise
+              else:
+                bloc = None
+                bloc = f.read(min(self.MediaBuffer.bloc_size, req_end - index))
+                outputfile.write(bloc)
               self.server.logger.log(2, 'delivery2', self.MediaBufferId + 1, index)
               index = index + min(self.MediaBuffer.bloc_size, req_end - index)
             else:
@@ -1954,16 +2938,42 @@ class MediaRequestHandlerR(server.SimpleHTTPRequestHandler):
         self.MediaBuffer.create_lock.acquire()
         self.MediaBufferId = len(self.MediaBuffer.r_indexes)
         r_index = req_start // self.MediaBuffer.bloc_size + 1
-        self.MediaBuffer.r_indexes.append(r_index)
+        bloc = self.MediaBuffer.lookup(r_index)
+        self.MediaBuffer.r_indexes.append(0 if bloc else r_index)
+        self.MediaBuffer.r_clients[self.MediaBufferId] = self.client_address[0]
         self.MediaBuffer.create_lock.release()
-        self.MediaBuffer.r_event.set()
-        bloc = None
+        if not bloc:
+          self.MediaBuffer.r_event.set()
         first_loop = True
         self.server.logger.log(1, 'deliverystart', self.MediaBufferId + 1, *self.client_address)
         while not self.server.__dict__['_BaseServer__is_shut_down'].is_set():
+          if not self.MediaBuffer.r_indexes[self.MediaBufferId]:
+            if not first_loop:
+              bloc = self.MediaBuffer.lookup(r_index)
+            if bloc:
+              try:
+                if first_loop:
+                  bloc = bloc[req_start % self.MediaBuffer.bloc_size:]
+                  self.end_headers()
+                  first_loop = False
+                if r_index * self.MediaBuffer.bloc_size >= req_end:
+                  outputfile.write(bloc[:(req_end - 1) % self.MediaBuffer.bloc_size + 1])
+                else:
+                  outputfile.write(bloc)
+                self.server.logger.log(2, 'delivery4', self.MediaBufferId + 1, r_index)
+                r_index += 1
+              except:
+                r_index = 0
+                break
+              if (r_index - 1) * self.MediaBuffer.bloc_size >= req_end:
+                break
+              continue
+            self.MediaBuffer.r_indexes[self.MediaBufferId] = r_index
+            self.MediaBuffer.r_event.set()
+          bloc = None
           self.MediaBuffer.w_condition.acquire()
           while r_index < self.MediaBuffer.w_index or r_index >= self.MediaBuffer.w_index + self.MediaBuffer.len - (1 if first_loop and r_index * self.MediaBuffer.bloc_size < req_end else 0):
-            if self.MediaBufferId < (self.MediaBuffer.t_index if self.MediaBuffer.t_index !=None else 0) and r_index != self.MediaBuffer.w_index + self.MediaBuffer.len:
+            if self.MediaBufferId < self.MediaBuffer.t_clients.get(self.client_address[0], self.MediaBufferId) and r_index != self.MediaBuffer.w_index + self.MediaBuffer.len:
               self.server.logger.log(2, 'expulsion', self.MediaBufferId + 1, r_index)  
               r_index = 0
               break
@@ -1972,12 +2982,12 @@ class MediaRequestHandlerR(server.SimpleHTTPRequestHandler):
               break
             if self.server.__dict__['_BaseServer__is_shut_down'].is_set():
               break
-            self.MediaBuffer.w_condition.wait()
+            self.MediaBuffer.wait(r_index + (1 if first_loop and r_index * self.MediaBuffer.bloc_size < req_end else 0))
           if r_index == 0 or self.server.__dict__['_BaseServer__is_shut_down'].is_set():
             self.MediaBuffer.w_condition.release()
             break
           if r_index >= self.MediaBuffer.w_index and r_index < self.MediaBuffer.w_index + self.MediaBuffer.len:
-            bloc = self.MediaBuffer.content[(r_index - self.MediaBuffer.w_index)][(0 if not first_loop else req_start % self.MediaBuffer.bloc_size):]
+            bloc = self.MediaBuffer[r_index][(0 if not first_loop else req_start % self.MediaBuffer.bloc_size):]
           self.MediaBuffer.w_condition.release()
           if not bloc:
             r_index = 0
@@ -2051,20 +3061,302 @@ class MediaRequestHandlerR(server.SimpleHTTPRequestHandler):
           closed = self.close_connection
 
 
+class MediaAsyncRequestHandler:
+
+  def setup(self):
+    self.rfile = BytesIO(self.request)
+    self.wfile = BytesIO()
+
+  def handle(self):
+    pass
+
+  def finish(self):
+    pass
+
+  async def flush(self, writer):
+    data = self.wfile.getvalue()
+    if data:
+      self.wfile.seek(0)
+      self.wfile.truncate()
+      writer.write(data)
+      await writer.drain()
+
+  async def handle_async(self, writer):
+    self.close_connection = True
+    try:
+      self.raw_requestline = self.rfile.readline(65537)
+      if len(self.raw_requestline) > 65536:
+        self.requestline = ''
+        self.request_version = ''
+        self.command = ''
+        self.send_error(HTTPStatus.REQUEST_URI_TOO_LONG)
+      elif self.parse_request():
+        if self.command in ('GET', 'HEAD'):
+          await getattr(self, 'do_%s_async' % self.command)(writer)
+        else:
+          self.send_error(HTTPStatus.NOT_IMPLEMENTED, "Unsupported method (%r)" % self.command)
+      await self.flush(writer)
+    except:
+      self.close_connection = True
+    if self.server.shutdown_request:
+      self.close_connection = True
+    return not self.close_connection
+
+
+class MediaAsyncRequestHandlerS(MediaAsyncRequestHandler, MediaRequestHandlerS):
+
+  async def do_GET_async(self, writer):
+    f = self.send_head()
+    await self.flush(writer)
+    if f in ('media', 'mediasub', 'mediasubsmi'):
+      await self.copyfile_async(f, writer)
+
+  async def do_HEAD_async(self, writer):
+    f = self.send_head()
+
+  async def copyfile_async(self, source, writer):
+    loop = asyncio.get_running_loop()
+    if self.server.shutdown_request or not source in ('media', 'mediasub', 'mediasubsmi'):
+      self.close_connection = True
+      writer.write(b"0\r\n\r\n")
+      return
+    if source in ('mediasub', 'mediasubsmi'):
+      try:
+        writer.write(hex(len(self.MediaSubBuffer[0] if source == 'mediasub' else self.MediaSubBuffer[2])).encode("ISO-8859-1")[2:] + b"\r\n" + (self.MediaSubBuffer[0] if source == 'mediasub' else self.MediaSubBuffer[2]) + b"\r\n")
+        await writer.drain()
+        self.server.logger.log(2, 'subdelivery', *self.client_address)
+      except:
+        self.server.logger.log(1, 'subfailure', *self.client_address)
+    else:
+      self.server.logger.log(1, 'deliverystart', self.MediaBufferId + 1, *self.client_address)
+      self.MediaBuffer.r_indexes[self.MediaBufferId] = 1
+      while not self.MediaBuffer.r_indexes[self.MediaBufferId] == - self.MediaBuffer.w_index:
+        future = None
+        self.MediaBuffer.w_condition.acquire()
+        if self.MediaBuffer.r_indexes[self.MediaBufferId] == self.MediaBuffer.w_index and not self.server.shutdown_request:
+          future = self.MediaBuffer.wait_async(loop, self.MediaBuffer.r_indexes[self.MediaBufferId])
+        self.MediaBuffer.w_condition.release()
+        if future:
+          await future
+          continue
+        if self.server.shutdown_request:
+          break
+        if self.MediaBuffer.r_indexes[self.MediaBufferId] != - self.MediaBuffer.w_index:
+          bloc = self.MediaBuffer.content[(self.MediaBuffer.r_indexes[self.MediaBufferId] -1) % self.MediaBufferSize]
+          if self.MediaBuffer.r_indexes[self.MediaBufferId] <= abs(self.MediaBuffer.w_index) - self.MediaBufferSize:
+            self.server.logger.log(2, 'exceeded', self.MediaBufferId + 1, self.MediaBuffer.r_indexes[self.MediaBufferId], (self.MediaBuffer.r_indexes[self.MediaBufferId] - 1) % self.MediaBufferSize)
+            self.server.logger.log(1, 'failure', self.MediaBufferId + 1, self.MediaBuffer.r_indexes[self.MediaBufferId])
+            break
+          else:
+            try:
+              writer.write(hex(len(bloc)).encode("ISO-8859-1")[2:] + b"\r\n" + bloc + b"\r\n")
+              await writer.drain()
+              self.server.logger.log(2, 'delivery1', self.MediaBufferId + 1, self.MediaBuffer.r_indexes[self.MediaBufferId], (self.MediaBuffer.r_indexes[self.MediaBufferId] - 1) % self.MediaBufferSize)
+              self.MediaBuffer.r_indexes[self.MediaBufferId] += 1
+              self.MediaBuffer.r_event.set()
+            except:
+              self.server.logger.log(1, 'failure', self.MediaBufferId + 1, self.MediaBuffer.r_indexes[self.MediaBufferId])
+              break
+      self.MediaBuffer.r_indexes[self.MediaBufferId] = - self.MediaBuffer.r_indexes[self.MediaBufferId]
+      self.server.logger.log(1, 'deliverystop', self.MediaBufferId + 1)
+    try:
+      writer.write(b"0\r\n\r\n")
+    except:
+      pass
+    if self.server.shutdown_request:
+      self.close_connection = True
+
+
+class MediaAsyncRequestHandlerR(MediaAsyncRequestHandler, MediaRequestHandlerR):
+
+  async def do_GET_async(self, writer):
+    if self.path.lower() == '/media.smi':
+      source, req_start, req_end = await asyncio.get_running_loop().run_in_executor(None, self.send_head)
+    else:
+      source, req_start, req_end = self.send_head()
+    if source in ('media', 'mediasub', 'mediasubsmi'):
+      await self.copyfile_async(source, req_start, req_end, writer)
+
+  async def do_HEAD_async(self, writer):
+    if self.path.lower() == '/media.smi':
+      await asyncio.get_running_loop().run_in_executor(None, self.send_head)
+    else:
+      self.send_head()
+    self.end_headers()
+
+  async def copyfile_async(self, source, req_start, req_end, writer):
+    loop = asyncio.get_running_loop()
+    if self.server.shutdown_request or not source in ('media', 'mediasub', 'mediasubsmi'):
+      self.close_connection = True
+      return
+    f = None
+    if source == 'media':
+      if self.MediaSrcType == 'ContentPath':
+        self.MediaBuffer.create_lock.acquire()
+        self.MediaBufferId = len(self.MediaBuffer.r_indexes)
+        self.MediaBuffer.r_indexes.append(0)
+        self.MediaBuffer.create_lock.release()
+        self.server.logger.log(1, 'deliverystart', self.MediaBufferId + 1, *self.client_address)
+        try:
+          f = open(self.MediaSrc, 'rb')
+          self.end_headers()
+          await self.flush(writer)
+        except:
+          self.close_connection = True
+          self.server.logger.log(1, 'deliveryfailure', self.MediaBufferId + 1)
+          try:
+            f.close()
+          except:
+            pass
+          return
+        try:
+          index = req_start
+          while not self.server.shutdown_request:
+            if index < req_end:
+              await loop.sendfile(writer.transport, f, index, min(self.MediaBuffer.bloc_size, req_end - index))
+              self.server.logger.log(2, 'delivery2', self.MediaBufferId + 1, index)
+              index = index + min(self.MediaBuffer.bloc_size, req_end - index)
+            else:
+              break
+        except:
+          index = -1
+          self.close_connection = True
+        try:
+          f.close()
+        except:
+          pass
+        if index < 0:
+          self.server.logger.log(1, 'deliveryfailure', self.MediaBufferId + 1)
+        else:
+          self.server.logger.log(1, 'deliverystop', self.MediaBufferId + 1)
+      elif self.MediaSrcType in ('ContentURL', 'WebPageURL'):
+        self.MediaBuffer.create_lock.acquire()
+        self.MediaBufferId = len(self.MediaBuffer.r_indexes)
+        r_index = req_start // self.MediaBuffer.bloc_size + 1
+        bloc = self.MediaBuffer.lookup(r_index)
+        self.MediaBuffer.r_indexes.append(0 if bloc else r_index)
+        self.MediaBuffer.r_clients[self.MediaBufferId] = self.client_address[0]
+        self.MediaBuffer.create_lock.release()
+        if not bloc:
+          self.MediaBuffer.r_event.set()
+        first_loop = True
+        self.server.logger.log(1, 'deliverystart', self.MediaBufferId + 1, *self.client_address)
+        while not self.server.shutdown_request:
+          if not self.MediaBuffer.r_indexes[self.MediaBufferId]:
+            if not first_loop:
+              bloc = self.MediaBuffer.lookup(r_index)
+            if bloc:
+              try:
+                if first_loop:
+                  bloc = bloc[req_start % self.MediaBuffer.bloc_size:]
+                  self.end_headers()
+                  await self.flush(writer)
+                  first_loop = False
+                if r_index * self.MediaBuffer.bloc_size >= req_end:
+                  writer.write(bloc[:(req_end - 1) % self.MediaBuffer.bloc_size + 1])
+                else:
+                  writer.write(bloc)
+                await writer.drain()
+                self.server.logger.log(2, 'delivery4', self.MediaBufferId + 1, r_index)
+                r_index += 1
+              except:
+                r_index = 0
+                break
+              if (r_index - 1) * self.MediaBuffer.bloc_size >= req_end:
+                break
+              continue
+            self.MediaBuffer.r_indexes[self.MediaBufferId] = r_index
+            self.MediaBuffer.r_event.set()
+          bloc = None
+          future = None
+          self.MediaBuffer.w_condition.acquire()
+          ahead = 1 if first_loop and r_index * self.MediaBuffer.bloc_size < req_end else 0
+          if r_index < self.MediaBuffer.w_index or r_index >= self.MediaBuffer.w_index + self.MediaBuffer.len - ahead:
+            if self.MediaBufferId < self.MediaBuffer.t_clients.get(self.client_address[0], self.MediaBufferId) and r_index != self.MediaBuffer.w_index + self.MediaBuffer.len:
+              self.server.logger.log(2, 'expulsion', self.MediaBufferId + 1, r_index)
+              r_index = 0
+            elif self.MediaBuffer.t_index == -1:
+              r_index = 0
+            elif not self.server.shutdown_request:
+              future = self.MediaBuffer.wait_async(loop, r_index + ahead)
+          else:
+            bloc = self.MediaBuffer[r_index][(0 if not first_loop else req_start % self.MediaBuffer.bloc_size):]
+          self.MediaBuffer.w_condition.release()
+          if future:
+            await future
+            continue
+          if r_index == 0 or self.server.shutdown_request:
+            break
+          if not bloc:
+            r_index = 0
+            break
+          try:
+            if first_loop:
+              self.end_headers()
+              await self.flush(writer)
+              first_loop = False
+            if r_index * self.MediaBuffer.bloc_size >= req_end:
+              writer.write(bloc[:(req_end - 1) % self.MediaBuffer.bloc_size + 1])
+            else:
+              self.MediaBuffer.r_indexes[self.MediaBufferId] += 1
+              self.MediaBuffer.r_event.set()
+              writer.write(bloc)
+            await writer.drain()
+            self.server.logger.log(2, 'delivery3', self.MediaBufferId + 1, r_index)
+            r_index += 1
+          except:
+            r_index = 0
+            break
+          if (r_index - 1) * self.MediaBuffer.bloc_size >= req_end:
+            break
+        if r_index == 0:
+          self.server.logger.log(1, 'failure', self.MediaBufferId + 1, self.MediaBuffer.r_indexes[self.MediaBufferId])
+          self.close_connection = True
+        else:
+          self.server.logger.log(1, 'deliverystop', self.MediaBufferId + 1)
+        self.MediaBuffer.r_indexes[self.MediaBufferId] = 0
+        self.MediaBuffer.r_event.set()
+    elif source in ('mediasub', 'mediasubsmi'):
+      try:
+        self.end_headers()
+        await self.flush(writer)
+      except:
+        self.close_connection = True
+        self.server.logger.log(1, 'subfailure', *self.client_address)
+        return
+      self.server.logger.log(2, 'subdelivery', *self.client_address)
+      try:
+        writer.write(self.MediaSubBuffer[0] if source == 'mediasub' else self.MediaSubBuffer[2])
+        await writer.drain()
+      except:
+        self.close_connection = True
+        self.server.logger.log(1, 'subfailure', *self.client_address)
+    if self.server.shutdown_request:
+      self.close_connection = True
+
+
 class MediaServer(threading.Thread):
 
-  def __init__(self, MediaServerMode, MediaServerAddress, MediaSrc, MediaSrcType=None, MediaStartFrom=0, MediaBufferBlocSize=1048576, MediaBufferSize=75, MediaBufferAhead=25, MediaMuxContainer=None, MediaSubSrc=None, MediaSubSrcType=None, MediaSubLang=None, MediaSubBuffer=None, MediaProcessProfile=None, verbosity=0, auth_ip=None):
+  ENGINE_THREADING = 0
+  ENGINE_ASYNCIO = 1
+
+  def __init__(self, MediaServerMode, MediaServerAddress, MediaSrc, MediaSrcType=None, MediaStartFrom=0, MediaBufferBlocSize=1048576, MediaBufferSize=75, MediaBufferAhead=25, MediaMuxContainer=None, MediaSubSrc=None, MediaSubSrcType=None, MediaSubLang=None, MediaSubBuffer=None, MediaProcessProfile=None, verbosity=0, auth_ip=None, MediaBufferRequests=1, MediaBufferConnections=None, MediaBufferSpill=0, MediaBufferPin=0, MediaServerEngine=ENGINE_THREADING):
     threading.Thread.__init__(self)
     self.verbosity = verbosity
     self.auth_ip = auth_ip
     self.logger = log_event('mediaserver', verbosity)
     self.MediaServerMode = MediaServerMode
+    self.MediaServerEngine = MediaServerEngine
     self.MediaServerAddress = MediaServerAddress
     self.MediaSrc = MediaSrc
     self.MediaSrcType = MediaSrcType
     self.MediaStartFrom = MediaStartFrom
     self.MediaBufferAhead = MediaBufferAhead * 1048576 // MediaBufferBlocSize
     self.MediaBufferSize = max(MediaBufferSize, self.MediaBufferAhead + 2)
+    self.MediaBufferRequests = MediaBufferRequests
+    self.MediaBufferConnections = MediaBufferConnections
+    self.MediaBufferSpill = (MediaBufferSpill or 0) * 1048576 // MediaBufferBlocSize
+    self.MediaBufferPin = (MediaBufferPin or 0) * 1048576 // MediaBufferBlocSize
     self.MediaMuxContainer = MediaMuxContainer
     self.MediaBufferInstance = MediaBuffer(self.MediaBufferSize * 1048576 // MediaBufferBlocSize, MediaBufferBlocSize)
     self.MediaSubSrc = MediaSubSrc
@@ -2090,21 +3382,21 @@ class MediaServer(threading.Thread):
       return
     self.is_running = True
     slr = False
-    self.MediaProviderInstance = MediaProvider(self.MediaServerMode, self.MediaSrc, self.MediaSrcType, self.MediaStartFrom, self.MediaBufferInstance, self.MediaBufferAhead, self.MediaMuxContainer, self.MediaSubSrc, self.MediaSubSrcType, self.MediaSubLang, self.MediaSubBufferInstance, self.MediaProcessProfile, self.MediaServerAddress[1]+1, self.BuildFinishedEvent, self.verbosity)
+    self.MediaProviderInstance = MediaProvider(self.MediaServerMode, self.MediaSrc, self.MediaSrcType, self.MediaStartFrom, self.MediaBufferInstance, self.MediaBufferAhead, self.MediaBufferRequests, self.MediaBufferConnections, self.MediaBufferSpill, self.MediaBufferPin, self.MediaMuxContainer, self.MediaSubSrc, self.MediaSubSrcType, self.MediaSubLang, self.MediaSubBufferInstance, self.MediaProcessProfile, self.MediaServerAddress[1]+1, self.BuildFinishedEvent, self.verbosity)
     self.MediaProviderInstance.start()
     self.BuildFinishedEvent.wait()
     if self.is_running and self.MediaProviderInstance.Status in (MediaProvider.STATUS_RUNNING, MediaProvider.STATUS_COMPLETED):
       if self.MediaProviderInstance.ServerMode == MediaProvider.SERVER_MODE_SEQUENTIAL:
-        self.MediaRequestBoundHandler = partial(MediaRequestHandlerS, MediaBuffer=self.MediaBufferInstance, MediaSubBuffer=self.MediaSubBufferInstance, MediaExt=self.MediaProviderInstance.MediaFeedExt)
+        self.MediaRequestBoundHandler = partial(MediaAsyncRequestHandlerS if self.MediaServerEngine == MediaServer.ENGINE_ASYNCIO else MediaRequestHandlerS, MediaBuffer=self.MediaBufferInstance, MediaSubBuffer=self.MediaSubBufferInstance, MediaExt=self.MediaProviderInstance.MediaFeedExt)
       elif self.MediaProviderInstance.ServerMode == MediaProvider.SERVER_MODE_RANDOM:
-        self.MediaRequestBoundHandler = partial(MediaRequestHandlerR, MediaBuffer=self.MediaBufferInstance, MediaSubBuffer=self.MediaSubBufferInstance, MediaSrc=self.MediaProviderInstance.MediaSrc, MediaSrcType=self.MediaProviderInstance.MediaSrcType, MediaExt=self.MediaProviderInstance.MediaFeedExt, MediaSize=self.MediaProviderInstance.MediaSize, AcceptRanges=self.MediaProviderInstance.AcceptRanges)
+        self.MediaRequestBoundHandler = partial(MediaAsyncRequestHandlerR if self.MediaServerEngine == MediaServer.ENGINE_ASYNCIO else MediaRequestHandlerR, MediaBuffer=self.MediaBufferInstance, MediaSubBuffer=self.MediaSubBufferInstance, MediaSrc=self.MediaProviderInstance.MediaSrc, MediaSrcType=self.MediaProviderInstance.MediaSrcType, MediaExt=self.MediaProviderInstance.MediaFeedExt, MediaSize=self.MediaProviderInstance.MediaSize, AcceptRanges=self.MediaProviderInstance.AcceptRanges)
       else:
         self.is_running = False
     else:
       self.is_running = False
     if self.is_running:
       try:
-        with ThreadedDualStackServer(self.MediaServerAddress, self.MediaRequestBoundHandler, kmod='mediaserver', verbosity=self.verbosity, auth_ip=self.auth_ip) as self.MediaServerInstance:
+        with (AsyncDualStackServer if self.MediaServerEngine == MediaServer.ENGINE_ASYNCIO else ThreadedDualStackServer)(self.MediaServerAddress, self.MediaRequestBoundHandler, kmod='mediaserver', verbosity=self.verbosity, auth_ip=self.auth_ip) as self.MediaServerInstance:
           if self.is_running:
             self.logger.log(1, 'start', self.MediaServerAddress[0], LSTRINGS['mediaserver'].get({MediaProvider.SERVER_MODE_SEQUENTIAL: 'sequential', MediaProvider.SERVER_MODE_RANDOM: 'random'}.get(self.MediaProviderInstance.ServerMode, ''), ''), '' if self.MediaProviderInstance.ServerMode==MediaProvider.SERVER_MODE_SEQUENTIAL else ('' if self.MediaProviderInstance.AcceptRanges else LSTRINGS['mediaserver'].get('unsupported', 'unsupported')))
             self.MediaServerFinishedEvent.set()
@@ -2154,6 +3446,10 @@ class MediaServer(threading.Thread):
       self.MediaProviderInstance.shutdown()
     except:
       pass
+    self.MediaBufferInstance.r_event.set()
+    self.MediaBufferInstance.w_condition.acquire()
+    self.MediaBufferInstance.notify()
+    self.MediaBufferInstance.w_condition.release()
     try:
       self.MediaServerInstance.shutdown()
       self.logger.log(1, 'shutdown')
@@ -2161,7 +3457,7 @@ class MediaServer(threading.Thread):
       pass
     self.MediaBufferInstance.r_event.set()
     self.MediaBufferInstance.w_condition.acquire()
-    self.MediaBufferInstance.w_condition.notify_all()
+    self.MediaBufferInstance.notify()
     self.MediaBufferInstance.w_condition.release()
 
 
@@ -2184,6 +3480,15 @@ def _XMLGetRTagText(node, tag):
 def _XMLGetSTagText(node, tag):
   return _XMLGetNodeText(_XMLGetSTagElements(node, tag)[0])
 
+def _ETGetTagElements(node, tag):
+  return [elem for elem in node.iter() if elem.tag.rpartition('}')[2] == tag]
+
+def _ETGetTagText(node, tag):
+  for elem in node.iter():
+    if elem.tag.rpartition('}')[2] == tag:
+      return elem.text or ''
+  raise IndexError(tag)
+
 
 class HTTPExplodedMessage:
 
@@ -2262,7 +3567,7 @@ class HTTPMessage:
     return True
 
   @staticmethod
-  def _read(message, max_data, start_time, max_time, stop):
+  def _read(message, max_data, start_time, max_time, stop, buff=None):
     is_stop = lambda : False if stop == None else stop.is_set()
     start_read_time = time.time()
     with selectors.DefaultSelector() as selector:
@@ -2286,7 +3591,10 @@ class HTTPMessage:
           ready = selector.select(rem_time)
         if ready:
           try:
-            return message.recv(min(max_data, 1048576))
+            if buff is None:
+              return message.recv(min(max_data, 1048576))
+            else:
+              return message.recv_into(buff, min(max_data, 1048576))
           except:
             return None
     return None
@@ -2303,17 +3611,21 @@ class HTTPMessage:
       msg = message[0]
     else:
       message.settimeout(None if max_time else timeout)
-      msg = b''
+      msg = bytearray()
+    msg_pos = 0
+    scan_pos = 0
     while True:
-      msg = msg.lstrip(b'\r\n')
-      body_pos = msg.find(b'\r\n\r\n')
+      while msg_pos < len(msg) and msg[msg_pos] in (10, 13):
+        msg_pos += 1
+      body_pos = msg.find(b'\r\n\r\n', max(msg_pos, scan_pos - 3))
       if body_pos >= 0:
         body_pos += 4
         break
-      body_pos = msg.find(b'\n\n')
+      body_pos = msg.find(b'\n\n', max(msg_pos, scan_pos - 1))
       if body_pos >= 0:
         body_pos += 2
         break
+      scan_pos = len(msg)
       if not iss or rem_length <= 0:
         return http_message
       try:
@@ -2323,8 +3635,8 @@ class HTTPMessage:
       except:
         return http_message
       rem_length -= len(bloc)
-      msg = msg + bloc
-    if not cls._read_headers(msg[:body_pos].decode('ISO-8859-1'), http_message):
+      msg += bloc
+    if not cls._read_headers(msg[msg_pos:body_pos].decode('ISO-8859-1'), http_message):
       return http_message.clear()
     if not iss:
       http_message.expect_close = True
@@ -2332,7 +3644,7 @@ class HTTPMessage:
       http_message.body = b''
       return http_message
     if not body:
-      http_message.body = msg[body_pos:]
+      http_message.body = bytes(msg[body_pos:])
       return http_message
     rem_length += max_length - max_hlength
     chunked = http_message.in_header('Transfer-Encoding', 'chunked')
@@ -2367,7 +3679,7 @@ class HTTPMessage:
     if not chunked:
       if body_len < 0:
         if not iss:
-          http_message.body = msg[body_pos:]
+          http_message.body = bytes(msg[body_pos:])
         else:
           bbuf = BytesIO()
           rem_length -= bbuf.write(msg[body_pos:])
@@ -2385,32 +3697,37 @@ class HTTPMessage:
       elif len(msg) < body_pos + body_len:
         if not iss or body_pos + body_len - len(msg) > rem_length:
           return http_message.clear()
-        bbuf = BytesIO()
-        body_len -= bbuf.write(msg[body_pos:])
-        while body_len:
-          try:
-            bw = bbuf.write(cls._read(message, body_len, start_time, max_time, stop))
-            if not bw:
+        bbuf = bytearray(body_len)
+        bbuf_pos = len(msg) - body_pos
+        bbuf[:bbuf_pos] = msg[body_pos:]
+        with memoryview(bbuf) as bview:
+          while bbuf_pos < body_len:
+            try:
+              bw = cls._read(message, body_len - bbuf_pos, start_time, max_time, stop, bview[bbuf_pos:])
+              if not bw:
+                return http_message.clear()
+              bbuf_pos += bw
+            except:
               return http_message.clear()
-            body_len -= bw
-          except:
-            return http_message.clear()
-        http_message.body = bbuf.getvalue()
+        http_message.body = bbuf
       else:
-        http_message.body = msg[body_pos:body_pos+body_len]
+        http_message.body = bytes(msg[body_pos:body_pos+body_len])
     else:
       bbuf = BytesIO()
-      buff = msg[body_pos:]
+      buff = msg
+      buff_pos = body_pos
       while True:
         chunk_pos = -1
-        rem_slength = max_hlength - len(buff)
+        rem_slength = max_hlength - len(buff) + buff_pos
+        scan_pos = buff_pos
         while chunk_pos < 0:
-          buff = buff.lstrip(b'\r\n')
-          chunk_pos = buff.find(b'\r\n')
+          while buff_pos < len(buff) and buff[buff_pos] in (10, 13):
+            buff_pos += 1
+          chunk_pos = buff.find(b'\r\n', max(buff_pos, scan_pos - 1))
           if chunk_pos >= 0:
             chunk_pos += 2
             break
-          chunk_pos = buff.find(b'\n')
+          chunk_pos = buff.find(b'\n', max(buff_pos, scan_pos))
           if chunk_pos >= 0:
             chunk_pos += 1
             break
@@ -2424,9 +3741,12 @@ class HTTPMessage:
             return http_message.clear()
           rem_length -= len(bloc)
           rem_slength -= len(bloc)
-          buff = buff + bloc
+          del buff[:buff_pos]
+          buff_pos = 0
+          scan_pos = len(buff)
+          buff += bloc
         try:
-          chunk_len = int(buff[:chunk_pos].split(b';', 1)[0].rstrip(b'\r\n'), 16)
+          chunk_len = int(buff[buff_pos:chunk_pos].split(b';', 1)[0].rstrip(b'\r\n'), 16)
           if not chunk_len:
             break
         except:
@@ -2436,7 +3756,8 @@ class HTTPMessage:
         if len(buff) < chunk_pos + chunk_len:
           if not iss:
             return http_message.clear()
-          chunk_len -= bbuf.write(buff[chunk_pos:])
+          with memoryview(buff) as bview:
+            chunk_len -= bbuf.write(bview[chunk_pos:])
           while chunk_len:
             try:
               bw = bbuf.write(cls._read(message, chunk_len, start_time, max_time, stop))
@@ -2446,13 +3767,16 @@ class HTTPMessage:
             except:
               return http_message.clear()
             rem_length -= bw
-          buff = b''
+          buff = bytearray()
+          buff_pos = 0
         else:
-          bbuf.write(buff[chunk_pos:chunk_pos+chunk_len])
-          buff = buff[chunk_pos+chunk_len:]
+          with memoryview(buff) as bview:
+            bbuf.write(bview[chunk_pos:chunk_pos+chunk_len])
+          buff_pos = chunk_pos + chunk_len
       http_message.body = bbuf.getvalue()
-      rem_length = min(rem_length, max_hlength - body_pos - len(buff) + chunk_pos)
-      while not (b'\r\n\r\n' in buff or b'\n\n' in buff):
+      rem_length = min(rem_length, max_hlength - body_pos + msg_pos - len(buff) + chunk_pos)
+      scan_pos = buff_pos
+      while buff.find(b'\r\n\r\n', max(buff_pos, scan_pos - 3)) < 0 and buff.find(b'\n\n', max(buff_pos, scan_pos - 1)) < 0:
         if not iss or rem_length <= 0:
           return http_message.clear()
         try:
@@ -2462,7 +3786,8 @@ class HTTPMessage:
         except:
           return http_message.clear()
         rem_length -= len(bloc)
-        buff = buff + bloc
+        scan_pos = len(buff)
+        buff += bloc
     if http_message.body:
       try:
         if decode:
@@ -2510,6 +3835,7 @@ class HTTPRequest:
       return HTTPMessage()
     if max_time:
       start_time = time.time()
+    reuse = pconnection[0] is not None
     while True:
       try:
         if max_time:
@@ -2535,7 +3861,28 @@ class HTTPRequest:
         if is_stop():
           raise
         msg = cls.RequestPattern % (method, (url_p.path + ('?' + url_p.query if url_p.query else '')).replace(' ', '%20') or '/', url_p.netloc, ''.join(k + ': ' + v + '\r\n' for k, v in headers.items()))
-        pconnection[0].sendall(msg.encode('iso-8859-1') + (data or b''))
+        try:
+          pconnection[0].sendall(msg.encode('iso-8859-1') + (data or b''))
+          if reuse and not isinstance(pconnection[0], ssl.SSLSocket):
+            wait_time = time.time()
+            with selectors.DefaultSelector() as selector:
+              selector.register(pconnection[0], selectors.EVENT_READ)
+              while not selector.select(0.5):
+                if is_stop() or time.time() - (start_time if max_time else wait_time) > (max_time or timeout):
+                  raise TimeoutError
+            if not pconnection[0].recv(1, socket.MSG_PEEK):
+              raise ConnectionResetError
+        except ConnectionError:
+          if not reuse:
+            raise
+          reuse = False
+          try:
+            pconnection[0].close()
+          except:
+            pass
+          pconnection[0] = None
+          continue
+        reuse = False
         code = '100'
         while code == '100':
           if max_time:
@@ -2697,6 +4044,9 @@ class DLNAEventWarning:
           return True
     return False
 
+  def complete(self, seq):
+    pass
+
   def fresh(self):
     with self.lock:
       if self.Triggered:
@@ -2817,6 +4167,8 @@ class DLNAEventNotificationHandler(socketserver.BaseRequestHandler):
         for warning in EventListener.Warnings:
           if warning.submit(seq, prop_name, prop_nvalue):
             self.server.logger.log(2, 'alert', EventListener.Device.FriendlyName, EventListener.Service.Id[23:], seq, prop_name, prop_nvalue)
+      for warning in EventListener.Warnings:
+        warning.complete(seq)
     except:
       return
 
@@ -2884,24 +4236,67 @@ class DLNAEventNotificationListener:
       self.logger.log(1, 'stop', self.Handler.DEVICE_TYPE, self.Handler.ip, self.port)
 
 
+class DLNATaskPool:
+
+  def __init__(self, size=8, depth=256):
+    self.Size = max(1, size)
+    self.Depth = depth
+    self.Tasks = {}
+    self.Running = {}
+    self.Workers = 0
+    self.lock = threading.Lock()
+
+  def _work(self):
+    while True:
+      with self.lock:
+        if not self.Tasks:
+          self.Workers -= 1
+          return
+        key = next(iter(self.Tasks))
+        target, args, event = self.Tasks.pop(key)
+        self.Running[key] = event
+      try:
+        target(*args)
+      except:
+        pass
+      with self.lock:
+        del self.Running[key]
+      event.set()
+
+  def submit(self, key, target, *args):
+    with self.lock:
+      if key in self.Tasks:
+        return self.Tasks[key][2], False
+      if key in self.Running:
+        return self.Running[key], False
+      if len(self.Tasks) >= self.Depth:
+        return None, False
+      event = threading.Event()
+      self.Tasks[key] = (target, args, event)
+      if self.Workers < self.Size:
+        self.Workers += 1
+        threading.Thread(target=self._work, daemon=True).start()
+    return event, True
+
+
 class DLNAAdvertisementServer:
 
+  POOL_SIZE = 4
+  POOL_DEPTH = 64
+
   def __init__(self, handlers, verbosity):
     self.logger = log_event('dlnaadvertisement', verbosity)
     self.Handlers = handlers
+    self.Pool = DLNATaskPool(self.POOL_SIZE, self.POOL_DEPTH)
     self.__shutdown_request = False
     self.__is_shut_down = threading.Event()
     self.__is_shut_down.set()
     self.Sockets = ()
     self.Ips = ()
 
-  def _handle(self, i, msg, addr):
-    sock = self.Sockets[i]
+  def _handle(self, i, req, addr):
     ip = self.Ips[i]
     try:
-      req = HTTPMessage((msg, sock))
-      if req.method != 'NOTIFY':
-        return
       nt = req.header('NT', '')
       only_media = True
       for handler in self.Handlers:
@@ -2923,35 +4318,39 @@ class DLNAAdvertisementServer:
         if handler.DEVICE_TYPE.lower() != 'device':
           if not ('Media' + handler.DEVICE_TYPE).lower() in nt.lower():
             continue
+        dev = handler.Registry.find(desc_url, udn)
         if 'alive' in nts.lower():
-          for dev in handler.Devices:
-            if dev.DescURL == desc_url and dev.UDN == udn:
-              if dev.StatusAlive:
-                if dev.StatusTime < time_req:
-                  dev.StatusTime = time_req
-                  dev.StatusAliveLastTime = time_req
-              else:
-                handler._update_devices(desc_url, time_req, ip, handler.advert_status_change)
-              break
+          if dev:
+            if dev.StatusAlive:
+              if dev.StatusTime < time_req:
+                dev.StatusTime = time_req
+                dev.StatusAliveLastTime = time_req
+            else:
+              handler._update_devices(desc_url, time_req, ip, handler.advert_status_change)
           else:
             if dip == addr[0]:
               handler._update_devices(desc_url, time_req, ip, handler.advert_status_change)
             else:
               self.logger.log(2, 'ignored', usn, *addr)
         elif 'byebye' in nts.lower():
-          for dev in handler.Devices:
-            if dev.DescURL == desc_url and dev.UDN == udn:
-              if dev.StatusAlive:
-                dev.StatusAlive = False
-                handler.advert_status_change.set()
-              dev.StatusTime = time_req
-              break
+          if dev:
+            if dev.StatusAlive:
+              dev.StatusAlive = False
+              handler.advert_status_change.set()
+            dev.StatusTime = time_req
     except:
       return
 
   def handle(self, i, msg, addr):
-    t = threading.Thread(target=self._handle, args=(i, msg, addr), daemon=True)
-    t.start()
+    try:
+      req = HTTPMessage((msg, self.Sockets[i]))
+      if req.method != 'NOTIFY':
+        return
+      usn = req.header('USN', '')
+      if not self.Pool.submit((i, usn, req.header('NTS', '').lower(), req.header('Location', '')), self._handle, i, req, addr)[0]:
+        self.logger.log(2, 'saturated', usn, *addr)
+    except:
+      pass
 
   def serve_forever(self):
     self.__is_shut_down.clear()
@@ -3064,9 +4463,75 @@ class DLNAAdvertisementListener:
     return adv_event
 
 
+class DLNADeviceRegistry:
+
+  def __init__(self):
+    self.Devices = []
+    self.Hips = []
+    self.Indexes = {}
+    self.DescUDNs = {}
+    self.UDNs = {}
+    self.Names = {}
+
+  def set(self, ind, device, hip):
+    if ind is None:
+      ind = len(self.Devices)
+      self.Hips.append(hip)
+      self.Devices.append(device)
+    else:
+      dev = self.Devices[ind]
+      del self.Indexes[dev]
+      self.DescUDNs.pop((dev.DescURL, dev.UDN), None)
+      self.UDNs[dev.UDN].remove(ind)
+      self.Names[(dev.FriendlyName or '').lower()].remove(ind)
+      self.Hips[ind] = hip
+      self.Devices[ind] = device
+    self.Indexes[device] = ind
+    self.DescUDNs[(device.DescURL, device.UDN)] = ind
+    bisect.insort(self.UDNs.setdefault(device.UDN, []), ind)
+    bisect.insort(self.Names.setdefault((device.FriendlyName or '').lower(), []), ind)
+    return ind
+
+  def index(self, device):
+    return self.Indexes[device]
+
+  def hip(self, device):
+    return self.Hips[self.Indexes[device]]
+
+  def find(self, desc_url, udn):
+    ind = self.DescUDNs.get((desc_url, udn))
+    return None if ind is None else self.Devices[ind]
+
+  def search(self, udn=None, name=None, complete=False):
+    if udn:
+      inds = self.UDNs.get(udn, ())
+      if name:
+        inds = [ind for ind in inds if self.Devices[ind].FriendlyName.lower() == name.lower()]
+    elif name:
+      inds = self.Names.get(name.lower(), ())
+    else:
+      inds = range(len(self.Devices))
+    device = None
+    for ind in inds:
+      dev = self.Devices[ind]
+      if dev.StatusAlive and (not complete or dev.BaseURL):
+        return dev
+      if udn or name:
+        device = dev
+    return device
+
+
 class DLNAHandler:
 
   DEVICE_TYPE = 'Device'
+  SOAP_IDLE_TIMEOUT = 20
+  POOL_SIZE = 8
+  POOL_DEPTH = 256
+  DESCRIPTIONS_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DLNAPlayOn.cache')
+  DESCRIPTIONS_CACHE_TTL = 86400
+  DESCRIPTIONS_CACHE_EXPIRY = 2592000
+  descriptions_cache = None
+  descriptions_cache_lock = threading.Lock()
 
   @staticmethod
   def retrieve_ips():
@@ -3089,8 +4554,9 @@ class DLNAHandler:
     return tuple(socket.inet_ntoa(e.dwAddr.to_bytes(4, 'little')) for e in t if e.wType & 1)
 
   def __init__(self, ip='', verbosity=0):
-    self.Devices = []
-    self.Hips = []
+    self.Registry = DLNADeviceRegistry()
+    self.Devices = self.Registry.Devices
+    self.Hips = self.Registry.Hips
     self.verbosity = verbosity
     self.logger = log_event('dlnahandler', verbosity)
     self.advertisement_listener = None
@@ -3121,36 +4587,94 @@ class DLNAHandler:
     else:
       self.ips = self.retrieve_ips()
     self.update_devices = threading.Lock()
+    self.update_pool = DLNATaskPool(self.POOL_SIZE, self.POOL_DEPTH)
+    self.soap_connections = {}
+    self.soap_lock = threading.Lock()
+
+  @staticmethod
+  def _cache_get(device_type, desc_url):
+    with DLNAHandler.descriptions_cache_lock:
+      if DLNAHandler.descriptions_cache is None:
+        DLNAHandler.descriptions_cache = {}
+        if DLNAHandler.DESCRIPTIONS_CACHE_PATH:
+          try:
+            with open(DLNAHandler.DESCRIPTIONS_CACHE_PATH, 'rt', encoding='utf-8') as f:
+              cache = json.load(f)
+            DLNAHandler.descriptions_cache = {t: {k: v for k, v in c.items() if time.time() - v['Time'] <= DLNAHandler.DESCRIPTIONS_CACHE_EXPIRY} for t, c in cache.items()}
+          except:
+            pass
+      if desc_url is None:
+        return dict(DLNAHandler.descriptions_cache.get(device_type, {}))
+      return DLNAHandler.descriptions_cache.get(device_type, {}).get(desc_url)
+
+  @staticmethod
+  def _cache_set(device_type, desc_url, entry):
+    DLNAHandler._cache_get(device_type, None)
+    with DLNAHandler.descriptions_cache_lock:
+      DLNAHandler.descriptions_cache.setdefault(device_type, {})[desc_url] = entry
+      if not DLNAHandler.DESCRIPTIONS_CACHE_PATH:
+        return
+      try:
+        with open(DLNAHandler.DESCRIPTIONS_CACHE_PATH + '.tmp', 'wt', encoding='utf-8') as f:
+          json.dump(DLNAHandler.descriptions_cache, f)
+        os.replace(DLNAHandler.DESCRIPTIONS_CACHE_PATH + '.tmp', DLNAHandler.DESCRIPTIONS_CACHE_PATH)
+      except:
+        pass
+
+  def restore_devices(self, status_change=None):
+    entries = [(desc_url, entry['Hip']) for desc_url, entry in self._cache_get(self.DEVICE_TYPE, None).items() if entry['Hip'] in self.ips]
+    if entries:
+      self.logger.log(2, 'cacheprobe', len(entries), self.DEVICE_TYPE.lower())
+    for desc_url, hip in entries:
+      self.update_pool.submit((desc_url, hip), self._update_devices, desc_url, time.localtime(), hip, status_change)
 
   def _update_devices(self, desc_url, time_msg, hip, status_change=None, cond_numb=None):
+    cached = self._cache_get(self.DEVICE_TYPE, desc_url)
+    entry = {'UDN': None, 'Hip': hip, 'Time': time.time(), 'ETag': None, 'Last-Modified': None, 'Body': None, 'Services': {}}
     try:
-      resp = HTTPRequest(desc_url, timeout=5, ip=hip)
-      if resp.code != '200':
+      headers = {}
+      if cached:
+        if cached['ETag']:
+          headers['If-None-Match'] = cached['ETag']
+        if cached['Last-Modified']:
+          headers['If-Modified-Since'] = cached['Last-Modified']
+      resp = HTTPRequest(desc_url, headers=headers, timeout=5, ip=hip)
+      if resp.code == '304' and cached:
+        entry['ETag'] = cached['ETag']
+        entry['Last-Modified'] = cached['Last-Modified']
+        entry['Body'] = cached['Body']
+      elif resp.code == '200':
+        entry['ETag'] = resp.header('ETag')
+        entry['Last-Modified'] = resp.header('Last-Modified')
+        entry['Body'] = base64.b64encode(resp.body).decode('utf-8')
+      else:
         raise
-      root_xml = minidom.parseString(resp.body)
-      if not ('Media' + self.DEVICE_TYPE).lower() in _XMLGetRTagText(root_xml, 'deviceType').lower():
+      root_xml = ElementTree.fromstring(base64.b64decode(entry['Body']))
+      if not ('Media' + self.DEVICE_TYPE).lower() in _ETGetTagText(root_xml, 'deviceType').lower():
         raise
-      udn = _XMLGetRTagText(root_xml, 'UDN')
+      udn = _ETGetTagText(root_xml, 'UDN')
+      entry['UDN'] = udn
+      if cached and cached.get('UDN') != udn:
+        cached = None
       self.update_devices.acquire()
       dind = None
       try:
-        for d, dev in enumerate(self.Devices):
-          if dev.DescURL == desc_url and dev.UDN == udn:
-            if dev.StatusAlive:
-              if dev.StatusTime < time_msg:
-                dev.StatusTime = time_msg
-                dev.StatusAliveLastTime = time_msg
-              raise
-            dind = d
-            break
+        dev = self.Registry.find(desc_url, udn)
+        if dev:
+          if dev.StatusAlive:
+            if dev.StatusTime < time_msg:
+              dev.StatusTime = time_msg
+              dev.StatusAliveLastTime = time_msg
+            raise
+          dind = self.Registry.index(dev)
         try:
           device = eval('DLNA' + self.DEVICE_TYPE + '()')
         except:
           device = DLNADevice()
         device.Ip = urllib.parse.urlparse(desc_url).netloc.split(':', 1)[0]
-        baseurl_elem = _XMLGetRTagElements(root_xml, 'URLBase')
+        baseurl_elem = _ETGetTagElements(root_xml, 'URLBase')
         if baseurl_elem:
-          baseurl = _XMLGetNodeText(baseurl_elem[0])
+          baseurl = baseurl_elem[0].text or ''
           if urllib.parse.urlparse(baseurl).netloc.split(':', 1)[0] != device.Ip:
             raise
         else:
@@ -3166,16 +4690,16 @@ class DLNAHandler:
       return False
     try:
       device.IconURL = None
-      nodes_ic = _XMLGetRTagElements(root_xml, 'icon')
+      nodes_ic = _ETGetTagElements(root_xml, 'icon')
       for node_ic in reversed(nodes_ic):
         try:
-          if 'png' in _XMLGetRTagText(node_ic, 'mimetype').lower():
-            device.IconURL = urllib.parse.urljoin(baseurl, _XMLGetRTagText(node_ic, 'url'))
+          if 'png' in _ETGetTagText(node_ic, 'mimetype').lower():
+            device.IconURL = urllib.parse.urljoin(baseurl, _ETGetTagText(node_ic, 'url'))
         except:
           pass
       if not device.IconURL:
         try:
-          device.IconURL = urllib.parse.urljoin(baseurl, _XMLGetRTagText(_XMLGetRTagElements(root_xml, 'icon')[-1], 'url'))
+          device.IconURL = urllib.parse.urljoin(baseurl, _ETGetTagText(_ETGetTagElements(root_xml, 'icon')[-1], 'url'))
         except:
           device.IconURL = ''
       if device.IconURL:
@@ -3184,7 +4708,7 @@ class DLNAHandler:
     except:
       pass
     try:
-      device.FriendlyName = _XMLGetRTagText(root_xml, 'friendlyName')
+      device.FriendlyName = _ETGetTagText(root_xml, 'friendlyName')
     except:
       device.FriendlyName = ''
     device.DescURL = desc_url
@@ -3192,113 +4716,92 @@ class DLNAHandler:
     device.StatusAlive = True
     device.StatusTime = time_msg
     device.StatusAliveLastTime = time_msg
-    if dind is None:
-      self.Hips.append(hip)
-      self.Devices.append(device)
-    else:
-      self.Hips[d] = hip
-      self.Devices[d] = device
+    self.Registry.set(dind, device, hip)
     self.update_devices.release()
     if cond_numb:
       with cond_numb[0]:
         cond_numb[1] += 1
         cond_numb[0].notify()
     try:
-      device.Manufacturer = _XMLGetRTagText(root_xml, 'manufacturer')
+      device.Manufacturer = _ETGetTagText(root_xml, 'manufacturer')
     except:
       pass
     try:
-      device.ModelName = _XMLGetRTagText(root_xml, 'modelName')
+      device.ModelName = _ETGetTagText(root_xml, 'modelName')
     except:
       pass
     if dind is None:
       self.logger.log(1, 'registering', self.DEVICE_TYPE.lower(), device.FriendlyName, hip)
     try:
-      device.ModelDesc = _XMLGetRTagText(root_xml, 'modelDescription')
+      device.ModelDesc = _ETGetTagText(root_xml, 'modelDescription')
     except:
       pass
     try:
-      device.ModelNumber = _XMLGetRTagText(root_xml, 'modelNumber')
+      device.ModelNumber = _ETGetTagText(root_xml, 'modelNumber')
     except:
       pass
     try:
-      device.SerialNumber = _XMLGetRTagText(root_xml, 'serialNumber')
+      device.SerialNumber = _ETGetTagText(root_xml, 'serialNumber')
     except:
       pass
-    for node in _XMLGetRTagElements(root_xml, 'service'):
+    for node in _ETGetTagElements(root_xml, 'service'):
       service = DLNAService()
       try:
-        service.Type = _XMLGetRTagText(node, 'serviceType')
-        service.Id = _XMLGetRTagText(node, 'serviceId')
-        service.ControlURL = urllib.parse.urljoin(baseurl, _XMLGetRTagText(node, 'controlURL'))
+        service.Type = _ETGetTagText(node, 'serviceType')
+        service.Id = _ETGetTagText(node, 'serviceId')
+        service.ControlURL = urllib.parse.urljoin(baseurl, _ETGetTagText(node, 'controlURL'))
         if urllib.parse.urlparse(service.ControlURL).netloc.split(':', 1)[0] != device.Ip:
           continue
-        service.SubscrEventURL = urllib.parse.urljoin(baseurl, _XMLGetRTagText(node, 'eventSubURL'))
+        service.SubscrEventURL = urllib.parse.urljoin(baseurl, _ETGetTagText(node, 'eventSubURL'))
         if urllib.parse.urlparse(service.SubscrEventURL).netloc.split(':', 1)[0] != device.Ip:
           continue
-        service.DescURL = urllib.parse.urljoin(baseurl, _XMLGetRTagText(node, 'SCPDURL'))
+        service.DescURL = urllib.parse.urljoin(baseurl, _ETGetTagText(node, 'SCPDURL'))
         if urllib.parse.urlparse(service.DescURL).netloc.split(':', 1)[0] != device.Ip:
           continue
       except:
         continue
-      try:
-        resp = HTTPRequest(service.DescURL, timeout=5, ip=hip)
-        if resp.code != '200':
-          raise
-      except:
-        continue
-      root_s_xml = minidom.parseString(resp.body)
-      for node_s in _XMLGetSTagElements(root_s_xml, 'action'):
-        action = DLNAAction()
+      scpd = cached['Services'].get(service.DescURL) if cached else None
+      if scpd and time.time() - scpd['Time'] <= self.DESCRIPTIONS_CACHE_TTL:
+        entry['Services'][service.DescURL] = scpd
+      else:
         try:
-          action.Name = _XMLGetSTagText(node_s, 'name')
+          headers = {}
+          if scpd:
+            if scpd['ETag']:
+              headers['If-None-Match'] = scpd['ETag']
+            if scpd['Last-Modified']:
+              headers['If-Modified-Since'] = scpd['Last-Modified']
+          resp = HTTPRequest(service.DescURL, headers=headers, timeout=5, ip=hip)
+          if resp.code == '304' and scpd:
+            scpd = {**scpd, 'Time': time.time()}
+          elif resp.code == '200':
+            actions, lastchange = self._parse_scpd(resp.body)
+            if actions is None:
+              raise
+            scpd = {'Time': time.time(), 'ETag': resp.header('ETag'), 'Last-Modified': resp.header('Last-Modified'), 'Actions': actions, 'EventThroughLastChange': lastchange}
+          else:
+            raise
         except:
           continue
-        for node_a in _XMLGetSTagElements(node_s, 'argument'):
+        entry['Services'][service.DescURL] = scpd
+      for action_name, arguments in scpd['Actions']:
+        action = DLNAAction()
+        action.Name = action_name
+        for argument_name, argument_direction, argument_event, argument_type, argument_allowedvaluelist, argument_allowedvaluerange, argument_defaultvalue in arguments:
           argument = DLNAArgument()
-          try:
-            argument.Name = _XMLGetSTagText(node_a, 'name')
-            argument.Direction = _XMLGetSTagText(node_a, 'direction')
-            statevar = _XMLGetSTagText(node_a, 'relatedStateVariable')
-            node_sv = next(sv for sv in _XMLGetSTagElements(root_s_xml, 'stateVariable') if _XMLGetSTagElements(sv, 'name')[0].childNodes[0].data == statevar)
-            if node_sv.getAttribute('sendEvents') == 'yes':
-              argument.Event = True
-            elif node_sv.getAttribute('sendEvents') == 'no':
-              argument.Event = False
-            argument.Type = _XMLGetSTagText(node_sv, 'dataType')
-            try:
-              node_sv_av = _XMLGetSTagElements(node_sv, 'allowedValueList')[0]
-              argument.AllowedValueList = *(_XMLGetNodeText(av) for av in _XMLGetSTagElements(node_sv_av,'allowedValue')),
-            except:
-              pass
-            try:
-              node_sv_ar = _XMLGetSTagElements(node_sv, 'allowedValueRange')[0]
-              argument.AllowedValueRange = (_XMLGetSTagText(node_sv_ar, 'minimum'), _XMLGetSTagText(node_sv_ar, 'maximum'))
-            except:
-              pass
-            try:
-              argument.DefaultValue = _XMLGetSTagText(node_sv, 'defaultValue')
-            except:
-              pass
-          except:
-            argument = None
-            continue
-          if argument:
-            action.Arguments.append(argument)
-          else:
-            action = None
-            break
-        if action:
-          service.Actions.append(action)
-      service.EventThroughLastChange = False
-      try:
-        node_sv = next(sv for sv in _XMLGetSTagElements(root_s_xml, 'stateVariable') if _XMLGetSTagElements(sv, 'name')[0].childNodes[0].data.upper() == 'LastChange'.upper())
-        if node_sv.getAttribute('sendEvents') == 'yes':
-          service.EventThroughLastChange = True
-      except:
-        pass
+          argument.Name = argument_name
+          argument.Direction = argument_direction
+          argument.Event = argument_event
+          argument.Type = argument_type
+          argument.AllowedValueList = None if argument_allowedvaluelist is None else tuple(argument_allowedvaluelist)
+          argument.AllowedValueRange = None if argument_allowedvaluerange is None else tuple(argument_allowedvaluerange)
+          argument.DefaultValue = argument_defaultvalue
+          action.Arguments.append(argument)
+        service.Actions.append(action)
+      service.EventThroughLastChange = scpd['EventThroughLastChange']
       device.Services.append(service)
     device.BaseURL = baseurl
+    self._cache_set(self.DEVICE_TYPE, desc_url, entry)
     if status_change:
       try:
         status_change.set()
@@ -3306,6 +4809,63 @@ class DLNAHandler:
         pass
     return True
 
+  @staticmethod
+  def _parse_scpd(body):
+    statevars = {}
+    actions = []
+    lastchange = None
+    try:
+      for event, node_s in ElementTree.iterparse(BytesIO(body)):
+        tag = node_s.tag.rpartition('}')[2]
+        if tag == 'stateVariable':
+          try:
+            statevar = _ETGetTagText(node_s, 'name')
+          except:
+            node_s.clear()
+            continue
+          if lastchange is None and statevar.upper() == 'LastChange'.upper():
+            lastchange = node_s.get('sendEvents') == 'yes'
+          if statevar in statevars:
+            node_s.clear()
+            continue
+          sv = [{'yes': True, 'no': False}.get(node_s.get('sendEvents')), None, None, None, None]
+          try:
+            sv[1] = _ETGetTagText(node_s, 'dataType')
+          except:
+            pass
+          try:
+            node_sv_av = _ETGetTagElements(node_s, 'allowedValueList')[0]
+            sv[2] = *((av.text or '') for av in _ETGetTagElements(node_sv_av, 'allowedValue')),
+          except:
+            pass
+          try:
+            node_sv_ar = _ETGetTagElements(node_s, 'allowedValueRange')[0]
+            sv[3] = (_ETGetTagText(node_sv_ar, 'minimum'), _ETGetTagText(node_sv_ar, 'maximum'))
+          except:
+            pass
+          try:
+            sv[4] = _ETGetTagText(node_s, 'defaultValue')
+          except:
+            pass
+          statevars[statevar] = sv
+          node_s.clear()
+        elif tag == 'action':
+          try:
+            action = [_ETGetTagText(node_s, 'name'), []]
+          except:
+            node_s.clear()
+            continue
+          for node_a in _ETGetTagElements(node_s, 'argument'):
+            try:
+              action[1].append((_ETGetTagText(node_a, 'name'), _ETGetTagText(node_a, 'direction'), _ETGetTagText(node_a, 'relatedStateVariable')))
+            except:
+              pass
+          actions.append(action)
+          node_s.clear()
+    except:
+      return None, None
+    return [[action_name, [[argument_name, argument_direction, *statevars[statevar]] for argument_name, argument_direction, statevar in arguments if statevar in statevars and statevars[statevar][1] is not None]] for action_name, arguments in actions], bool(lastchange)
+
   def _discover(self, uuid=None, timeout=2, alive_persistence=0, from_polling=False):
     if uuid:
       self.logger.log(2, 'msearch1', uuid)
@@ -3363,6 +4923,7 @@ class DLNAHandler:
           pass
       start_time = time.monotonic()
       tupds = []
+      tot_numb = 0
       if from_polling:
         cond_numb = [threading.Condition(), 0]
       else:
@@ -3382,9 +4943,11 @@ class DLNAHandler:
                 continue
               loca = resp.header('Location')
               if (urllib.parse.urlparse(loca)).netloc.split(':',1)[0] == addr[0]:
-                t = threading.Thread(target=self._update_devices, args=(loca, time_resp, ip, self.discovery_status_change if from_polling else None, cond_numb), daemon=True)
-                tupds.append(t)
-                t.start()
+                t, new = self.update_pool.submit((loca, ip), self._update_devices, loca, time_resp, ip, self.discovery_status_change if from_polling else None, cond_numb)
+                if t:
+                  tupds.append(t)
+                if new:
+                  tot_numb += 1
               else:
                 self.logger.log(2, 'ignored', *addr)
             except:
@@ -3397,7 +4960,6 @@ class DLNAHandler:
         sock.close()
       except:
         pass
-    tot_numb = len(tupds)
     if cond_numb and tot_numb:
       with cond_numb[0]:
         while cond_numb[1] < tot_numb:
@@ -3418,7 +4980,7 @@ class DLNAHandler:
         pass
     if not from_polling:
       for t in tupds:
-        t.join()
+        t.wait()
 
   def discover(self, uuid=None, timeout=2, alive_persistence=0, from_polling=False):
     if from_polling:
@@ -3429,36 +4991,14 @@ class DLNAHandler:
       self._discover(uuid, timeout, alive_persistence, from_polling)
 
   def search(self, uuid=None, name=None, complete=False):
-    device = None
-    for dev in self.Devices:
-      if uuid:
-        if name:
-          if dev.UDN == 'uuid:' + uuid and dev.FriendlyName.lower() == name.lower():
-            device = dev
-            if dev.StatusAlive and (not complete or dev.BaseURL):
-              break
-        else:
-          if dev.UDN == 'uuid:' + uuid:
-            device = dev
-            if dev.StatusAlive and (not complete or dev.BaseURL):
-              break
-      else:
-        if name:
-          if dev.FriendlyName.lower() == name.lower():
-            device = dev
-            if dev.StatusAlive and (not complete or dev.BaseURL):
-              break
-        else:
-          if dev.StatusAlive and (not complete or dev.BaseURL):
-            device = dev
-            break
-    return device
+    return self.Registry.search('uuid:' + uuid if uuid else None, name, complete)
 
   def _discovery_polling(self, timeout=2, alive_persistence=0, polling_period=30):
     self.is_discovery_polling_running = True
     if self.discovery_status_change == None:
       self.discovery_status_change = threading.Event()
     first_time = True
+    self.restore_devices(self.discovery_status_change)
     while self.is_discovery_polling_running and not self.discovery_polling_shutdown.is_set():
       if first_time:
         self.discover(uuid=None, timeout=timeout, alive_persistence=86400, from_polling=True)
@@ -3495,6 +5035,7 @@ class DLNAHandler:
       self.logger.log(1, 'stop', self.DEVICE_TYPE.lower())
       self.is_discovery_polling_running = False
       self.discovery_status_change.set()
+    self.close_soap_connections()
 
   def wait_for_discovery(self, timeout=None):
     disc_event = None
@@ -3558,11 +5099,21 @@ class DLNAHandler:
     }
     return serv.ControlURL, msg_headers, msg_body_b, out_args
 
+  def close_soap_connections(self):
+    with self.soap_lock:
+      connections = [connection for key in self.soap_connections for connection in self.soap_connections[key]]
+      self.soap_connections.clear()
+    for connection in connections:
+      try:
+        connection[0][0].close()
+      except:
+        pass
+
   def send_soap_msg(self, device, service, action, soap_timeout=5, soap_stop=None, **arguments):
     if not device:
       return None
     try:
-      ip = self.Hips[self.Devices.index(device)]
+      ip = self.Registry.hip(device)
     except:
       return None
     cturl_headers_body_oargs = self._build_soap_msg(device, service, action, **arguments)
@@ -3570,7 +5121,29 @@ class DLNAHandler:
       self.logger.log(1, 'commandabandonment', self.DEVICE_TYPE, device.FriendlyName, service, action)
       return None
     self.logger.log(2, 'commandsending', self.DEVICE_TYPE, device.FriendlyName, service, action)
-    resp = HTTPRequest(cturl_headers_body_oargs[0], method='POST', headers=cturl_headers_body_oargs[1], data=cturl_headers_body_oargs[2], timeout=3, max_length=104857600, max_time=soap_timeout+1, stop=soap_stop, ip=ip)
+    pconnection = None
+    try:
+      key = (urllib.parse.urlsplit(cturl_headers_body_oargs[0]).netloc.lower(), ip)
+      with self.soap_lock:
+        connections = self.soap_connections.get(key, [])
+        for connection in connections[:]:
+          if time.monotonic() - connection[1] > DLNAHandler.SOAP_IDLE_TIMEOUT:
+            connections.remove(connection)
+            try:
+              connection[0][0].close()
+            except:
+              pass
+        if connections:
+          pconnection = connections.pop()[0]
+    except:
+      key = None
+    reused = pconnection is not None
+    if not reused:
+      pconnection = [None]
+    resp = HTTPRequest(cturl_headers_body_oargs[0], method='POST', headers=cturl_headers_body_oargs[1], data=cturl_headers_body_oargs[2], timeout=3, max_length=104857600, max_time=soap_timeout+1, stop=soap_stop, pconnection=pconnection, ip=ip)
+    if pconnection[0] is not None and key is not None:
+      with self.soap_lock:
+        self.soap_connections.setdefault(key, []).append((pconnection, time.monotonic()))
     if resp.code != '200':
       self.logger.log(1, 'commandfailure', self.DEVICE_TYPE, device.FriendlyName, service, action)
       return None
@@ -3623,7 +5196,7 @@ class DLNAHandler:
     if not device:
       return None
     try:
-      hip = self.Hips[self.Devices.index(device)]
+      hip = self.Registry.hip(device)
     except:
       return None
     serv = next((serv for serv in device.Services if serv.Id == ('urn:upnp-org:serviceId:' + service)), None)
@@ -3934,6 +5507,8 @@ class DLNAController(DLNAHandler):
 class DLNAClient(DLNAHandler):
 
   DEVICE_TYPE = 'Server'
+  BROWSE_PAGE_SIZE = 500
+  BROWSE_CONCURRENCY = 3
 
   def __init__(self, ip='', verbosity=0):
     super().__init__(ip, verbosity)
@@ -3942,78 +5517,152 @@ class DLNAClient(DLNAHandler):
   def _extract_metadata(self, node):
     try:
       obj_id = ''
-      for att in node.attributes.items():
+      for att in node.attrib.items():
         if att[0].lower() == 'id':
           obj_id = att[1]
           break
       if not obj_id:
         return None
-      obj_type = node.localName
+      obj_type = node.tag.rpartition('}')[2]
       obj_class = ''
       obj_title = ''
       obj_album = ''
       obj_artist = ''
       obj_track = ''
       obj_uri = ''
-      for ch_node in node.childNodes:
-        if ch_node.nodeType == ch_node.ELEMENT_NODE:
-          chn_ln = ch_node.localName.lower()
-          if chn_ln == 'class':
-            obj_class = '.'.join(_XMLGetNodeText(ch_node).split('.')[:3])
-          elif chn_ln == 'title':
-            obj_title = _XMLGetNodeText(ch_node)
-          elif chn_ln == 'album':
-            obj_album = _XMLGetNodeText(ch_node)
-          elif chn_ln == 'creator':
-            obj_artist = _XMLGetNodeText(ch_node)
-          elif chn_ln == 'originaltracknumber':
-            obj_track = _XMLGetNodeText(ch_node)
-          elif chn_ln == 'res':
-            if not obj_uri:
-              obj_uri = _XMLGetNodeText(ch_node)
-            for att in node.attributes.items():
-              if att[0].lower() == 'protocolinfo':
-                if not 'DLNA.ORG_CI=1' in att[1].upper().replace(' ',''):
-                  obj_uri = _XMLGetNodeText(ch_node)
-                  break
+      for ch_node in node:
+        chn_ln = ch_node.tag.rpartition('}')[2].lower()
+        if chn_ln == 'class':
+          obj_class = '.'.join((ch_node.text or '').split('.')[:3])
+        elif chn_ln == 'title':
+          obj_title = ch_node.text or ''
+        elif chn_ln == 'album':
+          obj_album = ch_node.text or ''
+        elif chn_ln == 'creator':
+          obj_artist = ch_node.text or ''
+        elif chn_ln == 'originaltracknumber':
+          obj_track = ch_node.text or ''
+        elif chn_ln == 'res':
+          if not obj_uri:
+            obj_uri = ch_node.text or ''
+          for att in node.attrib.items():
+            if att[0].lower() == 'protocolinfo':
+              if not 'DLNA.ORG_CI=1' in att[1].upper().replace(' ',''):
+                obj_uri = ch_node.text or ''
+                break
       return {'id': obj_id, 'type': obj_type, 'class': obj_class, 'uri': obj_uri, 'title': obj_title, 'album': obj_album, 'track': obj_track, 'artist': obj_artist}
     except:
      return None
 
+  def _parse_didl(self, result):
+    objs = []
+    depth = 0
+    for event, node in ElementTree.iterparse(StringIO(result), ('start', 'end')):
+      if event == 'start':
+        depth += 1
+      else:
+        depth -= 1
+        if depth == 1:
+          d = self._extract_metadata(node)
+          if d:
+            objs.append(d)
+          node.clear()
+    return objs
+
   def get_Metadata(self, server, id='0', stop=None):
     out_args = self.send_soap_msg(server, 'ContentDirectory', 'Browse', soap_timeout=10, soap_stop=stop, ObjectID=id, BrowseFlag='BrowseMetadata', Filter='*', StartingIndex=0, RequestedCount=0, SortCriteria='')
     if not out_args:
       return None
     else:
       try:
-        root_xml = minidom.parseString(out_args['Result'])
-        for node in root_xml.documentElement.childNodes:
-          if node.nodeType == node.ELEMENT_NODE:
-            break
-        d = self._extract_metadata(node)
+        d = self._parse_didl(out_args['Result'])[0]
       except:
         return None
       return d
 
-  def get_Children(self, server, id='0', stop=None):
-    out_args = self.send_soap_msg(server, 'ContentDirectory', 'Browse', soap_timeout=60, soap_stop=stop,ObjectID=id, BrowseFlag='BrowseDirectChildren', Filter='*', StartingIndex=0, RequestedCount=0, SortCriteria='')
+  def _browse_children(self, server, id, start, count, stop):
+    out_args = self.send_soap_msg(server, 'ContentDirectory', 'Browse', soap_timeout=60, soap_stop=stop, ObjectID=id, BrowseFlag='BrowseDirectChildren', Filter='*', StartingIndex=start, RequestedCount=count, SortCriteria='')
     if not out_args:
       return None
-    else:
-      children = []
+    try:
+      children = self._parse_didl(out_args['Result'])
+    except:
+      return None
+    try:
+      returned = int(out_args['NumberReturned'])
+    except:
+      returned = len(children)
+    try:
+      total = int(out_args['TotalMatches'])
+    except:
+      total = 0
+    return children, returned, total
+
+  def _browse_pages(self, server, id, starts, count, end, stop, pages, progress):
+    while True:
       try:
-        root_xml = minidom.parseString(out_args['Result'])
-        for node in root_xml.documentElement.childNodes:
-          if node.nodeType != node.ELEMENT_NODE:
-            continue
-          d = self._extract_metadata(node)
-          if d:
-            children.append(d)
+        start = next(starts)
       except:
-        return None
-      return children
+        return
+      children = []
+      ind = start
+      while ind < min(start + count, end):
+        if stop is not None and stop.is_set():
+          pages[start] = None
+          return
+        page = self._browse_children(server, id, ind, min(start + count, end) - ind, stop)
+        if page is None:
+          pages[start] = None
+          return
+        children.extend(page[0])
+        if not page[1]:
+          break
+        ind += page[1]
+      pages[start] = children
+      if progress:
+        progress(children)
+
+  def get_Children(self, server, id='0', stop=None, progress=None):
+    page = self._browse_children(server, id, 0, self.BROWSE_PAGE_SIZE, stop)
+    if page is None:
+      return None
+    children, returned, total = page
+    if progress:
+      progress(children)
+    if returned and total > returned:
+      pages = {}
+      starts = iter(range(returned, total, returned))
+      threads = list(threading.Thread(target=self._browse_pages, args=(server, id, starts, returned, total, stop, pages, progress), daemon=True) for i in range(min(self.BROWSE_CONCURRENCY, (total - 1) // returned)))
+      for t in threads:
+        t.start()
+      for t in threads:
+        t.join()
+      for start in range(returned, total, returned):
+        if pages.get(start) is None:
+          return None
+        children.extend(pages[start])
+    elif returned and not total:
+      while returned:
+        page = self._browse_children(server, id, len(children), self.BROWSE_PAGE_SIZE, stop)
+        if page is None:
+          return None
+        returned = page[1]
+        children.extend(page[0])
+        if progress:
+          progress(page[0])
+    return children
 
-  def get_Content(self, server, id='0', stop=None):
+  @staticmethod
+  def sort_Children(children, id='0'):
+    containers = list(e for e in children if e['type'].lower() == 'container')
+    numb_exp = lambda t: '.'.join([(t[0].rstrip('0123456789') + t[0][len(t[0].rstrip('0123456789')):].rjust(5,'0')) if ('0' <= t[0][-1:] and t[0][-1:] <= '9') else t[0]] + t[1:2])
+    if id !='0':
+      containers.sort(key=lambda e: (e['class'].lower(), numb_exp(e['title'].lower().rsplit('.', 1)), e['title'].lower()))
+    items = list(e for e in children if e['type'].lower() == 'item')
+    items.sort(key=lambda e: (e['album'].lower() if e['class'].lower() == 'object.item.audioitem' else '', '%10s' % e['track'].lower() if e['class'].lower() == 'object.item.audioitem' else '', e['artist'].lower() if e['class'].lower() == 'object.item.audioitem' else '', numb_exp(e['title'].lower().rsplit('.', 1)), e['title'].lower()))
+    return containers, items
+
+  def get_Content(self, server, id='0', stop=None, progress=None):
     try:
       obj = None
       obj = self.get_Metadata(server, id, stop)
@@ -4028,19 +5677,8 @@ class DLNAClient(DLNAHandler):
         containers = []
         items = [obj]
       else:
-        children = self.get_Children(server, id, stop)
-        containers = list(e for e in children if e['type'].lower() == 'container')
-        numb_exp = lambda t: '.'.join([(t[0].rstrip('0123456789') + t[0][len(t[0].rstrip('0123456789')):].rjust(5,'0')) if ('0' <= t[0][-1:] and t[0][-1:] <= '9') else t[0]] + t[1:2])
-        if id !='0':
-          containers.sort(key=lambda e: e['title'].lower())
-          containers.sort(key=lambda e: numb_exp(e['title'].lower().rsplit('.', 1)))
-          containers.sort(key=lambda e: e['class'].lower())
-        items = list(e for e in children if e['type'].lower() == 'item')
-        items.sort(key=lambda e: e['title'].lower())
-        items.sort(key=lambda e: numb_exp(e['title'].lower().rsplit('.', 1)))
-        items.sort(key=lambda e: e['artist'].lower() if e['class'].lower() == 'object.item.audioitem' else '')
-        items.sort(key=lambda e: '%10s' % e['track'].lower() if e['class'].lower() == 'object.item.audioitem' else '')
-        items.sort(key=lambda e: e['album'].lower() if e['class'].lower() == 'object.item.audioitem' else '')
+        children = self.get_Children(server, id, stop, (lambda page: progress(obj, page)) if progress else None)
+        containers, items = self.sort_Children(children, id)
     except:
       return None
     return [obj, containers, items]
@@ -4156,10 +5794,8 @@ class WebSocketRequestHandler(socketserver.BaseRequestHandler):
 
   @staticmethod
   def XOR32_decode(mask_data):
-    o = len(mask_data) % 4
-    data = mask_data[o:].cast('L')
-    mask = struct.unpack('L', mask_data[o:4].tobytes() + mask_data[0:o].tobytes())[0]
-    return memoryview(array.array('L', map(mask.__xor__, data))).cast('B')[4-o:]
+    l = len(mask_data) - 4
+    return (int.from_bytes(mask_data[4:], 'little') ^ int.from_bytes((mask_data[0:4].tobytes() * (l // 4 + 1))[:l], 'little')).to_bytes(l, 'little')
 
   @classmethod
   def build_frame(cls, type, data):
@@ -5018,32 +6654,28 @@ class DLNAWebInterfaceRequestHandler(server.SimpleHTTPRequestHandler):
             if not server:
               raise
             html_upnp = None
-            if url.params != 'refresh':
-              for c in self.server.Interface.DLNAClientCache:
-                if c[0] == path:
-                  html_upnp = c[1]
-                  break
-            if not html_upnp or url.params == 'refresh':
-              content = self.server.Interface.DLNAClientInstance.get_Content(server, req['id'][0], self.server.Interface.DLNAClientStop)
-              if not content and url.params == 'refresh':
-                for c in self.server.Interface.DLNAClientCache:
-                  if c[0] == path:
-                    c[0] = '/upnp.html?uuid=0&id=0'
-                    c[1] = self.server.Interface.HTML_UPNP_TEMPLATE.replace('##UPNP-VAL##','e').replace('##UPNP-TITLE##','').replace('##UPNP-OBJ##', '').encode('utf-8')
-                    c[2] = []
-                    c[3] = []
-                    break
-              html_upnp = self.server.Interface.HTML_UPNP_TEMPLATE.replace('##UPNP-VAL##','1'if len(content[2]) >= 1 else '0').replace('##UPNP-TITLE##', html.escape(content[0]['title'])).replace('##UPNP-OBJ##', self.server.Interface.build_server_html(req['uuid'][0], content)).encode('utf-8')
-              for c in self.server.Interface.DLNAClientCache:
-                if c[0] == path:
-                  c[1] = html_upnp
-                  c[2] = list(e['uri'] for e in content[2])
-                  c[3] = list({'object.item.videoitem': 'video', 'object.item.audioitem': 'audio', 'object.item.imageitem': 'image'}.get(e['class'].lower(), 'video') for e in content[2])
-                  break
+            if url.params == 'refresh':
+              self.server.Interface.DLNAClientCache.remove(path)
+              browsing = self.server.Interface.DLNAClientBrowsing.get(path)
+              if browsing is not None and browsing[2] is not None:
+                self.server.Interface.DLNAClientBrowsing.pop(path, None)
+              self.server.Interface.browse_server(path, server, req['id'][0])
+              raise
+            cached = self.server.Interface.DLNAClientCache.get(path)
+            if cached:
+              html_upnp = cached[0]
+            else:
+              browsing = self.server.Interface.browse_server(path, server, req['id'][0])
+              browsing[3].wait()
+              if browsing[2] is None:
+                containers, items = DLNAClient.sort_Children(list(browsing[1]), req['id'][0])
+                html_upnp = self.server.Interface.HTML_UPNP_TEMPLATE.replace('##UPNP-VAL##','0').replace('##UPNP-TITLE##', html.escape(browsing[0]['title'])).replace('##UPNP-OBJ##', self.server.Interface.build_server_html(req['uuid'][0], [browsing[0], containers, items]) + '    <p id="upnp_more" style="display:none;"></p>\r\n').encode('utf-8')
               else:
-                self.server.Interface.DLNAClientCache.append([path, html_upnp, list(e['uri'] for e in content[2]), list({'object.item.videoitem': 'video', 'object.item.audioitem': 'audio', 'object.item.imageitem': 'image'}.get(e['class'].lower(), 'video') for e in content[2])])
-              if url.params == 'refresh':
-                raise
+                if self.server.Interface.DLNAClientBrowsing.get(path) is browsing:
+                  del self.server.Interface.DLNAClientBrowsing[path]
+                content = browsing[2]
+                html_upnp = self.server.Interface.HTML_UPNP_TEMPLATE.replace('##UPNP-VAL##','1'if len(content[2]) >= 1 else '0').replace('##UPNP-TITLE##', html.escape(content[0]['title'])).replace('##UPNP-OBJ##', self.server.Interface.build_server_html(req['uuid'][0], content)).encode('utf-8')
+                self.server.Interface.DLNAClientCache.set(path, html_upnp, list(e['uri'] for e in content[2]), list({'object.item.videoitem': 'video', 'object.item.audioitem': 'audio', 'object.item.imageitem': 'image'}.get(e['class'].lower(), 'video') for e in content[2]))
         except:
           html_upnp = self.server.Interface.HTML_UPNP_TEMPLATE.replace('##UPNP-VAL##','e').replace('##UPNP-TITLE##','').replace('##UPNP-OBJ##', '').encode('utf-8')
         self.send_response(HTTPStatus.OK)
@@ -5093,6 +6725,7 @@ class DLNAWebInterfaceRequestHandler(server.SimpleHTTPRequestHandler):
       media_subsrc = ''
       renderer_ind = ''
       renderer = None
+      party = []
       try:
         data = urllib.parse.parse_qs(qs.decode('utf-8'))
         if 'MediaSrc' in data:
@@ -5103,6 +6736,8 @@ class DLNAWebInterfaceRequestHandler(server.SimpleHTTPRequestHandler):
           media_subsrc = data['MediaSubSrc'][0]
         if 'RendererInd' in data:
           renderer = self.server.Interface.DLNAControllerInstance.Renderers[int(data['RendererInd'][0])]
+        if 'PartyInd' in data:
+          party = list(self.server.Interface.DLNAControllerInstance.Renderers[int(ind)] for ind in data['PartyInd'][0].split(',') if ind)
       except:
         pass
       if media_src and renderer:
@@ -5112,6 +6747,7 @@ class DLNAWebInterfaceRequestHandler(server.SimpleHTTPRequestHandler):
           self.server.Interface.Renderer = renderer
           self.server.Interface.Renderer_uuid = renderer.UDN[5:]
           self.server.Interface.Renderer_name = renderer.FriendlyName
+          self.server.Interface.PartyRenderers = list(rend for rend in party if rend != renderer)
           self.server.Interface.MediaSrc = media_src
           self.server.Interface.MediaPosition = media_startfrom
           self.server.Interface.MediaSubSrc = media_subsrc
@@ -5165,6 +6801,156 @@ def _seconds_to_position(seconds):
   return pos
 
 
+class DLNAPositionEstimator:
+
+  SYNC_INTERVAL_MIN = 4
+  SYNC_INTERVAL_MAX = 30
+
+  def __init__(self, controller, renderer):
+    self.Controller = controller
+    self.Renderer = renderer
+    self.Playing = False
+    self.Position = None
+    self.PositionTime = None
+    self.SyncInterval = DLNAPositionEstimator.SYNC_INTERVAL_MIN
+    self.SyncTime = 0
+    self.Duration = 0
+    self.Sampled = False
+
+  def estimate(self):
+    if self.Position is None:
+      return None
+    estimation = self.Position + ((time.monotonic() - self.PositionTime) if self.Playing else 0)
+    return min(estimation, self.Duration) if self.Duration else estimation
+
+  def invalidate(self):
+    self.SyncInterval = DLNAPositionEstimator.SYNC_INTERVAL_MIN
+    self.SyncTime = 0
+
+  def set_playing(self, playing):
+    if playing != self.Playing:
+      self.Position = self.estimate()
+      self.PositionTime = time.monotonic()
+      self.Playing = playing
+    self.invalidate()
+
+  def get(self):
+    self.Sampled = False
+    if self.Position is None or time.monotonic() >= self.SyncTime:
+      try:
+        position = self.Controller.get_Position(self.Renderer).rsplit('.')[0]
+      except:
+        return ''
+      seconds = _position_to_seconds(position)
+      if seconds is None:
+        self.Position = None
+        return position
+      estimation = self.estimate()
+      if estimation is not None and abs(estimation - seconds) <= 1:
+        self.SyncInterval = min(self.SyncInterval * 2, DLNAPositionEstimator.SYNC_INTERVAL_MAX)
+      elif estimation is not None:
+        self.SyncInterval = DLNAPositionEstimator.SYNC_INTERVAL_MIN
+      self.Position = seconds
+      self.PositionTime = time.monotonic()
+      self.SyncTime = self.PositionTime + self.SyncInterval
+      self.Sampled = True
+      return position
+    return _seconds_to_position(int(self.estimate()))
+
+
+class DLNAWebInterfaceContentCache:
+
+  BUDGET = 33554432
+  TTL = 3600
+
+  def __init__(self):
+    self.Entries = {}
+    self.Objects = {}
+    self.Size = 0
+    self.lock = threading.Lock()
+
+  @staticmethod
+  def _object(path):
+    req = urllib.parse.parse_qs(urllib.parse.urlparse(path).query.lower(), keep_blank_values=True)
+    return (req.get('uuid', [''])[0], req.get('id', [''])[0])
+
+  def _store(self, path, entry):
+    self.Entries[path] = entry
+    self.Objects[entry[3]] = path
+    self.Size += entry[4]
+
+  def _discard(self, path):
+    entry = self.Entries.pop(path, None)
+    if entry is not None:
+      self.Size -= entry[4]
+      if self.Objects.get(entry[3]) == path:
+        del self.Objects[entry[3]]
+    return entry
+
+  def get(self, path):
+    with self.lock:
+      entry = self._discard(path)
+      if entry is None or entry[5] < time.monotonic():
+        return None
+      self._store(path, entry)
+      return entry
+
+  def find(self, uuid, obj_id):
+    with self.lock:
+      path = self.Objects.get((uuid.lower(), obj_id.lower()))
+    return None if path is None else self.get(path)
+
+  def set(self, path, html_upnp, uris, kinds):
+    entry = [html_upnp, uris, kinds, self._object(path), len(html_upnp) + sum(len(uri) for uri in uris) + 8 * len(kinds), time.monotonic() + self.TTL]
+    with self.lock:
+      self._discard(path)
+      if entry[4] > self.BUDGET:
+        return
+      self._store(path, entry)
+      while self.Size > self.BUDGET:
+        self._discard(next(iter(self.Entries)))
+
+  def remove(self, path):
+    with self.lock:
+      self._discard(path)
+
+  def invalidate(self, uuid, obj_ids=None):
+    uuid = uuid.lower()
+    with self.lock:
+      for path in list(path for path, entry in self.Entries.items() if entry[3][0] == uuid and (obj_ids is None or entry[3][1] in obj_ids)):
+        self._discard(path)
+
+
+class DLNAWebInterfaceContentWarning:
+
+  def __init__(self, cache, event_listener):
+    self.Cache = cache
+    self.EventListener = event_listener
+    self.UUID = event_listener.Device.UDN[5:]
+    self.SystemUpdateID = None
+    self.Containers = None
+    self.NewSystemUpdateID = None
+
+  def submit(self, seq, prop_name, prop_nvalue):
+    if prop_name == 'ContainerUpdateIDs':
+      self.Containers = prop_nvalue
+    elif prop_name == 'SystemUpdateID':
+      self.NewSystemUpdateID = prop_nvalue
+    return False
+
+  def complete(self, seq):
+    containers = self.Containers
+    system_update_id = self.NewSystemUpdateID
+    self.Containers = None
+    self.NewSystemUpdateID = None
+    if seq and containers:
+      self.Cache.invalidate(self.UUID, containers.lower().split(',')[0::2])
+    elif seq and system_update_id is not None and self.SystemUpdateID is not None and system_update_id != self.SystemUpdateID:
+      self.Cache.invalidate(self.UUID)
+    if system_update_id is not None:
+      self.SystemUpdateID = system_update_id
+
+
 class DLNAWebInterfaceServer:
 
   INTERFACE_NOT_RUNNING = 0
@@ -5214,6 +7000,23 @@ class DLNAWebInterfaceServer:
   '        }\r\n' \
   '        open_link_abs(abs_uri);\r\n' \
   '      }\r\n' \
+  '      function load_more() {\r\n' \
+  '        if (page_loading) {return;}\r\n' \
+  '        fetch(window.location.toString(), {cache: "no-store"}).then(function(response) {return response.text();}).then(function(text) {\r\n' \
+  '          if (page_loading) {return;}\r\n' \
+  '          let page = new DOMParser().parseFromString(text, "text/html");\r\n' \
+  '          document.getElementById("upnp_val").innerHTML = page.getElementById("upnp_val").innerHTML;\r\n' \
+  '          document.getElementById("upnp_obj").innerHTML = page.getElementById("upnp_obj").innerHTML;\r\n' \
+  '          if (document.getElementById("upnp_more")) {\r\n' \
+  '            window.setTimeout(load_more, 1000);\r\n' \
+  '          } else {\r\n' \
+  '            window.parent.upnp_load();\r\n' \
+  '          }\r\n' \
+  '        }).catch(function() {window.setTimeout(load_more, 1000);});\r\n' \
+  '      }\r\n' \
+  '      window.onload = function() {\r\n' \
+  '        if (document.getElementById("upnp_more")) {window.setTimeout(load_more, 1000);}\r\n' \
+  '      }\r\n' \
   '    </script>\r\n' \
   '    <style type="text/css">\r\n' \
   '      a {\r\n' \
@@ -5229,7 +7032,9 @@ class DLNAWebInterfaceServer:
   '  <body style="background-color:rgb(40,45,50,0);color:rgb(225,225,225);font-size:20px;line-height:10px;">\r\n' \
   '    <p id="upnp_val" style="display:none;">##UPNP-VAL##</p>\r\n' \
   '    <p id="upnp_title" style="display:none;">##UPNP-TITLE##</p>\r\n' \
+  '    <div id="upnp_obj">\r\n' \
   '##UPNP-OBJ##' \
+  '    </div>\r\n' \
   '  </body>\r\n' \
   '</html>'
   HTML_START_TEMPLATE = \
@@ -5241,6 +7046,8 @@ class DLNAWebInterfaceServer:
   '    <script>\r\n' \
   '      selected = "";\r\n' \
   '      selected_set = "";\r\n' \
+  '      party = [];\r\n' \
+  '      party_set = [];\r\n' \
   '      upnp_hist = [];\r\n' \
   '      displayed = false;\r\n' \
   '      function new_socket() {\r\n' \
@@ -5286,6 +7093,12 @@ class DLNAWebInterfaceServer:
   '                  let data = [data_name_value[0], data_name_value[1]];\r\n' \
   '                  sel_renderer(data);\r\n' \
   '                }\r\n' \
+  '              } else if (data_list[0] == "command=party") {\r\n' \
+  '                let data_name_value = data_list[1].split("=");\r\n' \
+  '                if (data_name_value.length == 2) {\r\n' \
+  '                  let data = [data_name_value[0], data_name_value[1]];\r\n' \
+  '                  set_party(data);\r\n' \
+  '                }\r\n' \
   '              } else if (data_list[0] == "command=show") {\r\n' \
   '                let data = [];\r\n' \
   '                for (let i=1; i<data_list.length; i++) {\r\n' \
@@ -5313,11 +7126,25 @@ class DLNAWebInterfaceServer:
   '        }\r\n' \
   '      }\r\n' \
   '      function select_renderer(renderer) {\r\n' \
+  '        if (party.indexOf(renderer.id.substring(9)) != -1) {party_renderer(renderer);}\r\n' \
   '        if (selected != "") {document.getElementById("renderer_" + selected).style.color="rgb(225,225,225)";}\r\n' \
   '        renderer.style.color = "rgb(200,250,240)";\r\n' \
   '        selected = renderer.id.substring(9);\r\n' \
   '        document.getElementById("Renderer").value = selected;\r\n' \
   '      }\r\n' \
+  '      function party_renderer(renderer) {\r\n' \
+  '        let renderer_index = renderer.id.substring(9);\r\n' \
+  '        if (renderer_index == selected) {return;}\r\n' \
+  '        let pos = party.indexOf(renderer_index);\r\n' \
+  '        if (pos == -1) {\r\n' \
+  '          party.push(renderer_index);\r\n' \
+  '          renderer.style.color = "rgb(250,220,200)";\r\n' \
+  '        } else {\r\n' \
+  '          party.splice(pos, 1);\r\n' \
+  '          renderer.style.color = "rgb(225,225,225)";\r\n' \
+  '        }\r\n' \
+  '        document.getElementById("Party").value = party.join(",");\r\n' \
+  '      }\r\n' \
   '      function add_renderer(data) {\r\n' \
   '        let renderers = document.getElementById("Renderers");\r\n' \
   '        let renderer_index = "";\r\n' \
@@ -5344,6 +7171,7 @@ class DLNAWebInterfaceServer:
   '          let n_cell = n_row.insertCell();\r\n' \
   '          n_cell.id = "renderer_icon";\r\n' \
   '          n_cell.innerHTML = "<img style=\'height:36px;width:auto;vertical-align:middle;\' src=\'" + renderer_icon + "\' alt=\' \'/>";\r\n' \
+  '          n_cell.onclick = function(event) {event.stopPropagation();party_renderer(this.parentNode);};\r\n' \
   '          n_cell = n_row.insertCell();\r\n' \
   '          n_cell.id = "renderer_name";\r\n' \
   '          n_cell.innerHTML = renderer_name;\r\n' \
@@ -5363,12 +7191,19 @@ class DLNAWebInterfaceServer:
   '        if (data[0] == "index") {\r\n' \
   '          selected_set = data[1];\r\n' \
   '          if (selected == "" && document.getElementById("renderer_" + selected_set).style.display != "none") {\r\n' \
+  '            if (party.indexOf(selected_set) != -1) {party_renderer(document.getElementById("renderer_" + selected_set));}\r\n' \
   '            selected = selected_set;\r\n' \
   '            document.getElementById("renderer_" + selected).style.color = "rgb(200,250,240)";\r\n' \
   '            document.getElementById("Renderer").value = selected;\r\n' \
   '          }\r\n' \
   '        }\r\n' \
   '      }\r\n' \
+  '      function set_party(data) {\r\n' \
+  '        if (data[0] == "index" && party_set.indexOf(data[1]) == -1) {\r\n' \
+  '          party_set.push(data[1]);\r\n' \
+  '          if (party.indexOf(data[1]) == -1 && document.getElementById("renderer_" + data[1]).style.display != "none") {party_renderer(document.getElementById("renderer_" + data[1]));}\r\n' \
+  '        }\r\n' \
+  '      }\r\n' \
   '      function show_renderer(data) {\r\n' \
   '        let renderer_index = "";\r\n' \
   '        let renderer_icon = "";\r\n' \
@@ -5383,14 +7218,17 @@ class DLNAWebInterfaceServer:
   '          document.getElementById("renderer_" + renderer_index).style.display = "table-row";\r\n' \
   '          if (renderer_icon != "") {document.getElementById("renderer_" + renderer_index).cells[0].getElementsByTagName("img").item(0).setAttribute("src", renderer_icon);}\r\n' \
   '          if (selected == "" && selected_set == renderer_index) {\r\n' \
+  '            if (party.indexOf(selected_set) != -1) {party_renderer(document.getElementById("renderer_" + selected_set));}\r\n' \
   '            selected = selected_set;\r\n' \
   '            document.getElementById("renderer_" + selected).style.color = "rgb(200,250,240)";\r\n' \
   '            document.getElementById("Renderer").value = selected;\r\n' \
   '          }\r\n' \
+  '          if (party.indexOf(renderer_index) == -1 && party_set.indexOf(renderer_index) != -1) {party_renderer(document.getElementById("renderer_" + renderer_index));}\r\n' \
   '        }\r\n' \
   '      }\r\n' \
   '      function hide_renderer(data) {\r\n' \
   '        if (data[0] == "index") {\r\n' \
+  '          if (party.indexOf(data[1]) != -1) {party_renderer(document.getElementById("renderer_" + data[1]));}\r\n' \
   '          document.getElementById("renderer_" + data[1]).style.display = "none";\r\n' \
   '          if (selected == data[1]) {\r\n' \
   '            document.getElementById("renderer_" + selected).style.color="rgb(225,225,225)";\r\n' \
@@ -5400,15 +7238,20 @@ class DLNAWebInterfaceServer:
   '        }\r\n' \
   '      }\r\n' \
   '      function reset_button() {\r\n' \
+  '        for (let renderer_index of party.slice()) {party_renderer(document.getElementById("renderer_" + renderer_index));}\r\n' \
   '        if (selected != "") {document.getElementById("renderer_" + selected).style.color="rgb(225,225,225)";}\r\n' \
   '        selected = "";\r\n' \
   '        if (selected_set != "") {\r\n' \
   '          if (document.getElementById("renderer_" + selected_set).style.display != "none") {\r\n' \
   '            document.getElementById("renderer_" + selected_set).style.color="rgb(200,250,240)";\r\n' \
+  '            if (party.indexOf(selected_set) != -1) {party_renderer(document.getElementById("renderer_" + selected_set));}\r\n' \
   '            selected = selected_set;\r\n' \
   '          }\r\n' \
   '        }\r\n' \
   '        document.getElementById("Renderer").value = selected;\r\n' \
+  '        for (let renderer_index of party_set) {\r\n' \
+  '          if (renderer_index != selected && document.getElementById("renderer_" + renderer_index).style.display != "none") {party_renderer(document.getElementById("renderer_" + renderer_index));}\r\n' \
+  '        }\r\n' \
   '        document.getElementById("URL-").value = URL_set;\r\n' \
   '        document.getElementById("StartFrom").value = StartFrom_set;\r\n' \
   '      }\r\n' \
@@ -5618,6 +7461,7 @@ class DLNAWebInterfaceServer:
   '      <label for="StartFrom">{#jplaybackposition#} :</label>\r\n' \
   '      <input type="time" id="StartFrom" name="MediaStartFrom" step="1" value="0##STARTFROM##" style="height:50px;font-size:70%;">\r\n' \
   '      <input type="hidden" id="Renderer" name="RendererInd" value="" required>\r\n' \
+  '      <input type="hidden" id="Party" name="PartyInd" value="">\r\n' \
   '    </form>\r\n' \
   '    <button id="play" style="background-color:rgb(200,250,240);" onclick="play_button()">{#jgoplay#}</button>\r\n' \
   '    <button id="reset" style="background-color:rgb(250,220,200);" onclick="reset_button()">{#jreset#}</button>\r\n' \
@@ -5738,6 +7582,9 @@ class DLNAWebInterfaceServer:
   '                    playlist.options[i].label = pl[i].replace(/ /g,"\xa0");\r\n' \
   '                  }\r\n' \
   '                }\r\n' \
+  '                for (let i=playlist.options.length;i<pl.length;i++) {\r\n' \
+  '                  playlist.options.add(new Option(pl[i].replace(/ /g,"\xa0"), i.toString()));\r\n' \
+  '                }\r\n' \
   '              }\r\n' \
   '            }\r\n' \
   '          } else if (event.data.substring(0,7) == "Current") {\r\n' \
@@ -5874,7 +7721,7 @@ class DLNAWebInterfaceServer:
   '</html>'
   HTML_CONTROL_TEMPLATE = HTML_CONTROL_TEMPLATE.replace('{', '{{').replace('}', '}}').replace('{{#', '{').replace('#}}', '}').format_map(LSTRINGS['webinterface']).replace('{{', '{').replace('}}', '}')
 
-  def __init__(self, DLNAWebInterfaceServerAddress=None, DLNAJoinIp=None, Launch=INTERFACE_NOT_RUNNING, Renderer_uuid=None, Renderer_name=None, MediaServerMode=None, MediaSrc='', MediaStartFrom='0:00:00', MediaBufferBlocSize=1048576, MediaBufferSize=75, MediaBufferAhead=25, MediaMuxContainer=None, OnReadyPlay=False, MediaSubSrc='', MediaSubLang=None, SlideshowDuration=None, EndLess=False, verbosity=0):
+  def __init__(self, DLNAWebInterfaceServerAddress=None, DLNAJoinIp=None, Launch=INTERFACE_NOT_RUNNING, Renderer_uuid=None, Renderer_name=None, MediaServerMode=None, MediaSrc='', MediaStartFrom='0:00:00', MediaBufferBlocSize=1048576, MediaBufferSize=75, MediaBufferAhead=25, MediaBufferRequests=1, MediaBufferConnections=None, MediaBufferSpill=0, MediaBufferPin=0, MediaServerEngine=MediaServer.ENGINE_THREADING, MediaMuxContainer=None, OnReadyPlay=False, MediaSubSrc='', MediaSubLang=None, SlideshowDuration=None, EndLess=False, verbosity=0):
     self.verbosity = verbosity
     self.logger = log_event('webinterface', verbosity)
     if not DLNAWebInterfaceServerAddress:
@@ -5905,6 +7752,7 @@ class DLNAWebInterfaceServer:
     self.Renderer_name = Renderer_name
     self.Renderer = None
     self.RendererNotFound = False
+    self.PartyRenderers = []
     self.MediaServerInstance = None
     self.MediaSrc = MediaSrc
     if MediaStartFrom:
@@ -5917,6 +7765,11 @@ class DLNAWebInterfaceServer:
     self.MediaBufferBlocSize = MediaBufferBlocSize
     self.MediaBufferSize = MediaBufferSize
     self.MediaBufferAhead = MediaBufferAhead
+    self.MediaBufferRequests = MediaBufferRequests
+    self.MediaBufferConnections = MediaBufferConnections
+    self.MediaBufferSpill = MediaBufferSpill
+    self.MediaBufferPin = MediaBufferPin
+    self.MediaServerEngine = MediaServerEngine
     self.MediaMuxContainer = MediaMuxContainer
     self.OnReadyPlay = OnReadyPlay
     self.MediaSubSrc = MediaSubSrc
@@ -5938,7 +7791,11 @@ class DLNAWebInterfaceServer:
     if not mimetypes.inited:
       mimetypes.init()
     self.DLNAClientInstance = DLNAClient(DLNAJoinIp, verbosity)
-    self.DLNAClientCache = []
+    self.DLNAClientCache = DLNAWebInterfaceContentCache()
+    self.DLNAClientBrowsing = {}
+    self.DLNAClientNotificationListener = None
+    self.DLNAClientSubscriptions = {}
+    self.DLNAClientSubscriptionsLock = threading.Lock()
     self.DLNAClientStop = threading.Event()
     if Launch == DLNAWebInterfaceServer.INTERFACE_DISPLAY_RENDERERS:
       self.DLNAAdvertisementListenerInstance = DLNAAdvertisementListener((self.DLNAControllerInstance,), verbosity)
@@ -5947,6 +7804,7 @@ class DLNAWebInterfaceServer:
     self.WebServerReady = threading.Event()
 
   def _discover_servers(self):
+    self.DLNAClientInstance.restore_devices(self.RenderersEvent)
     self.DLNAClientInstance.discover(timeout=3, alive_persistence=86400, from_polling=True).join()
     if self.DLNAClientInstance.is_discovery_polling_running:
       self.DLNAClientInstance.discover(timeout=5, alive_persistence=15, from_polling=True)
@@ -5978,6 +7836,74 @@ class DLNAWebInterfaceServer:
       html_bloc = html_bloc + '    <p>' + (('<a href="javascript:open_link(\'' +  urllib.parse.quote(urllib.parse.urlencode({'id': e['id']}, quote_via=urllib.parse.quote)) + '\')">') if content[0]['type'] == 'container' else '') + ('%s%s%s%s</a></p>\r\n' % (html.escape(e['album'] + ' - ') if e['album'] and e['class'].lower() == 'object.item.audioitem' else '', html.escape(e['track'] + ' - ') if e['track'] and e['track'] != '0' and e['class'].lower() == 'object.item.audioitem' else '', html.escape(e['artist'] + ' - ') if e['artist'] and e['class'].lower() == 'object.item.audioitem' else '', html.escape(e['title'])))
     return html_bloc
 
+  def _browse_progress(self, browsing, obj, page):
+    browsing[0] = obj
+    browsing[1].extend(page)
+    browsing[3].set()
+
+  def _browse_server(self, browsing, server, obj_id):
+    browsing[2] = self.DLNAClientInstance.get_Content(server, obj_id, self.DLNAClientStop, partial(self._browse_progress, browsing)) or False
+    browsing[3].set()
+    self.watch_server(server)
+
+  def watch_server(self, server):
+    with self.DLNAClientSubscriptionsLock:
+      if self.shutdown_requested:
+        return
+      subscription = self.DLNAClientSubscriptions.get(server.UDN)
+      if subscription is not None and time.monotonic() < subscription[1]:
+        return
+      self.DLNAClientSubscriptions[server.UDN] = [None, time.monotonic() + self.DLNAClientCache.TTL]
+      if self.DLNAClientNotificationListener is None:
+        self.DLNAClientNotificationListener = DLNAEventNotificationListener(self.DLNAClientInstance, self.DLNAWebInterfaceServerAddress[1]+6)
+        self.DLNAClientNotificationListener.start()
+    if subscription is not None and subscription[0] is not None:
+      if self.DLNAClientInstance.renew_event_subscription(subscription[0], 36000):
+        self.DLNAClientSubscriptions[server.UDN] = [subscription[0], time.monotonic() + 18000]
+        return
+      self.DLNAClientInstance.send_event_unsubscription(subscription[0])
+      self.DLNAClientCache.invalidate(server.UDN[5:])
+    event_listener = self.DLNAClientInstance.new_event_subscription(server, 'ContentDirectory', self.DLNAClientNotificationListener)
+    if event_listener:
+      event_listener.Warnings.append(DLNAWebInterfaceContentWarning(self.DLNAClientCache, event_listener))
+      if self.DLNAClientInstance.send_event_subscription(event_listener, 36000):
+        self.DLNAClientSubscriptions[server.UDN] = [event_listener, time.monotonic() + 18000]
+
+  def unwatch_servers(self):
+    with self.DLNAClientSubscriptionsLock:
+      subscriptions = self.DLNAClientSubscriptions
+      self.DLNAClientSubscriptions = {}
+      notification_listener = self.DLNAClientNotificationListener
+      self.DLNAClientNotificationListener = None
+    for subscription in subscriptions.values():
+      if subscription[0] is not None:
+        self.DLNAClientInstance.send_event_unsubscription(subscription[0])
+    if notification_listener is not None:
+      notification_listener.stop()
+
+  def browse_server(self, path, server, obj_id):
+    browsing = [None, [], None, threading.Event()]
+    if self.DLNAClientBrowsing.setdefault(path, browsing) is browsing:
+      threading.Thread(target=self._browse_server, args=(browsing, server, obj_id), daemon=True).start()
+    return self.DLNAClientBrowsing[path]
+
+  def _party_send_command(self, command, renderer, *args, **kwargs):
+    try:
+      getattr(self.DLNAControllerInstance, command)(renderer, *args, **kwargs)
+    except:
+      pass
+
+  def _party_send(self, party, command, renderer, *args, **kwargs):
+    threads = []
+    for rend in party:
+      threads.append(threading.Thread(target=self._party_send_command, args=(command, rend, *args), kwargs=kwargs, daemon=True))
+      threads[-1].start()
+    try:
+      return getattr(self.DLNAControllerInstance, command)(renderer, *args, **kwargs)
+    finally:
+      for thread in threads:
+        thread.join()
+
   def manage_start(self):
     if self.shutdown_requested:
       return
@@ -5994,6 +7920,7 @@ class DLNAWebInterfaceServer:
     self.DLNAControllerInstance.start_discovery_polling(timeout=5, alive_persistence=45, polling_period=30, DiscoveryEvent=self.RenderersEvent)
     self.WebSocketServerInstance.open('start', self.RenderersDataStore)
     self.DLNAClientStop.clear()
+    self.DLNAClientBrowsing = {}
     self.html_ready = True
     rend_stat = []
     first_loop = True
@@ -6009,6 +7936,8 @@ class DLNAWebInterfaceServer:
           if ind == len(rend_stat):
             rend_stat.append(status)
             self.RenderersDataStore.Message = urllib.parse.urlencode({'command': 'add', 'index': str(ind), 'name': html.escape(renderer.FriendlyName), 'ip': renderer.Ip, 'icon': '/icon%d' % ind, 'status': status}, quote_via=urllib.parse.quote)
+            if renderer in self.PartyRenderers:
+              self.RenderersDataStore.Message = urllib.parse.urlencode({'command': 'party', 'index': str(ind)}, quote_via=urllib.parse.quote)
             if self.Renderer:
               if renderer == self.Renderer:
                 self.RenderersDataStore.Message = urllib.parse.urlencode({'command': 'sel', 'index': str(ind)}, quote_via=urllib.parse.quote)
@@ -6041,6 +7970,35 @@ class DLNAWebInterfaceServer:
     self.WebSocketServerInstance.close('start')
     self.RenderersDataStore = None
 
+  def _feed_playlist(self, playlist_feed, stop, lock, playlist, titles, order):
+    control_data_store = self.ControlDataStore
+    update = time.monotonic() + 1
+    for p_t in playlist_feed:
+      with lock:
+        playlist.append(p_t[0])
+        titles.append(p_t[1])
+        order.append(len(order))
+      if time.monotonic() >= update:
+        control_data_store.Playlist = titles
+        update = time.monotonic() + max(1, len(titles) / 1000)
+    if not stop.is_set():
+      control_data_store.Playlist = titles
+      self.logger.log(1, 'playlist', self.MediaSrc, len(playlist))
+
+  def _resolve_ahead(self, media_resolver, lock, playlist, order, nind, wrap):
+    entries = []
+    with lock:
+      for i in range(min(MediaResolver.AHEAD, len(order))):
+        if nind >= len(order):
+          if not wrap:
+            break
+          nind = 0
+        nmedia_src = playlist[order[nind]]
+        if r'://' in nmedia_src:
+          entries.append((nmedia_src, 'ContentURL' if self.MediaSrc[:7].lower()=='upnp://' else None, nmedia_src if self.MediaSubSrc == self.MediaSrc else '', 'ContentURL' if self.MediaSrc[:7].lower()=='upnp://' else None))
+        nind += 1
+    media_resolver.update(entries)
+
   def manage_control(self):
     if self.shutdown_requested or self.Status != DLNAWebInterfaceServer.INTERFACE_CONTROL:
       return
@@ -6051,6 +8009,7 @@ class DLNAWebInterfaceServer:
     renderer = self.Renderer or self.DLNAControllerInstance.search(uuid=self.Renderer_uuid, name=self.Renderer_name, complete=True)
     if not renderer:
       self.DLNAControllerInstance.is_discovery_polling_running = True
+      self.DLNAControllerInstance.restore_devices(self.RenderersEvent)
       nb_search = 0
       start_time = time.monotonic()
       elapsed_time = 0
@@ -6074,12 +8033,20 @@ class DLNAWebInterfaceServer:
       self.logger.log(2, 'controlinterrupt')
       return
     try:
-      renderer_hip = self.DLNAControllerInstance.Hips[self.DLNAControllerInstance.Renderers.index(renderer)]
+      renderer_hip = self.DLNAControllerInstance.Registry.hip(renderer)
     except:
       self.RendererNotFound = False
       self.logger.log(2, 'controlinterrupt')
       return
     self.logger.log(1, 'controlrenderer', renderer.FriendlyName, renderer_hip)
+    party = []
+    for rend in self.PartyRenderers:
+      try:
+        if rend != renderer and rend.StatusAlive and self.DLNAControllerInstance.Registry.hip(rend) == renderer_hip:
+          party.append(rend)
+          self.logger.log(1, 'controlparty', rend.FriendlyName)
+      except:
+        pass
     renderer_icon = b''
     if renderer.IconURL:
       try:
@@ -6091,18 +8058,20 @@ class DLNAWebInterfaceServer:
         pass
     gapless = self.Gapless
     if gapless:
-      serv = next((serv for serv in self.Renderer.Services if serv.Id == 'urn:upnp-org:serviceId:AVTransport'), None)
-      if serv:
-        gapless = next((act for act in serv.Actions if act.Name == 'SetNextAVTransportURI'), None) is not None
-      else:
-        gapless = None
-      if not gapless:
-        self.logger.log(0, 'nonegapless', self.Renderer.FriendlyName)
-    self.html_control = DLNAWebInterfaceServer.HTML_CONTROL_TEMPLATE.replace('##START-URL##', '/start.html').replace('##URL##', html.escape(self.MediaSrc) + ('<br>' + html.escape(self.MediaSubSrc) if self.MediaSubSrc else '')).replace('##RENDERERNAME##', html.escape(renderer.FriendlyName)).encode('utf-8').replace(b'##RENDERERICON##', renderer_icon)
+      for rend in (self.Renderer, *party):
+        serv = next((serv for serv in rend.Services if serv.Id == 'urn:upnp-org:serviceId:AVTransport'), None)
+        if serv:
+          gapless = next((act for act in serv.Actions if act.Name == 'SetNextAVTransportURI'), None) is not None
+        else:
+          gapless = None
+        if not gapless:
+          self.logger.log(0, 'nonegapless', rend.FriendlyName)
+          break
+    self.html_control = DLNAWebInterfaceServer.HTML_CONTROL_TEMPLATE.replace('##START-URL##', '/start.html').replace('##URL##', html.escape(self.MediaSrc) + ('<br>' + html.escape(self.MediaSubSrc) if self.MediaSubSrc else '')).replace('##RENDERERNAME##', html.escape(' + '.join(rend.FriendlyName for rend in (renderer, *party)))).encode('utf-8').replace(b'##RENDERERICON##', renderer_icon)
     self.WebSocketServerInstance.open('control', self.ControlDataStore)
     self.html_ready = True
     try:
-      self.DLNAControllerInstance.send_Stop(renderer)
+      self._party_send(party, 'send_Stop', renderer)
     except:
       pass
     event_notification_listener = DLNAEventNotificationListener(self.DLNAControllerInstance, self.DLNAWebInterfaceServerAddress[1]+2)
@@ -6157,14 +8126,12 @@ class DLNAWebInterfaceServer:
       try:
         obj_uuid = self.MediaSrc[7:].partition('?')[0]
         obj_id = self.MediaSrc[7:].partition('?')[2]
-        for c in self.DLNAClientCache:
-          req = urllib.parse.parse_qs(urllib.parse.urlparse(c[0]).query.lower())
-          if req.get('uuid')[0] == obj_uuid.lower() and req.get('id')[0] == obj_id.lower():
-            playlist = c[2]
-            titles = list(html.unescape(l.split('</')[0].rsplit('>', 1)[1]) for l in c[1].decode('utf-8').splitlines() if l.lstrip()[:3] == '<p>')
-            del titles[0:len(titles) - len(playlist)]
-            mediakinds = c[3]
-            break
+        cached = self.DLNAClientCache.find(obj_uuid, obj_id)
+        if cached:
+          playlist = cached[1]
+          titles = list(html.unescape(l.split('</')[0].rsplit('>', 1)[1]) for l in cached[0].decode('utf-8').splitlines() if l.lstrip()[:3] == '<p>')
+          del titles[0:len(titles) - len(playlist)]
+          mediakinds = cached[2]
         if playlist is None:
           server = self.DLNAClientInstance.search(uuid=obj_uuid)
           if not server:
@@ -6183,15 +8150,32 @@ class DLNAWebInterfaceServer:
         playlist = []
         titles = []
         mediakinds = []
+    playlist_feed = None
+    playlist_feeder = None
+    media_resolver = None
+    playlist_feed_stop = threading.Event()
+    playlist_lock = threading.Lock()
     if playlist is None:
-      playlist, titles = MediaProvider.parse_playlist(self.MediaSrc, True, self.ControlDataStore.IncomingEvent)
+      if not gapless and MediaProvider.is_local_playlist(self.MediaSrc):
+        playlist_feed = MediaProvider.iter_playlist(self.MediaSrc, playlist_feed_stop)
+        p_t = next(playlist_feed, None)
+        playlist = [p_t[0]] if p_t else []
+        titles = [p_t[1]] if p_t else []
+      else:
+        playlist, titles = MediaProvider.parse_playlist(self.MediaSrc, True, self.ControlDataStore.IncomingEvent)
     self.ControlDataStore.IncomingEvent = incoming_event
     if playlist != False:
       if playlist:
-        self.logger.log(1, 'playlist', self.MediaSrc, len(playlist))
+        if playlist_feed is None:
+          self.logger.log(1, 'playlist', self.MediaSrc, len(playlist))
         self.ControlDataStore.Playlist = titles
         random.seed()
         order = list(range(len(playlist)))
+        if playlist_feed is not None:
+          playlist_feeder = threading.Thread(target=self._feed_playlist, args=(playlist_feed, playlist_feed_stop, playlist_lock, playlist, titles, order), daemon=True)
+          playlist_feeder.start()
+        if self.MediaServerMode != DLNAWebInterfaceServer.SERVER_MODE_NONE:
+          media_resolver = MediaResolver(self.MediaServerMode, self.MediaMuxContainer, self.MediaSubLang, renderer.FriendlyName)
       else:
         self.logger.log(0, 'nocontent', self.MediaSrc)
       if self.SlideshowDuration:
@@ -6246,13 +8230,40 @@ class DLNAWebInterfaceServer:
     self.NextMediaServerInstance = None
     incoming_event_setter = partial(self.ControlDataStore.__setattr__, 'IncomingEvent')
     check_renderer = False
-    while (ind < (len(playlist) - 1 if playlist != False else 0)) or jump_ind is not None or self.ControlDataStore.Shuffle or self.EndLess:
+    while (ind < (len(order) - 1 if playlist != False else 0)) or (playlist_feeder is not None and playlist_feeder.is_alive()) or jump_ind is not None or self.ControlDataStore.Shuffle or self.EndLess:
       if self.shutdown_requested or playlist_stop:
         break
       if jump_ind is None:
+        while playlist_feeder is not None and ind >= len(order) - 1 and playlist_feeder.is_alive() and not self.shutdown_requested and not playlist_stop and jump_ind is None:
+          if self.ControlDataStore.wait_for_incoming_event(0.5):
+            wi_cmd = self.ControlDataStore.Command
+            while wi_cmd is not None and not playlist_stop and jump_ind is None:
+              if wi_cmd == 'Arrêt':
+                playlist_stop = True
+              elif wi_cmd[:4] == 'Jump' and wi_cmd[5:].isdecimal() and 0 < int(wi_cmd[5:]) <= len(order):
+                jump_ind = int(wi_cmd[5:]) - 1
+                if media_resolver:
+                  media_resolver.update([])
+              elif wi_cmd == 'Shuffle':
+                with playlist_lock:
+                  if self.ControlDataStore.Shuffle:
+                    ind = order[ind]
+                    order[:] = range(len(order))
+                  else:
+                    random.shuffle(order)
+                    ind = -1
+                self.ControlDataStore.Shuffle = not self.ControlDataStore.Shuffle
+                if media_resolver:
+                  self._resolve_ahead(media_resolver, playlist_lock, playlist, order, ind + 1, self.EndLess or self.ControlDataStore.Shuffle)
+              wi_cmd = self.ControlDataStore.Command
+        if self.shutdown_requested or playlist_stop:
+          break
+      if jump_ind is None:
+        if playlist and ind >= len(order) - 1 and not (self.ControlDataStore.Shuffle or self.EndLess):
+          break
         ind += 1
         if playlist:
-          if ind == len(playlist):
+          if ind == len(order):
             ind = 0
         elif self.EndLess:
           ind = 0
@@ -6304,7 +8315,7 @@ class DLNAWebInterfaceServer:
         restart_from = None
       if prev_media_kind == 'image' and media_kind != 'image':
         try:
-          self.DLNAControllerInstance.send_Stop(renderer)
+          self._party_send(party, 'send_Stop', renderer)
         except:
           pass
       self.MediaServerInstance = None
@@ -6327,7 +8338,7 @@ class DLNAWebInterfaceServer:
           else:
             nind = None
         if not self.MediaServerInstance:
-          self.MediaServerInstance = MediaServer(self.MediaServerMode, (renderer_hip, self.DLNAWebInterfaceServerAddress[1]+3), media_src, MediaSrcType=('ContentURL' if self.MediaSrc[:7].lower()=='upnp://' else None), MediaStartFrom=media_start_from, MediaBufferBlocSize=self.MediaBufferBlocSize, MediaBufferSize=self.MediaBufferSize, MediaBufferAhead=self.MediaBufferAhead, MediaMuxContainer=self.MediaMuxContainer, MediaSubSrc=media_sub_src, MediaSubSrcType='ContentURL' if self.MediaSrc[:7].lower()=='upnp://' else None, MediaSubLang=self.MediaSubLang, MediaProcessProfile=renderer.FriendlyName, verbosity=self.verbosity, auth_ip=(renderer.Ip, *self.DLNAControllerInstance.ips))
+          self.MediaServerInstance = MediaServer(self.MediaServerMode, (renderer_hip, self.DLNAWebInterfaceServerAddress[1]+3), media_src, MediaSrcType=('ContentURL' if self.MediaSrc[:7].lower()=='upnp://' else None), MediaStartFrom=media_start_from, MediaBufferBlocSize=self.MediaBufferBlocSize, MediaBufferSize=self.MediaBufferSize, MediaBufferAhead=self.MediaBufferAhead, MediaMuxContainer=self.MediaMuxContainer, MediaSubSrc=media_sub_src, MediaSubSrcType='ContentURL' if self.MediaSrc[:7].lower()=='upnp://' else None, MediaSubLang=self.MediaSubLang, MediaProcessProfile=renderer.FriendlyName, verbosity=self.verbosity, auth_ip=(renderer.Ip, *(rend.Ip for rend in party), *self.DLNAControllerInstance.ips), MediaBufferRequests=self.MediaBufferRequests, MediaBufferConnections=self.MediaBufferConnections, MediaBufferSpill=self.MediaBufferSpill, MediaBufferPin=self.MediaBufferPin, MediaServerEngine=self.MediaServerEngine)
           self.MediaServerInstance.start()
         if not self.shutdown_requested:
           prep_success = self.MediaServerInstance.wait(InterruptSetter=incoming_event_setter)
@@ -6355,15 +8366,15 @@ class DLNAWebInterfaceServer:
               accept_ranges = self.MediaServerInstance.MediaProviderInstance.AcceptRanges
               try:
                 if accept_ranges:
-                  prep_success = self.DLNAControllerInstance.send_Local_URI(self.Renderer, 'http://%s:%s/media%s' % (*self.MediaServerInstance.MediaServerAddress, self.MediaServerInstance.MediaProviderInstance.MediaFeedExt), media_title, kind=media_kind, suburi=suburi, stop=self.ControlDataStore.IncomingEvent)
+                  prep_success = self._party_send(party, 'send_Local_URI', self.Renderer, 'http://%s:%s/media%s' % (*self.MediaServerInstance.MediaServerAddress, self.MediaServerInstance.MediaProviderInstance.MediaFeedExt), media_title, kind=media_kind, suburi=suburi, stop=self.ControlDataStore.IncomingEvent)
                 else:
-                  prep_success = self.DLNAControllerInstance.send_URI(self.Renderer, 'http://%s:%s/media%s' % (*self.MediaServerInstance.MediaServerAddress, self.MediaServerInstance.MediaProviderInstance.MediaFeedExt), media_title, kind=media_kind, suburi=suburi)
+                  prep_success = self._party_send(party, 'send_URI', self.Renderer, 'http://%s:%s/media%s' % (*self.MediaServerInstance.MediaServerAddress, self.MediaServerInstance.MediaProviderInstance.MediaFeedExt), media_title, kind=media_kind, suburi=suburi)
               except:
                 prep_success = False
             elif server_mode == MediaProvider.SERVER_MODE_SEQUENTIAL and not self.shutdown_requested:
               accept_ranges = False
               try:
-                prep_success = self.DLNAControllerInstance.send_URI(self.Renderer, 'http://%s:%s/media%s' % (*self.MediaServerInstance.MediaServerAddress, self.MediaServerInstance.MediaProviderInstance.MediaFeedExt), media_title, kind=media_kind, suburi=suburi)
+                prep_success = self._party_send(party, 'send_URI', self.Renderer, 'http://%s:%s/media%s' % (*self.MediaServerInstance.MediaServerAddress, self.MediaServerInstance.MediaProviderInstance.MediaFeedExt), media_title, kind=media_kind, suburi=suburi)
               except:
                 prep_success = False
             else:
@@ -6384,8 +8395,19 @@ class DLNAWebInterfaceServer:
                   nmedia_sub_src = nmedia_src if self.MediaSubSrc == self.MediaSrc else ''
               else:
                 nmedia_sub_src = self.MediaSubSrc
-              self.NextMediaServerInstance = MediaServer(self.MediaServerMode, (renderer_hip, self.DLNAWebInterfaceServerAddress[1]+(self.MediaServerInstance.MediaServerAddress[1]-self.DLNAWebInterfaceServerAddress[1])%4+2), nmedia_src, MediaSrcType=('ContentURL' if self.MediaSrc[:7].lower()=='upnp://' else None), MediaStartFrom='0:00:00', MediaBufferBlocSize=self.MediaBufferBlocSize, MediaBufferSize=self.MediaBufferSize, MediaBufferAhead=self.MediaBufferAhead, MediaMuxContainer=self.MediaMuxContainer, MediaSubSrc=nmedia_sub_src, MediaSubSrcType='ContentURL' if self.MediaSrc[:7].lower()=='upnp://' else None, MediaSubLang=self.MediaSubLang, MediaProcessProfile=renderer.FriendlyName, verbosity=self.verbosity, auth_ip=(renderer.Ip, *self.DLNAControllerInstance.ips))
+              self.NextMediaServerInstance = MediaServer(self.MediaServerMode, (renderer_hip, self.DLNAWebInterfaceServerAddress[1]+(self.MediaServerInstance.MediaServerAddress[1]-self.DLNAWebInterfaceServerAddress[1])%4+2), nmedia_src, MediaSrcType=('ContentURL' if self.MediaSrc[:7].lower()=='upnp://' else None), MediaStartFrom='0:00:00', MediaBufferBlocSize=self.MediaBufferBlocSize, MediaBufferSize=self.MediaBufferSize, MediaBufferAhead=self.MediaBufferAhead, MediaMuxContainer=self.MediaMuxContainer, MediaSubSrc=nmedia_sub_src, MediaSubSrcType='ContentURL' if self.MediaSrc[:7].lower()=='upnp://' else None, MediaSubLang=self.MediaSubLang, MediaProcessProfile=renderer.FriendlyName, verbosity=self.verbosity, auth_ip=(renderer.Ip, *(rend.Ip for rend in party), *self.DLNAControllerInstance.ips), MediaBufferRequests=self.MediaBufferRequests, MediaBufferConnections=self.MediaBufferConnections, MediaBufferSpill=self.MediaBufferSpill, MediaBufferPin=self.MediaBufferPin, MediaServerEngine=self.MediaServerEngine)
               self.NextMediaServerInstance.start()
+          elif playlist and server_mode == MediaProvider.SERVER_MODE_SEQUENTIAL and self.MediaServerInstance.MediaProviderInstance.MediaMuxAlways and MediaProvider.FFMPEG_PIPE:
+            with playlist_lock:
+              nind = ind + 1
+              if nind == len(order):
+                nind = 0 if self.EndLess or self.ControlDataStore.Shuffle else None
+              nmedia_src = playlist[order[nind]] if nind is not None else None
+            if nmedia_src and (mimetypes.guess_type(nmedia_src.rsplit('?',1)[0])[0] or '')[0:5] != 'image':
+              if ('ContentURL' if self.MediaSrc[:7].lower() == 'upnp://' else MediaProvider.guess_src_type(nmedia_src)) in ('ContentPath', 'ContentURL'):
+                MediaProvider.prepare_FFmpeg(nmedia_src, self.MediaServerInstance.MediaProviderInstance.MediaMuxContainer, renderer.FriendlyName)
+          if media_resolver:
+            self._resolve_ahead(media_resolver, playlist_lock, playlist, order, ind + 1, self.EndLess or self.ControlDataStore.Shuffle)
       else:
         suburi = media_sub_src
         server_mode = DLNAWebInterfaceServer.SERVER_MODE_NONE
@@ -6407,9 +8429,9 @@ class DLNAWebInterfaceServer:
         self.ControlDataStore.IncomingEvent = spare_event
         try:
           if (media_ip == '' or renderer_hip == media_ip) and not self.shutdown_requested:
-            prep_success = self.DLNAControllerInstance.send_Local_URI(self.Renderer, media_src, media_title, kind=media_kind, suburi=suburi)
+            prep_success = self._party_send(party, 'send_Local_URI', self.Renderer, media_src, media_title, kind=media_kind, suburi=suburi)
           elif not self.shutdown_requested:
-            prep_success = self.DLNAControllerInstance.send_URI(self.Renderer, media_src, media_title, kind=media_kind, suburi=suburi)
+            prep_success = self._party_send(party, 'send_URI', self.Renderer, media_src, media_title, kind=media_kind, suburi=suburi)
           else:
             prep_success = False
         except:
@@ -6427,6 +8449,8 @@ class DLNAWebInterfaceServer:
         elif (wi_cmd or '')[:4] == 'Jump' and playlist:
           if wi_cmd[5:].isdecimal():
             jump_ind = int(wi_cmd[5:]) - 1
+            if media_resolver:
+              media_resolver.update([])
           prep_success = False
       if playlist:
         self.ControlDataStore.Current = order[ind]
@@ -6452,7 +8476,7 @@ class DLNAWebInterfaceServer:
           self.ControlDataStore = None
           self.DLNAControllerInstance.send_event_unsubscription(event_listener)
           try:
-            self.DLNAControllerInstance.send_Stop(renderer)
+            self._party_send(party, 'send_Stop', renderer)
           except:
             pass
           if event_listener_rc:
@@ -6540,10 +8564,14 @@ class DLNAWebInterfaceServer:
           self.ControlDataStore.Mute = tv
       redo_seek = None
       check_renderer = False
+      position_estimator = DLNAPositionEstimator(self.DLNAControllerInstance, renderer)
+      position_estimator.set_playing(old_value == 'PLAYING')
       while not self.shutdown_requested and new_value != 'STOPPED':
         new_value = self.DLNAControllerInstance.wait_for_warning(warning, 10 if is_paused else 1)
         if self.shutdown_requested:
           break
+        if new_value:
+          position_estimator.set_playing(new_value == 'PLAYING')
         if server_mode in (MediaProvider.SERVER_MODE_RANDOM, DLNAWebInterfaceServer.SERVER_MODE_NONE) and accept_ranges:
           if old_value and media_kind != 'image':
             new_duration = warning_d.fresh()
@@ -6551,9 +8579,10 @@ class DLNAWebInterfaceServer:
               if _position_to_seconds(new_duration):
                 self.ControlDataStore.Duration = str(_position_to_seconds(new_duration))
         try:
-          renderer_new_position = self.DLNAControllerInstance.get_Position(renderer).rsplit('.')[0]
+          position_estimator.Duration = int(self.ControlDataStore.Duration)
         except:
-          renderer_new_position = ''
+          position_estimator.Duration = 0
+        renderer_new_position = position_estimator.get()
         if media_kind != 'image' and renderer_new_position:
           if server_mode in (MediaProvider.SERVER_MODE_RANDOM, DLNAWebInterfaceServer.SERVER_MODE_NONE) and _position_to_seconds(renderer_new_position) == 0 and _position_to_seconds(renderer_position) != 0:
             if not renderer_stopped_position:
@@ -6565,8 +8594,8 @@ class DLNAWebInterfaceServer:
                 renderer_position = renderer_new_position
           else:
             renderer_position = renderer_new_position
-          if _position_to_seconds(renderer_position) > _position_to_seconds(max_renderer_position):
-            max_renderer_position = renderer_position
+          if position_estimator.Sampled and _position_to_seconds(renderer_new_position) > _position_to_seconds(max_renderer_position):
+            max_renderer_position = renderer_new_position
         if media_kind != 'image' and accept_ranges and self.ControlDataStore.Duration == '0' and ((new_value and not old_value) or gapless_status in (0, 1)) and renderer_new_position:
           try:
             new_duration = self.DLNAControllerInstance.get_Duration(self.Renderer)
@@ -6593,14 +8622,14 @@ class DLNAWebInterfaceServer:
             if renderer_stopped_position:
               if accept_ranges:
                 try:
-                  self.DLNAControllerInstance.send_Seek(renderer, renderer_stopped_position)
+                  self._party_send(party, 'send_Seek', renderer, renderer_stopped_position)
                 except:
                   pass
               renderer_stopped_position = None
               redo_seek = None
             elif redo_seek:
               try:
-                self.DLNAControllerInstance.send_Seek(renderer, redo_seek)
+                self._party_send(party, 'send_Seek', renderer, redo_seek)
               except:
                 pass
               redo_seek = None
@@ -6641,7 +8670,7 @@ class DLNAWebInterfaceServer:
                 renderer_stopped_position = renderer_position
                 if media_kind != 'image':
                   try:
-                    self.DLNAControllerInstance.send_Seek(renderer, '0:00:00')
+                    self._party_send(party, 'send_Seek', renderer, '0:00:00')
                   except:
                     pass
             if media_kind == 'image':
@@ -6660,6 +8689,8 @@ class DLNAWebInterfaceServer:
                 pass
           if not wi_cmd:
             wi_cmd = self.ControlDataStore.Command
+          if wi_cmd:
+            position_estimator.invalidate()
           if wi_cmd == 'Lecture':
             try:
               if server_mode == MediaProvider.SERVER_MODE_RANDOM:
@@ -6673,7 +8704,7 @@ class DLNAWebInterfaceServer:
                     media_type = self.MediaServerInstance.MediaProviderInstance.MediaSrcType.replace('WebPageURL', 'ContentURL')
                     media_sub = self.MediaServerInstance.MediaSubBufferInstance
                     server_address = self.MediaServerInstance.MediaServerAddress
-                    self.MediaServerInstance = MediaServer(MediaProvider.SERVER_MODE_RANDOM, server_address, media_feed, MediaSrcType=media_type, MediaStartFrom='', MediaBufferBlocSize=self.MediaBufferBlocSize, MediaBufferSize=self.MediaBufferSize, MediaBufferAhead=self.MediaBufferAhead, MediaSubBuffer=media_sub, verbosity=self.verbosity, auth_ip=(renderer.Ip, *self.DLNAControllerInstance.ips))
+                    self.MediaServerInstance = MediaServer(MediaProvider.SERVER_MODE_RANDOM, server_address, media_feed, MediaSrcType=media_type, MediaStartFrom='', MediaBufferBlocSize=self.MediaBufferBlocSize, MediaBufferSize=self.MediaBufferSize, MediaBufferAhead=self.MediaBufferAhead, MediaSubBuffer=media_sub, verbosity=self.verbosity, auth_ip=(renderer.Ip, *(rend.Ip for rend in party), *self.DLNAControllerInstance.ips), MediaBufferRequests=self.MediaBufferRequests, MediaBufferConnections=self.MediaBufferConnections, MediaBufferSpill=self.MediaBufferSpill, MediaBufferPin=self.MediaBufferPin, MediaServerEngine=self.MediaServerEngine)
                     self.MediaServerInstance.start()
                     incoming_event = self.ControlDataStore.IncomingEvent
                     if not self.shutdown_requested:
@@ -6691,12 +8722,12 @@ class DLNAWebInterfaceServer:
                 self.ControlDataStore.ShowStartFrom = False
               if self.ControlDataStore.Status in ('prêt', 'prêt (lecture à partir du début)', 'Arrêt'):
                 self.ControlDataStore.Status = 'en cours...'
-              self.DLNAControllerInstance.send_Play(renderer)
+              self._party_send(party, 'send_Play', renderer)
             except:
               pass
           elif wi_cmd == 'Pause':
             try:
-              self.DLNAControllerInstance.send_Pause(renderer)
+              self._party_send(party, 'send_Pause', renderer)
             except:
               pass
           elif wi_cmd == 'Arrêt':
@@ -6714,7 +8745,7 @@ class DLNAWebInterfaceServer:
             if transport_status in ('PAUSED_PLAYBACK', 'PLAYING', 'TRANSITIONING'):
               old_value = 'STOPPED'
               try:
-                if not self.DLNAControllerInstance.send_Stop(renderer):
+                if not self._party_send(party, 'send_Stop', renderer):
                   raise
               except:
                 new_value = 'STOPPED'
@@ -6727,16 +8758,18 @@ class DLNAWebInterfaceServer:
                 check_renderer = True
           elif wi_cmd == 'Fin':
             try:
-              self.DLNAControllerInstance.send_Stop(renderer)
+              self._party_send(party, 'send_Stop', renderer)
             except:
               pass
           elif (wi_cmd or '')[:4] == 'Jump':
             if wi_cmd[5:].isdecimal():
               jump_ind = max(0, int(wi_cmd[5:]) - 1)
+              if media_resolver:
+                media_resolver.update([])
               if server_mode == MediaProvider.SERVER_MODE_SEQUENTIAL or jump_ind != order[ind]:
                 if media_kind != 'image':
                   try:
-                    self.DLNAControllerInstance.send_Stop(renderer)
+                    self._party_send(party, 'send_Stop', renderer)
                   except:
                     pass
                 new_value = 'STOPPED'
@@ -6744,9 +8777,9 @@ class DLNAWebInterfaceServer:
                   if gapless_status == 2:
                     try:
                       if self.NextMediaServerInstance.MediaProviderInstance.AcceptRanges:
-                        self.DLNAControllerInstance.send_Local_URI_Next(self.Renderer, '', '')
+                        self._party_send(party, 'send_Local_URI_Next', self.Renderer, '', '')
                       else:
-                        self.DLNAControllerInstance.send_URI_Next(self.Renderer, '', '')
+                        self._party_send(party, 'send_URI_Next', self.Renderer, '', '')
                     except:
                       pass
                   gapless_status = -1
@@ -6761,33 +8794,37 @@ class DLNAWebInterfaceServer:
                 restart_from = None
                 jump_ind = None
                 try:
-                  self.DLNAControllerInstance.send_Play(renderer)
+                  self._party_send(party, 'send_Play', renderer)
                 except:
                   pass
           elif playlist and wi_cmd == 'Shuffle':
             if self.ControlDataStore.Shuffle:
               ind = order[ind]
-              order = list(range(len(playlist)))
+              with playlist_lock:
+                order[:] = range(len(order))
               self.ControlDataStore.Shuffle = False
             else:
-              random.shuffle(order)
+              with playlist_lock:
+                random.shuffle(order)
               self.ControlDataStore.Shuffle = True
               if old_value:
                 ind = order.index(ind)
               else:
                 ind = -1
                 try:
-                  self.DLNAControllerInstance.send_Stop(renderer)
+                  self._party_send(party, 'send_Stop', renderer)
                 except:
                   pass
                 new_value = 'STOPPED'
+            if media_resolver:
+              self._resolve_ahead(media_resolver, playlist_lock, playlist, order, ind + 1, self.EndLess or self.ControlDataStore.Shuffle)
             if self.NextMediaServerInstance:
               if gapless_status == 2:
                 try:
                   if self.NextMediaServerInstance.MediaProviderInstance.AcceptRanges:
-                    self.DLNAControllerInstance.send_Local_URI_Next(self.Renderer, '', '')
+                    self._party_send(party, 'send_Local_URI_Next', self.Renderer, '', '')
                   else:
-                    self.DLNAControllerInstance.send_URI_Next(self.Renderer, '', '')
+                    self._party_send(party, 'send_URI_Next', self.Renderer, '', '')
                 except:
                   pass
               gapless_status = -1
@@ -6801,8 +8838,8 @@ class DLNAWebInterfaceServer:
               if not renderer_stopped_position:
                 try:
                   if not self.ControlDataStore.Duration or self.ControlDataStore.Duration == '0':
-                    self.DLNAControllerInstance.send_Play(renderer)
-                  if not self.DLNAControllerInstance.send_Seek(renderer, wi_cmd[5:]):
+                    self._party_send(party, 'send_Play', renderer)
+                  if not self._party_send(party, 'send_Seek', renderer, wi_cmd[5:]):
                     if is_paused:
                       redo_seek = wi_cmd[5:]
                 except:
@@ -6851,9 +8888,9 @@ class DLNAWebInterfaceServer:
             warning_n.clear()
             try:
               if self.NextMediaServerInstance.MediaProviderInstance.AcceptRanges:
-                prep_success = self.DLNAControllerInstance.send_Local_URI_Next(self.Renderer, 'http://%s:%s/media%s' % (*self.NextMediaServerInstance.MediaServerAddress, self.NextMediaServerInstance.MediaProviderInstance.MediaFeedExt), nmedia_title, kind=mediakinds[order[nind]], suburi=nsuburi)
+                prep_success = self._party_send(party, 'send_Local_URI_Next', self.Renderer, 'http://%s:%s/media%s' % (*self.NextMediaServerInstance.MediaServerAddress, self.NextMediaServerInstance.MediaProviderInstance.MediaFeedExt), nmedia_title, kind=mediakinds[order[nind]], suburi=nsuburi)
               else:
-                prep_success = self.DLNAControllerInstance.send_URI_Next(self.Renderer, 'http://%s:%s/media%s' % (*self.NextMediaServerInstance.MediaServerAddress, self.NextMediaServerInstance.MediaProviderInstance.MediaFeedExt), nmedia_title, kind=mediakinds[order[nind]], suburi=nsuburi)
+                prep_success = self._party_send(party, 'send_URI_Next', self.Renderer, 'http://%s:%s/media%s' % (*self.NextMediaServerInstance.MediaServerAddress, self.NextMediaServerInstance.MediaProviderInstance.MediaFeedExt), nmedia_title, kind=mediakinds[order[nind]], suburi=nsuburi)
             except:
               prep_success = False
             if prep_success:
@@ -6875,12 +8912,12 @@ class DLNAWebInterfaceServer:
                 transport_status = ''
             if transport_status == 'PAUSED_PLAYBACK':
               try:
-                if not self.DLNAControllerInstance.send_Play(renderer):
+                if not self._party_send(party, 'send_Play', renderer):
                   raise
               except:
                 transport_status = ''
                 try:
-                  self.DLNAControllerInstance.send_Stop(renderer)
+                  self._party_send(party, 'send_Stop', renderer)
                 except:
                   pass
             if transport_status in ('PLAYING', 'TRANSITIONING', 'PAUSED_PLAYBACK'):
@@ -6889,7 +8926,7 @@ class DLNAWebInterfaceServer:
                 accept_ranges = self.NextMediaServerInstance.MediaProviderInstance.AcceptRanges
               else: 
                 try:
-                  self.DLNAControllerInstance.send_Stop(renderer)
+                  self._party_send(party, 'send_Stop', renderer)
                 except:
                   pass
             new_value = 'STOPPED'
@@ -6904,9 +8941,9 @@ class DLNAWebInterfaceServer:
       if gapless_status == 2:
         try:
           if self.NextMediaServerInstance.MediaProviderInstance.AcceptRanges:
-            self.DLNAControllerInstance.send_Local_URI_Next(self.Renderer, '', '')
+            self._party_send(party, 'send_Local_URI_Next', self.Renderer, '', '')
           else:
-            self.DLNAControllerInstance.send_URI_Next(self.Renderer, '', '')
+            self._party_send(party, 'send_URI_Next', self.Renderer, '', '')
         except:
           pass
     transport_status = ''
@@ -6925,7 +8962,7 @@ class DLNAWebInterfaceServer:
         except:
           pass
       try:
-        if self.DLNAControllerInstance.send_Stop(renderer) is None:
+        if self._party_send(party, 'send_Stop', renderer) is None:
           raise
       except:
         if self.shutdown_requested:
@@ -6948,12 +8985,18 @@ class DLNAWebInterfaceServer:
       except:
         pass
       self.NextMediaServerInstance = None
+    MediaProvider.claim_FFmpeg()
+    if media_resolver:
+      media_resolver.shutdown()
+    MediaProvider.save_youtube_dl_cache()
+    playlist_feed_stop.set()
     self.html_ready = False
     if not check_renderer:
       self.DLNAControllerInstance.send_event_unsubscription(event_listener)
       if event_listener_rc:
         self.DLNAControllerInstance.send_event_unsubscription(event_listener_rc)
     event_notification_listener.stop()
+    self.DLNAControllerInstance.close_soap_connections()
     self.logger.log(2, 'controlstop', LSTRINGS['webinterface'].get('status', 'status') if transport_status or stop_reason else '', transport_status, ':' if transport_status and stop_reason else '', stop_reason)
     if not self.shutdown_requested:
       self.ControlDataStore.Redirect = True
@@ -7008,6 +9051,7 @@ class DLNAWebInterfaceServer:
     if self.RenderersEvent:
       self.DLNAAdvertisementListenerInstance.stop()
       self.RenderersEvent = None
+    self.unwatch_servers()
     self.WebSocketServerInstance.shutdown()
     self.TargetStatus = DLNAWebInterfaceServer.INTERFACE_NOT_RUNNING
     self.Status = DLNAWebInterfaceServer.INTERFACE_NOT_RUNNING
@@ -7045,6 +9089,7 @@ class DLNAWebInterfaceServer:
         self.DLNAWebInterfaceServerInstance.shutdown()
       except:
         pass
+      MediaProvider.save_youtube_dl_cache()
 
 
 if __name__ == '__main__':
@@ -7072,6 +9117,11 @@ if __name__ == '__main__':
   server_parser.add_argument('--bufferquick', '-q', help=LSTRINGS['parser']['bufferquick'], action='store_true')
   server_parser.add_argument('--buffersize', '-b', metavar='BUFFER_SIZE', help=LSTRINGS['parser']['buffersize'], default=75, type=int)
   server_parser.add_argument('--bufferahead', '-a', metavar='BUFFER_AHEAD', help=LSTRINGS['parser']['bufferahead'], default=25, type=int)
+  server_parser.add_argument('--bufferrequests', '-r', metavar='BUFFER_REQUESTS', help=LSTRINGS['parser']['bufferrequests'], default=1, type=int)
+  server_parser.add_argument('--bufferconnections', '-k', metavar='BUFFER_CONNECTIONS', help=LSTRINGS['parser']['bufferconnections'], default=None, type=int)
+  server_parser.add_argument('--bufferspill', '-w', metavar='BUFFER_SPILL', help=LSTRINGS['parser']['bufferspill'], default=0, type=int)
+  server_parser.add_argument('--bufferpin', '-g', metavar='BUFFER_PIN', help=LSTRINGS['parser']['bufferpin'], default=0, type=int)
+  server_parser.add_argument('--asyncio', '-y', help=LSTRINGS['parser']['asyncio'], action='store_true')
   server_parser.add_argument('--muxcontainer', '-m', metavar='MUX_CONTAINER', help=LSTRINGS['parser']['muxcontainer'], choices=['MP4', 'MPEGTS', '!MP4', '!MPEGTS'], default='MP4', type=str.upper)
   server_parser.add_argument('--onreadyplay', '-o', help=LSTRINGS['parser']['onreadyplay'], action='store_true')
   
@@ -7103,9 +9153,9 @@ if __name__ == '__main__':
   if args.command in ('display_renderers', 'r'):
     DLNAWebInterfaceServerInstance = DLNAWebInterfaceServer((args.ip, args.port), DLNAJoinIp=args.join, Launch=DLNAWebInterfaceServer.INTERFACE_DISPLAY_RENDERERS, Renderer_uuid=args.uuid, Renderer_name=args.name, verbosity=args.verbosity)
   elif args.command in ('start', 's'):
-    DLNAWebInterfaceServerInstance = DLNAWebInterfaceServer((args.ip, args.port), DLNAJoinIp=args.join, Launch=DLNAWebInterfaceServer.INTERFACE_START, Renderer_uuid=args.uuid, Renderer_name=args.name, MediaServerMode={'a':MediaProvider.SERVER_MODE_AUTO, 's':MediaProvider.SERVER_MODE_SEQUENTIAL, 'r':MediaProvider.SERVER_MODE_RANDOM, 'g':DLNAWebInterfaceServer.SERVER_MODE_GAPLESS, 'n':DLNAWebInterfaceServer.SERVER_MODE_NONE}.get(args.typeserver,None) , MediaSrc=os.path.abspath(args.mediasrc) if args.mediasrc and not '://' in args.mediasrc else args.mediasrc, MediaStartFrom=args.mediastartfrom, MediaBufferBlocSize=1024 if args.bufferquick else 1048576, MediaBufferSize=args.buffersize, MediaBufferAhead=args.bufferahead, MediaMuxContainer=args.muxcontainer, OnReadyPlay=args.onreadyplay, MediaSubSrc=os.path.abspath(args.mediasubsrc) if args.mediasubsrc and not '://' in args.mediasubsrc else args.mediasubsrc, MediaSubLang=args.mediasublang if (args.mediasublang and args.mediasublang != '.') else ('' if args.mediasublang == '.' else LSTRINGS['parser'].get('mediasublangcode', '')), verbosity=args.verbosity)
+    DLNAWebInterfaceServerInstance = DLNAWebInterfaceServer((args.ip, args.port), DLNAJoinIp=args.join, Launch=DLNAWebInterfaceServer.INTERFACE_START, Renderer_uuid=args.uuid, Renderer_name=args.name, MediaServerMode={'a':MediaProvider.SERVER_MODE_AUTO, 's':MediaProvider.SERVER_MODE_SEQUENTIAL, 'r':MediaProvider.SERVER_MODE_RANDOM, 'g':DLNAWebInterfaceServer.SERVER_MODE_GAPLESS, 'n':DLNAWebInterfaceServer.SERVER_MODE_NONE}.get(args.typeserver,None) , MediaSrc=os.path.abspath(args.mediasrc) if args.mediasrc and not '://' in args.mediasrc else args.mediasrc, MediaStartFrom=args.mediastartfrom, MediaBufferBlocSize=1024 if args.bufferquick else 1048576, MediaBufferSize=args.buffersize, MediaBufferAhead=args.bufferahead, MediaBufferRequests=args.bufferrequests, MediaBufferConnections=args.bufferconnections, MediaBufferSpill=args.bufferspill, MediaBufferPin=args.bufferpin, MediaServerEngine=MediaServer.ENGINE_ASYNCIO if args.asyncio else MediaServer.ENGINE_THREADING, MediaMuxContainer=args.muxcontainer, OnReadyPlay=args.onreadyplay, MediaSubSrc=os.path.abspath(args.mediasubsrc) if args.mediasubsrc and not '://' in args.mediasubsrc else args.mediasubsrc, MediaSubLang=args.mediasublang if (args.mediasublang and args.mediasublang != '.') else ('' if args.mediasublang == '.' else LSTRINGS['parser'].get('mediasublangcode', '')), verbosity=args.verbosity)
   elif args.command in ('control', 'c'):
-    DLNAWebInterfaceServerInstance = DLNAWebInterfaceServer((args.ip, args.port), DLNAJoinIp=args.join, Launch=DLNAWebInterfaceServer.INTERFACE_CONTROL, Renderer_uuid=args.uuid, Renderer_name=args.name, MediaServerMode={'a':MediaProvider.SERVER_MODE_AUTO, 's':MediaProvider.SERVER_MODE_SEQUENTIAL, 'r':MediaProvider.SERVER_MODE_RANDOM, 'g':DLNAWebInterfaceServer.SERVER_MODE_GAPLESS, 'n':DLNAWebInterfaceServer.SERVER_MODE_NONE}.get(args.typeserver,None), MediaSrc=os.path.abspath(args.mediasrc) if not '://' in args.mediasrc else args.mediasrc, MediaStartFrom=args.mediastartfrom, MediaBufferBlocSize=1024 if args.bufferquick else 1048576, MediaBufferSize=args.buffersize, MediaBufferAhead=args.bufferahead, MediaMuxContainer=args.muxcontainer, OnReadyPlay=args.onreadyplay, MediaSubSrc=os.path.abspath(args.mediasubsrc) if args.mediasubsrc and not '://' in args.mediasubsrc else args.mediasubsrc, MediaSubLang=args.mediasublang if (args.mediasublang and args.mediasublang != '.') else ('' if args.mediasublang == '.' else LSTRINGS['parser'].get('mediasublangcode', '')), SlideshowDuration=args.slideshowduration, EndLess=args.endless, verbosity=args.verbosity)
+    DLNAWebInterfaceServerInstance = DLNAWebInterfaceServer((args.ip, args.port), DLNAJoinIp=args.join, Launch=DLNAWebInterfaceServer.INTERFACE_CONTROL, Renderer_uuid=args.uuid, Renderer_name=args.name, MediaServerMode={'a':MediaProvider.SERVER_MODE_AUTO, 's':MediaProvider.SERVER_MODE_SEQUENTIAL, 'r':MediaProvider.SERVER_MODE_RANDOM, 'g':DLNAWebInterfaceServer.SERVER_MODE_GAPLESS, 'n':DLNAWebInterfaceServer.SERVER_MODE_NONE}.get(args.typeserver,None), MediaSrc=os.path.abspath(args.mediasrc) if not '://' in args.mediasrc else args.mediasrc, MediaStartFrom=args.mediastartfrom, MediaBufferBlocSize=1024 if args.bufferquick else 1048576, MediaBufferSize=args.buffersize, MediaBufferAhead=args.bufferahead, MediaBufferRequests=args.bufferrequests, MediaBufferConnections=args.bufferconnections, MediaBufferSpill=args.bufferspill, MediaBufferPin=args.bufferpin, MediaServerEngine=MediaServer.ENGINE_ASYNCIO if args.asyncio else MediaServer.ENGINE_THREADING, MediaMuxContainer=args.muxcontainer, OnReadyPlay=args.onreadyplay, MediaSubSrc=os.path.abspath(args.mediasubsrc) if args.mediasubsrc and not '://' in args.mediasubsrc else args.mediasubsrc, MediaSubLang=args.mediasublang if (args.mediasublang and args.mediasublang != '.') else ('' if args.mediasublang == '.' else LSTRINGS['parser'].get('mediasublangcode', '')), SlideshowDuration=args.slideshowduration, EndLess=args.endless, verbosity=args.verbosity)
 
   if DLNAWebInterfaceServerInstance.start():
     if socket.inet_aton(DLNAWebInterfaceServerInstance.DLNAWebInterfaceServerAddress[0]) == b'\x00\x00\x00\x00':
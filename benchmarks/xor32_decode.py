@@ -0,0 +1,28 @@
+import os
+import sys
+import struct
+import array
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PlayOn import WebSocketRequestHandler
+
+
+def XOR32_decode_words(mask_data):
+  o = len(mask_data) % 4
+  data = mask_data[o:].cast('I')
+  mask = struct.unpack('I', mask_data[o:4].tobytes() + mask_data[0:o].tobytes())[0]
+  return memoryview(array.array('I', map(mask.__xor__, data))).cast('B')[4-o:]
+
+
+if __name__ == '__main__':
+
+  for size in (100, 1000, 10000, 100000, 1048576, 16777216):
+    mask_data = memoryview(os.urandom(4 + size))
+    if bytes(XOR32_decode_words(mask_data)) != bytes(WebSocketRequestHandler.XOR32_decode(mask_data)):
+      print('%9d B   mismatch' % size)
+      continue
+    number = max(1, 1000000 // size)
+    old = min(timeit.repeat(lambda: XOR32_decode_words(mask_data), number=number, repeat=3)) / number
+    new = min(timeit.repeat(lambda: WebSocketRequestHandler.XOR32_decode(mask_data), number=number, repeat=3)) / number
+    print('%9d B   old %9.1f us   new %9.1f us   x%.0f' % (size, old * 1000000, new * 1000000, old / new))
@@ -1,8 +1,11 @@
 @set "ffmpeg_path="C:\Program Files\FFmpeg\bin\ffmpeg.exe""
+@set "ffprobe_path="C:\Program Files\FFmpeg\bin\ffprobe.exe""
 @set "ffmpeg_user_agent="Lavf/ Mozilla/ AppleWebKit/ Chrome/""
 
 @setlocal enabledelayedexpansion
 
+@if "%1" == "probe" goto probe
+
 @if "!mediabuilder_start!" NEQ "" (@set "ffmpeg_st=-ss !mediabuilder_start!") else (@set "ffmpeg_st= ")
 @if "!mediabuilder_start!" NEQ "" (@set "ffmpeg_st-=-ss 0") else (@set "ffmpeg_st-= ")
 
@@ -51,4 +54,14 @@
 
 @endlocal
 
+@exit %ERRORLEVEL%
+
+:probe
+
+@if "!mediabuilder_vid:://=!" == "!mediabuilder_vid!" (@set "ffprobe_vid=-i !mediabuilder_vid!") else (@set "ffprobe_vid=-user_agent !ffmpeg_user_agent! -i !mediabuilder_vid!")
+
+@%ffprobe_path% -v quiet -show_entries format=format_name:stream=codec_type,codec_name -of default=nw=1 !ffprobe_vid!
+
+@endlocal
+
 @exit %ERRORLEVEL%
\ No newline at end of file